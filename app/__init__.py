@@ -1,3 +1,5 @@
+import threading
+import time
 from flask import Flask
 from pathlib import Path
 from datetime import datetime
@@ -36,8 +38,151 @@ def create_app():
     app.config["OUTPUTS_DIR"] = outputs_dir
     app.config["UPLOAD_DIR"] = uploads_dir
 
+    # Augšupielādes tiek glabātas uploads/incoming/<uuid> un dzēstas pēc uzdevuma; True — paturēt
+    app.config.setdefault("KEEP_UPLOADS", False)
+
+    # Fona eksperimentu pūls: worker procesu skaits un maksimālais gaidošo uzdevumu skaits
+    app.config.setdefault("JOB_WORKERS", 2)
+    app.config.setdefault("JOB_QUEUE_LIMIT", 8)
+
+    # Modeļu apmācība viena eksperimenta ietvaros: paralēli (atsevišķos procesos) vai secīgi
+    # CORE_BUDGET ierobežo kopējo kodolu skaitu visiem modeļiem (None = visi kodoli)
+    app.config.setdefault("EXPERIMENT_PARALLEL", False)
+    app.config.setdefault("CORE_BUDGET", None)
+
+    # Modeļu režīms: "ovr" (OneVsRest, viens modelis katram skaitlim) vai "native" (multi-label)
+    app.config.setdefault("MODEL_MODE", "ovr")
+
+    # Features formāts: "dense" (numpy) vai "sparse" (CSR — platiem logiem ievērojami mazāk atmiņas)
+    app.config.setdefault("FEATURE_FORMAT", "dense")
+
+    # Boosting modeļi ar agrīno apturēšanu (pēdējā treniņa daļa — validācijai) un eksperimenta laika budžets
+    # sekundēs (None = bez budžeta; formā — lauki early_stopping un time_budget)
+    app.config.setdefault("EARLY_STOPPING", False)
+    app.config.setdefault("TRAIN_TIME_BUDGET", None)
+
+    # Normalizēto datu kopu krātuve (atkārtota augšupielāde izlaiž nolasīšanu un normalizāciju)
+    app.config.setdefault("DATASET_STORE_DIR", base_dir / "cache" / "datasets")
+    app.config.setdefault("DATASET_STORE_MAX_MB", 512)
+
+    # Eksperimentu rezultātu kešatmiņa (tie paši dati + tā pati konfigurācija -> bez apmācības)
+    app.config.setdefault("RESULT_CACHE_DIR", base_dir / "cache" / "results")
+    app.config.setdefault("RESULT_CACHE_MAX_ENTRIES", 1000)
+    app.config.setdefault("RESULT_CACHE_PROBA", False)
+
+    from .services.store import DatasetStore, ResultCache
+    app.extensions["dataset_store"] = DatasetStore(
+        app.config["DATASET_STORE_DIR"],
+        max_bytes=app.config["DATASET_STORE_MAX_MB"] * 1024 * 1024,
+    )
+    app.extensions["result_cache"] = ResultCache(
+        app.config["RESULT_CACHE_DIR"],
+        max_entries=app.config["RESULT_CACHE_MAX_ENTRIES"],
+        store_proba=app.config["RESULT_CACHE_PROBA"],
+    )
+
+    # Apmācīto modeļu krātuve: 70/30 eksperimenti (/run, /api/experiments) saglabā modeļus diskā,
+    # GET /predict dod nākamās izlozes varbūtības bez pārtrenēšanas
+    # MODEL_CACHE_MAX_MB — procesa iekšējā siltā kešatmiņa ielādētiem modeļiem (LRU)
+    app.config.setdefault("MODEL_STORE", True)
+    app.config.setdefault("MODEL_STORE_DIR", base_dir / "cache" / "models")
+    app.config.setdefault("MODEL_STORE_MAX_MB", 2048)
+    app.config.setdefault("MODEL_CACHE_MAX_MB", 1024)
+
+    from .services.store import ModelStore, ModelCache
+    app.extensions["model_store"] = ModelStore(
+        app.config["MODEL_STORE_DIR"],
+        max_bytes=app.config["MODEL_STORE_MAX_MB"] * 1024 * 1024,
+    )
+    app.extensions["model_cache"] = ModelCache(
+        app.extensions["model_store"],
+        max_bytes=app.config["MODEL_CACHE_MAX_MB"] * 1024 * 1024,
+    )
+
+    # Hiperparametru meklēšana (POST /search): paralēlo worker procesu skaits (None = visi kodoli)
+    # un noklusējuma laika budžets sekundēs (None = bez ierobežojuma)
+    app.config.setdefault("SEARCH_WORKERS", None)
+    app.config.setdefault("SEARCH_TIME_BUDGET", None)
+
+    # Monte Carlo nulles sadalījums metrikām (70/30 eksperimentiem): noklusējuma simulāciju skaits
+    # (0 = izslēgts; formā — lauks null_sims), maksimālais skaits pieprasījumā, sēkla un metode
+    app.config.setdefault("NULL_SIMS", 0)
+    app.config.setdefault("NULL_MAX_SIMS", 20_000)
+    app.config.setdefault("NULL_SEED", 42)
+    app.config.setdefault("NULL_METHOD", "shuffle")
+
+    # JSON API (POST /api/experiments): maksimālais konfigurāciju skaits vienā pieprasījumā
+    app.config.setdefault("API_MAX_CONFIGS", 50)
+
+    # Augšupielādes straumēta apstrāde: rindu skaits vienā blokā
+    app.config.setdefault("INGEST_CHUNK_ROWS", 50_000)
+
+    # Eksperimentu vēsture (SQLite); esošais results_history.csv tiek importēts vienreiz
+    app.config.setdefault("HISTORY_DB", outputs_dir / "history.sqlite3")
+
+    from .services.history import HistoryStore
+    history = HistoryStore(app.config["HISTORY_DB"])
+    history.import_csv(outputs_dir / "results_history.csv")
+    app.extensions["history"] = history
+
+    # Skaitītāji un latentuma histogrammas (GET /metrics); cProfile pa pieprasījumam (profile=1)
+    app.config.setdefault("PROFILING_ALLOWED", True)
+    app.config.setdefault("PROFILES_DIR", outputs_dir / "profiles")
+
+    from .services.instrumentation import MetricsRegistry
+    app.extensions["metrics"] = MetricsRegistry()
+
+    # Modeļu bibliotēkas (sklearn, xgboost) tiek importētas tikai pirmajā izmantošanas reizē
+    # MODEL_WARMUP: pēc MODEL_WARMUP_DELAY sekundēm (kad serveris jau klausās) fonā tiek startēti
+    # worker procesi, kas iepriekš ielādē bibliotēkas, lai pirmais eksperiments to negaidītu
+    app.config.setdefault("MODEL_WARMUP", False)
+    app.config.setdefault("MODEL_WARMUP_DELAY", 1.0)
+
+    # Uzdevumu stāvoklis diskā (JobStore): /jobs/<id> var apkalpot jebkurš servera process
+    app.config.setdefault("JOBS_DIR", outputs_dir / "jobs")
+
+    from .services.models import warm_up
+    from .services.jobs import JobManager, JobStore
+    app.extensions["jobs"] = JobManager(
+        max_workers=app.config["JOB_WORKERS"],
+        max_pending=app.config["JOB_QUEUE_LIMIT"],
+        metrics=app.extensions["metrics"],
+        initializer=warm_up if app.config["MODEL_WARMUP"] else None,
+        store=JobStore(app.config["JOBS_DIR"]),
+    )
+
+    app.extensions["warmup"] = {"status": "disabled"}
+    if app.config["MODEL_WARMUP"]:
+        _start_warmup(app)
+
     # Reģistrē maršrutus
     from .routes import main_bp
     app.register_blueprint(main_bp)
 
-    return app
\ No newline at end of file
+    return app
+
+
+def _start_warmup(app):
+    # Fona pavediens: nogaida, kamēr serveris sāk klausīties, un iepriekš startē worker procesus
+    # Rezultāts (katra worker backend stāvoklis un kopējais ilgums) redzams GET /models/backends
+    from .services.models import backend_status
+
+    jobs = app.extensions["jobs"]
+    metrics = app.extensions["metrics"]
+    state = app.extensions["warmup"] = {"status": "pending"}
+
+    def run():
+        time.sleep(app.config["MODEL_WARMUP_DELAY"])
+        state["status"] = "running"
+        start = time.perf_counter()
+        try:
+            state["workers"] = jobs.warm_up(backend_status)
+            state["status"] = "done"
+        except Exception as exc:
+            state["status"] = "failed"
+            state["error"] = str(exc)
+        state["seconds"] = round(time.perf_counter() - start, 4)
+        metrics.observe("model_warmup_seconds", state["seconds"],
+                        help="Worker procesu startēšanas un modeļu bibliotēku priekšielādes ilgums")
+
+    threading.Thread(target=run, name="model-warmup", daemon=True).start()
@@ -2,24 +2,73 @@
 # - Blueprint: ļauj sadalīt maršrutus pa moduļiem
 # - render_template: ielādē HTML veidnes
 # - request: nolasa formu datus un augšupielādētos failus
-from flask import Blueprint, render_template, request
+# - jsonify / redirect / url_for / current_app: fona uzdevumu (jobs) API un pāradresācija
+from flask import Blueprint, render_template, request, jsonify, redirect, url_for, current_app, Response
 
 # Pathlib nodrošina ērtu un drošu darbu ar failu ceļiem (platformneatkarīgi)
 from pathlib import Path
 
-# datetime tiek izmantots laika zīmoga (timestamp) izveidei saglabātajiem failiem
-from datetime import datetime
+# Laika zīmogs (timestamp) vēstures ierakstiem
+from .services.history import timestamp_now
 
-# Projekta servisi datu apstrādei:
-# - read_table: nolasa CSV/XLSX failu pandas DataFrame formātā
-# - normalize_any: normalizē datus un pārbauda loterijas tipu
-from .services.dataset import read_table, normalize_any
+# Eksperimentu izpilde fona procesā:
+# - run_experiment_from_file: nolasa failu, normalizē datus, pārbauda loterijas tipu un palaiž modeļus
+# - MODEL_NAMES: modeļu saraksts progresa attēlošanai (LEARNED_MODELS — tikai apmācāmie, meklēšanai)
+from .services.experiment import run_experiment_from_file, MODEL_NAMES, LEARNED_MODELS, EVALUATIONS
 
-# Eksperimentu izpilde (modeļi, prognozes utt.)
-from .services.experiment import run_experiment
+# JSON API: vairākas konfigurācijas vienam failam (dati tiek nolasīti un apstrādāti vienreiz)
+from .services.experiment import run_configs_from_file, check_configs, LOTTERY_MAX_NUM
+
+# Saglabāto modeļu atslēgas un nākamās izlozes prognoze (GET /predict)
+from .services.experiment import model_key, predict_next, LOTTERY_K_MAIN
+
+# X features grupas (lagged one-hot, pauzes, slīdošie biežumi, pāri), izvēlamas katram eksperimentam
+from .services.features import check_features, DEFAULT_FEATURES
+
+# Modeļa un features opcijas vienā objektā (validācija, kešatmiņas un modeļu atslēgas)
+from .services.options import ModelOptions
+
+# Hiperparametru meklēšana (grid / successive halving ar laika rindu krustenisko validāciju)
+from .services.search import run_search_from_file, SEARCH_STRATEGIES, SEARCH_METRICS
+from .services.jobs import JobQueueFull, FINISHED_STATES, DONE
+
+# Monte Carlo nulles sadalījuma metodes (p-vērtības pret nejaušu prognozētāju)
+from .services.baseline import NULL_METHODS
+
+# io.StringIO — CSV eksports atmiņā (lejupielādei); uuid — profila faila nosaukumam; os — kodolu skaits
+# json — konfigurāciju nolasīšana un NDJSON straume; re — modeļa atslēgas pārbaude
+import io
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+
+# Augšupielādētā faila nosaukuma attīrīšana (bez ceļa daļām un speciālām rakstzīmēm)
+from werkzeug.utils import secure_filename
+
+# Datu kopu krātuves atslēga (hash no faila satura + loterija + formāts)
+from .services.store import finish_key
+
+# Straumēta augšupielādes saglabāšana un faila sākuma nolasīšana galvenes pārbaudei
+from .services.ingest import save_upload, read_header_chunk
+
+# Droša failu rakstīšana vairākiem worker procesiem (atomāra aizstāšana, slēdzene, unikālas mapes)
+from .services.files import atomic_path, file_lock, unique_dir
+from .services.dataset import check_header
+
+# Posmu laiki, Prometheus metrikas un cProfile kopsavilkums
+from .services.instrumentation import StageTimer, MODEL_STAGES, profile_summary
+
+# Modeļu bibliotēku (sklearn, xgboost) ielādes stāvoklis — tās tiek importētas tikai pēc vajadzības
+from .services.models import backend_status
 
 main_bp = Blueprint("main", __name__)
 
+# Slēdzenes fails outputs mapē: "latest" failu grupa tiek rakstīta tikai vienā uzdevumā vienlaikus
+OUTPUTS_LOCK = ".outputs.lock"
+
 @main_bp.route("/", methods=["GET"])
 def index():
     # Atgriež sākuma lapu ar noklusējuma iestatījumiem
@@ -31,25 +80,175 @@ def index():
             "lottery": "viking",
             "file_format": "raw",
             "window": "1",
+            "window_mode": "concat",
+            "evaluation": "holdout",
+            "refit_every": "10",
+            "null_sims": str(current_app.config["NULL_SIMS"]),
+            "early_stopping": current_app.config["EARLY_STOPPING"],
+            "time_budget": current_app.config["TRAIN_TIME_BUDGET"] or "",
+            "features": list(DEFAULT_FEATURES),
         },
         status="idle",
     )
 
+def _wants_json():
+    # Programmatiskie klienti (fetch, curl) pieprasa JSON ar Accept galveni
+    best = request.accept_mimetypes.best_match(["application/json", "text/html"])
+    return best == "application/json"
+
+def _form_error(error, form_state, code=400):
+    # Atgriež kļūdu formai (HTML) vai JSON klientam
+    if _wants_json():
+        return jsonify({"error": error}), code
+    return render_template(
+        "index.html",
+        error=error,
+        results=None,
+        form_state=form_state,
+        status="idle",
+    )
+
+def _receive_upload(lottery, file_format, timer):
+    # Saglabā augšupielādēto failu (lauks "dataset") un atgriež (ceļš, datu kopu krātuves atslēga)
+    # Kļūdas gadījumā izmet ValueError ar lietotājam saprotamu ziņojumu
+
+    # Pārbauda, vai fails ir augšupielādēts
+    file = request.files.get("dataset")
+    if not file or file.filename == "":
+        raise ValueError("Lūdzu augšupielādējiet datu failu")
+
+    # Katram pieprasījumam sava mape (uploads/incoming/<uuid>), lai vienlaicīgi augšupielādēti faili ar
+    # vienādu nosaukumu (arī no citiem worker procesiem) nepārrakstītu viens otru, kamēr uzdevums gaida rindā
+    upload_dir = unique_dir(Path(current_app.config["UPLOAD_DIR"]) / "incoming")
+    suffix = Path(file.filename).suffix.lower()
+    safe_name = secure_filename(file.filename) or f"upload{suffix}"
+    saved_path = upload_dir / safe_name
+
+    try:
+        # Saglabā failu lokāli pa blokiem (vienlaikus aprēķinot satura hash krātuves atslēgai)
+        with timer.stage("upload_save"):
+            key_hash = save_upload(file.stream, saved_path)
+
+        # Ja tāds pats fails ar tiem pašiem parametriem jau apstrādāts, worker to ņems no krātuves
+        key = finish_key(key_hash, lottery, file_format)
+
+        # Jaunam failam pārbauda galveni jau tagad (nolasot tikai pirmo bloku), lai nepareizs fails
+        # tiktu noraidīts uzreiz, nevis pēc ielikšanas rindā
+        if not current_app.extensions["dataset_store"].contains(key):
+            try:
+                with timer.stage("header_check"):
+                    check_header(read_header_chunk(saved_path), file_format)
+            except Exception as exc:
+                raise ValueError(str(exc) if isinstance(exc, ValueError) else "Neizdevās nolasīt failu")
+    except BaseException:
+        shutil.rmtree(upload_dir, ignore_errors=True)
+        raise
+    return saved_path, key
+
+def _upload_cleanup(saved_path):
+    # on_finish funkcija, kas pēc uzdevuma (jebkura iznākuma) dzēš pieprasījuma augšupielādes mapi
+    # KEEP_UPLOADS=True — faili paliek (atkļūdošanai)
+    if current_app.config["KEEP_UPLOADS"]:
+        return None
+
+    def on_finish(job_id, status):
+        shutil.rmtree(Path(saved_path).parent, ignore_errors=True)
+    return on_finish
+
+def _null_options():
+    # Nulles sadalījuma opcijas no formas (null_sims, null_method) ar noklusējumiem no konfigurācijas
+    # Atgriež vārdnīcu run_experiment argumentiem vai izmet ValueError
+    try:
+        null_sims = int(request.values.get("null_sims", current_app.config["NULL_SIMS"]) or 0)
+    except ValueError:
+        null_sims = -1
+    if not 0 <= null_sims <= current_app.config["NULL_MAX_SIMS"]:
+        raise ValueError(f"Simulāciju skaitam jābūt no 0 līdz {current_app.config['NULL_MAX_SIMS']}")
+    null_method = request.values.get("null_method", current_app.config["NULL_METHOD"])
+    if null_method not in NULL_METHODS:
+        raise ValueError(f"Nezināma nulles sadalījuma metode: {null_method}")
+    return {"null_sims": null_sims, "null_seed": current_app.config["NULL_SEED"], "null_method": null_method}
+
+def _early_stopping_options():
+    # Agrīnās apturēšanas opcijas no formas (early_stopping, time_budget sekundēs; tukšs = bez budžeta)
+    # ar noklusējumiem no konfigurācijas; atgriež vārdnīcu run_experiment argumentiem vai izmet ValueError
+    default = "1" if current_app.config["EARLY_STOPPING"] else ""
+    early_stopping = request.values.get("early_stopping", default) in ("1", "true", "on")
+    budget = request.values.get("time_budget", current_app.config["TRAIN_TIME_BUDGET"])
+    if budget in (None, ""):
+        return {"early_stopping": early_stopping, "time_budget": None}
+    try:
+        time_budget = float(budget)
+    except ValueError:
+        time_budget = 0.0
+    if time_budget <= 0:
+        raise ValueError("Laika budžetam jābūt pozitīvam skaitlim (sekundes)")
+    if not early_stopping:
+        raise ValueError("Laika budžets darbojas tikai ar agrīno apturēšanu")
+    return {"early_stopping": early_stopping, "time_budget": time_budget}
+
+def _features_option():
+    # Features grupas no formas (vairāki "features" lauki vai komatu saraksts; tukšs = DEFAULT_FEATURES)
+    # Atgriež grupu kortežu vai izmet ValueError
+    return check_features(",".join(request.values.getlist("features")) or None)
+
+def _model_options(**options):
+    # ModelOptions ar model_mode un feature_format no konfigurācijas un formas opcijām (features, null_*,
+    # early_stopping, time_budget); izmet ValueError, ja opcijas nav derīgas
+    return ModelOptions(model_mode=current_app.config["MODEL_MODE"],
+                        feature_format=current_app.config["FEATURE_FORMAT"], **options)
+
+def _job_core_budget():
+    # Kodolu budžets vienam fona uzdevumam: CORE_BUDGET (None = visi kodoli) tiek sadalīts starp
+    # JOB_WORKERS vienlaikus izpildāmajiem uzdevumiem (kā run_search un run_batch), katram vismaz 1
+    budget = current_app.config["CORE_BUDGET"] or os.cpu_count() or 1
+    return max(1, budget // current_app.config["JOB_WORKERS"])
+
+def _model_store():
+    # Modeļu krātuve eksperimentiem (None, ja MODEL_STORE izslēgts)
+    return current_app.extensions["model_store"] if current_app.config["MODEL_STORE"] else None
+
 @main_bp.route("/run", methods=["POST"])
 def run():
-    # Apstrādā augšupielādēto failu un palaiž eksperimentu
-    error = None
-    results = None
+    # Pieņem augšupielādēto failu un ieliek eksperimentu fona rindā
+    # Atbilde ir uzreiz: JSON klientiem {"job_id": ...}, pārlūkam — pāradresācija uz uzdevuma lapu
 
     # Nolasa formā ievadītos parametrus
     lottery = request.form.get("lottery", "viking")
     file_format = request.form.get("file_format", "raw")
     window_str = request.form.get("window", "1")
+    window_mode = request.form.get("window_mode", "concat")
+
+    # Novērtēšana: "holdout" (70/30) vai "walk_forward" (izloze pēc izlozes ar pārtrenēšanu)
+    evaluation = request.form.get("evaluation", "holdout")
+    refit_str = request.form.get("refit_every", "10")
+
+    # no_cache=1 izlaiž rezultātu kešatmiņu šim pieprasījumam (modeļi tiek trenēti no jauna)
+    cache_bypass = request.form.get("no_cache", "") in ("1", "true", "on")
+
+    # null_sims > 0 pievieno p-vērtības pret nejaušu prognozētāju (tikai 70/30 eksperimentam)
+    null_sims_str = request.form.get("null_sims", str(current_app.config["NULL_SIMS"]))
+
+    # Boosting ar agrīno apturēšanu un laika budžetu (tikai 70/30 eksperimentam)
+    early_stopping = request.form.get("early_stopping", "1" if current_app.config["EARLY_STOPPING"] else "")
+    time_budget_str = request.form.get("time_budget", current_app.config["TRAIN_TIME_BUDGET"] or "")
+
+    # profile=1 izpilda šo eksperimentu ar cProfile (ja PROFILING_ALLOWED)
+    profile = (request.values.get("profile", "") in ("1", "true", "on")
+               and current_app.config["PROFILING_ALLOWED"])
 
     form_state = {
         "lottery": lottery,
         "file_format": file_format,
         "window": window_str,
+        "window_mode": window_mode,
+        "no_cache": cache_bypass,
+        "evaluation": evaluation,
+        "refit_every": refit_str,
+        "null_sims": null_sims_str,
+        "early_stopping": early_stopping in ("1", "true", "on"),
+        "time_budget": time_budget_str,
+        "features": request.form.getlist("features") or list(DEFAULT_FEATURES),
     }
 
     # Validē loga parametru
@@ -58,95 +257,632 @@ def run():
         if window <= 0:
             raise ValueError
     except ValueError:
-        error = "Loga parametrs ir jābūt pozitīvam veselam skaitlim"
-        return render_template(
-            "index.html",
-            error=error,
-            results=None,
-            form_state=form_state,
-            status="idle",
+        return _form_error("Loga parametrs ir jābūt pozitīvam veselam skaitlim", form_state)
+
+    if evaluation not in EVALUATIONS:
+        return _form_error("Nezināms novērtēšanas veids", form_state)
+
+    try:
+        features = _features_option()
+    except ValueError as exc:
+        return _form_error(str(exc), form_state)
+
+    # Validē pārtrenēšanas intervālu (0 = ansambļi netiek pārtrenēti)
+    try:
+        refit_every = int(refit_str)
+        if refit_every < 0:
+            raise ValueError
+    except ValueError:
+        return _form_error("Pārtrenēšanas intervālam jābūt nenegatīvam veselam skaitlim", form_state)
+
+    # Walk-forward režīmam ir savas opcijas; 70/30 eksperimentam — kešatmiņa un paralēlā apmācība
+    if evaluation == "walk_forward":
+        options = {"refit_every": refit_every, "model_options": _model_options(features=features)}
+    else:
+        try:
+            model_options = _model_options(features=features, **_null_options(), **_early_stopping_options())
+        except ValueError as exc:
+            return _form_error(str(exc), form_state)
+        options = {
+            "parallel": current_app.config["EXPERIMENT_PARALLEL"],
+            "result_cache": current_app.extensions["result_cache"],
+            "cache_bypass": cache_bypass,
+            "model_store": _model_store(),
+            "model_options": model_options,
+        }
+
+    timer = StageTimer()
+    try:
+        saved_path, key = _receive_upload(lottery, file_format, timer)
+    except ValueError as exc:
+        return _form_error(str(exc), form_state)
+    dataset_store = current_app.extensions["dataset_store"]
+
+    profile_path = None
+    if profile:
+        profiles_dir = Path(current_app.config["PROFILES_DIR"])
+        profiles_dir.mkdir(parents=True, exist_ok=True)
+        profile_path = profiles_dir / f"{uuid.uuid4().hex}.prof"
+
+    # Rezultātu saglabāšana notiek galvenajā procesā, kad fona uzdevums pabeigts
+    app = current_app._get_current_object()
+
+    result_cache = current_app.extensions["result_cache"]
+    metrics = current_app.extensions["metrics"]
+
+    def on_done(job, result):
+        df_norm, results, info = result
+        dataset_store.record(info["dataset_cache"] == "hit")
+        metrics.inc("dataset_cache_total", help="Datu kopu krātuves pieprasījumi", result=info["dataset_cache"])
+        if evaluation == "holdout":
+            from_cache = all(r.get("from_cache") for r in results)
+            result_cache.record(from_cache)
+            metrics.inc("result_cache_total", help="Rezultātu kešatmiņas pieprasījumi",
+                        result="hit" if from_cache else "miss")
+        with app.app_context():
+            _save_outputs(df_norm, results, lottery, window, steps=info.get("steps"))
+        _observe_timings(metrics, results)
+        return results
+
+    jobs = current_app.extensions["jobs"]
+    on_finish = _upload_cleanup(saved_path)
+    try:
+        job_id = jobs.submit(
+            run_experiment_from_file,
+            saved_path, lottery, file_format,
+            window=window, window_mode=window_mode,
+            evaluation=evaluation,
+            chunk_rows=current_app.config["INGEST_CHUNK_ROWS"],
+            core_budget=_job_core_budget(),
+            dataset_store=dataset_store,
+            dataset_key=key,
+            timings=timer.timings,
+            profile_path=profile_path,
+            **options,
+            steps=MODEL_NAMES,
+            meta={"form_state": form_state, "profile_path": str(profile_path) if profile_path else None},
+            on_done=on_done,
+            on_finish=on_finish,
         )
+    except JobQueueFull as exc:
+        if on_finish is not None:
+            on_finish(None, None)
+        metrics.inc("jobs_rejected_total", help="Noraidītie eksperimenti (pilna rinda)")
+        return _form_error(str(exc), form_state, code=429)
 
-    # Pārbauda, vai fails ir augšupielādēts
-    file = request.files.get("dataset")
-    if not file or file.filename == "":
-        error = "Lūdzu augšupielādējiet datu failu"
-        return render_template(
-            "index.html",
-            error=error,
-            results=None,
-            form_state=form_state,
-            status="idle",
+    if _wants_json():
+        return jsonify({
+            "job_id": job_id,
+            "status_url": url_for("main.job_status", job_id=job_id),
+            "results_url": url_for("main.job_results", job_id=job_id),
+        }), 202
+
+    return redirect(url_for("main.job_view", job_id=job_id), code=303)
+
+@main_bp.route("/search", methods=["POST"])
+def search():
+    # Hiperparametru meklēšana fona uzdevumā: tie paši dati un loga parametri kā /run, papildus
+    # strategy ("grid" / "halving"), metric, n_folds, time_budget (sekundes), models (komatu saraksts) un features
+    # Rezultāts (leaderboard) — GET /jobs/<id>/results un outputs/search_leaderboard_latest.csv
+
+    lottery = request.form.get("lottery", "viking")
+    file_format = request.form.get("file_format", "raw")
+    window_mode = request.form.get("window_mode", "concat")
+    strategy = request.form.get("strategy", "halving")
+    metric = request.form.get("metric", "logloss")
+    models = [m for m in request.form.get("models", "").split(",") if m] or LEARNED_MODELS
+    form_state = dict(request.form)
+
+    try:
+        window = int(request.form.get("window", "1"))
+        n_folds = int(request.form.get("n_folds", "4"))
+        budget_str = request.form.get("time_budget", "")
+        time_budget = float(budget_str) if budget_str else current_app.config["SEARCH_TIME_BUDGET"]
+    except ValueError:
+        return _form_error("Loga, fold skaita un laika budžeta parametriem jābūt skaitļiem", form_state)
+    if window <= 0 or n_folds <= 0 or (time_budget is not None and time_budget <= 0):
+        return _form_error("Loga, fold skaita un laika budžeta parametriem jābūt pozitīviem", form_state)
+    if strategy not in SEARCH_STRATEGIES:
+        return _form_error("Nezināma meklēšanas stratēģija", form_state)
+    if metric not in SEARCH_METRICS:
+        return _form_error("Nezināma salīdzināšanas metrika", form_state)
+    unknown = [m for m in models if m not in LEARNED_MODELS]
+    if unknown:
+        return _form_error(f"Nezināmi modeļi: {', '.join(unknown)}", form_state)
+    try:
+        model_options = _model_options(features=_features_option())
+    except ValueError as exc:
+        return _form_error(str(exc), form_state)
+
+    timer = StageTimer()
+    try:
+        saved_path, key = _receive_upload(lottery, file_format, timer)
+    except ValueError as exc:
+        return _form_error(str(exc), form_state)
+
+    app = current_app._get_current_object()
+    dataset_store = current_app.extensions["dataset_store"]
+    metrics = current_app.extensions["metrics"]
+
+    def on_done(job, result):
+        leaderboard, info = result
+        dataset_store.record(info["dataset_cache"] == "hit")
+        metrics.inc("dataset_cache_total", help="Datu kopu krātuves pieprasījumi", result=info["dataset_cache"])
+        with app.app_context():
+            import pandas as pd
+            with atomic_path(app.config["OUTPUTS_DIR"] / "search_leaderboard_latest.csv") as tmp:
+                pd.DataFrame(leaderboard).to_csv(tmp, index=False)
+        return leaderboard
+
+    jobs = current_app.extensions["jobs"]
+    on_finish = _upload_cleanup(saved_path)
+    try:
+        job_id = jobs.submit(
+            run_search_from_file,
+            saved_path, lottery, file_format,
+            window=window, window_mode=window_mode,
+            chunk_rows=current_app.config["INGEST_CHUNK_ROWS"],
+            dataset_store=dataset_store,
+            dataset_key=key,
+            timings=timer.timings,
+            model_names=models,
+            strategy=strategy,
+            metric=metric,
+            n_folds=n_folds,
+            time_budget=time_budget,
+            workers=current_app.config["SEARCH_WORKERS"],
+            core_budget=_job_core_budget(),
+            model_options=model_options,
+            steps=models,
+            meta={"form_state": form_state, "kind": "search"},
+            on_done=on_done,
+            on_finish=on_finish,
         )
+    except JobQueueFull as exc:
+        if on_finish is not None:
+            on_finish(None, None)
+        metrics.inc("jobs_rejected_total", help="Noraidītie eksperimenti (pilna rinda)")
+        return _form_error(str(exc), form_state, code=429)
 
-    # Saglabā failu lokāli
-    upload_dir = Path(main_bp.root_path).resolve().parent / "uploads"
-    upload_dir.mkdir(parents=True, exist_ok=True)
+    return jsonify({
+        "job_id": job_id,
+        "status_url": url_for("main.job_status", job_id=job_id),
+        "results_url": url_for("main.job_results", job_id=job_id),
+    }), 202
 
-    safe_name = file.filename.replace(" ", "_")
-    saved_path = upload_dir / safe_name
-    file.save(saved_path)
+@main_bp.route("/api/experiments", methods=["POST"])
+def api_experiments():
+    # JSON API: viens fails + vairākas konfigurācijas (multipart forma)
+    # Lauki: dataset (fails), lottery, file_format, configs — JSON saraksts, piem.
+    #   [{"window": 1}, {"window": 3, "window_mode": "sum", "split_ratio": 0.8, "models": ["logreg_sgd"]},
+    #    {"window": 1, "features": ["lags", "gaps", "freq", "pairs"]}]
+    # stream=1 (noklusējums) — atbilde ir NDJSON straume: katras konfigurācijas rezultāti, tiklīdz tā pabeigta
+    # stream=0 — uzreiz 202 {"job_id": ...}; rezultāti — GET /jobs/<id>/results
+
+    lottery = request.form.get("lottery", "viking")
+    file_format = request.form.get("file_format", "raw")
+    stream = request.values.get("stream", "1") not in ("0", "false", "off")
+    no_cache = request.form.get("no_cache", "") in ("1", "true", "on")
+
+    if lottery not in LOTTERY_MAX_NUM:
+        return jsonify({"error": "Nezināms loterijas tips"}), 400
+    try:
+        configs = check_configs(json.loads(request.form.get("configs") or "null"),
+                                max_configs=current_app.config["API_MAX_CONFIGS"])
+        model_options = _model_options(**_null_options(), **_early_stopping_options())
+    except json.JSONDecodeError:
+        return jsonify({"error": "Konfigurācijām jābūt JSON sarakstam"}), 400
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    timer = StageTimer()
+    try:
+        saved_path, key = _receive_upload(lottery, file_format, timer)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    app = current_app._get_current_object()
+    dataset_store = current_app.extensions["dataset_store"]
+    result_cache = current_app.extensions["result_cache"]
+    metrics = current_app.extensions["metrics"]
+
+    def on_done(job, result):
+        df_norm, results, info = result
+        dataset_store.record(info["dataset_cache"] == "hit")
+        metrics.inc("dataset_cache_total", help="Datu kopu krātuves pieprasījumi", result=info["dataset_cache"])
+        for i in range(len(configs)):
+            from_cache = all(r.get("from_cache") for r in results if r["config"] == i)
+            result_cache.record(from_cache)
+            metrics.inc("result_cache_total", help="Rezultātu kešatmiņas pieprasījumi",
+                        result="hit" if from_cache else "miss")
+        with app.app_context():
+            # Katrai rindai vēsturē ir savas konfigurācijas logs
+            _save_outputs(df_norm, results, lottery, window=None)
+        _observe_timings(metrics, results)
+        return results
 
+    jobs = current_app.extensions["jobs"]
+    steps = [f"config_{i}" for i in range(len(configs))]
+    on_finish = _upload_cleanup(saved_path)
     try:
-        # Nolasa failu ar pandas
-        df_raw = read_table(saved_path)
+        job_id = jobs.submit(
+            run_configs_from_file,
+            saved_path, lottery, file_format, configs,
+            chunk_rows=current_app.config["INGEST_CHUNK_ROWS"],
+            dataset_store=dataset_store,
+            dataset_key=key,
+            timings=timer.timings,
+            parallel=current_app.config["EXPERIMENT_PARALLEL"],
+            core_budget=_job_core_budget(),
+            result_cache=result_cache,
+            cache_bypass=no_cache,
+            model_store=_model_store(),
+            model_options=model_options,
+            steps=steps,
+            meta={"kind": "api", "configs": configs},
+            on_done=on_done,
+            on_finish=on_finish,
+        )
+    except JobQueueFull as exc:
+        if on_finish is not None:
+            on_finish(None, None)
+        metrics.inc("jobs_rejected_total", help="Noraidītie eksperimenti (pilna rinda)")
+        return jsonify({"error": str(exc)}), 429
+
+    if not stream:
+        return jsonify({
+            "job_id": job_id,
+            "status_url": url_for("main.job_status", job_id=job_id),
+            "results_url": url_for("main.job_results", job_id=job_id),
+        }), 202
+
+    results_url = url_for("main.job_results", job_id=job_id)
+    return Response(_stream_configs(jobs, job_id, configs, results_url), mimetype="application/x-ndjson")
+
+# Cik bieži NDJSON straume pārbauda jaunus daļējos rezultātus (sekundes)
+STREAM_POLL_SECONDS = 0.2
 
-        # Normalizē datus un pārbauda loterijas tipu
-        df_norm = normalize_any(df_raw, lottery=lottery, file_format=file_format)
+def _ndjson(event):
+    return json.dumps(event, default=str) + "\n"
 
-        # Palaiž eksperimentu
-        results = run_experiment(df_norm, lottery=lottery, window=window)
+def _stream_configs(jobs, job_id, configs, results_url):
+    # NDJSON notikumi: {"event": "accepted"}, katrai konfigurācijai {"event": "result"}, beigās {"event": "end"}
+    # Ja klients atvienojas, uzdevums turpinās (rezultāti — results_url)
+    # Ģenerators darbojas ārpus pieprasījuma konteksta, tāpēc izmanto tikai jobs objektu
 
-        # Saglabā rezultātus
-        _save_outputs(df_norm, results, lottery, window)
+    yield _ndjson({"event": "accepted", "job_id": job_id, "configs": len(configs), "results_url": results_url})
+
+    sent = set()
+
+    def result_event(i, results):
+        sent.add(i)
+        return _ndjson({"event": "result", "config": i, "params": configs[i], "results": results})
+
+    while True:
+        job = jobs.get(job_id)
+        for item in job["partial"]:
+            if item["data"]["config"] not in sent:
+                yield result_event(item["data"]["config"], item["data"]["results"])
+        if job["status"] in FINISHED_STATES:
+            break
+        time.sleep(STREAM_POLL_SECONDS)
+
+    # Pēdējie daļējie rezultāti var pienākt vēlāk par uzdevuma beigām — tie tiek ņemti no gala rezultātiem
+    if job["status"] == DONE:
+        for i in range(len(configs)):
+            if i not in sent:
+                yield result_event(i, [r for r in job["results"] if r["config"] == i])
+
+    yield _ndjson({"event": "end", "job_id": job_id, "status": job["status"], "error": job["error"]})
+
+def _observe_timings(metrics, results):
+    # Pievieno rezultātu rindu t_<posms> laikus histogrammām:
+    # kopīgie posmi (nolasīšana, normalizācija, features, saglabāšana) — vienreiz par skrējienu,
+    # modeļa posmi (fit, predict, metrics) — katram modelim
+    if not results:
+        return
+    for key, value in results[0].items():
+        stage = key[2:]
+        if key.startswith("t_") and stage not in MODEL_STAGES and value is not None:
+            metrics.observe("stage_seconds", value, help="Eksperimenta plūsmas posmu ilgums", stage=stage)
+    for res in results:
+        if res.get("from_cache"):
+            continue
+        for stage in MODEL_STAGES:
+            if res.get(f"t_{stage}") is not None:
+                metrics.observe("model_stage_seconds", res[f"t_{stage}"],
+                                help="Modeļa apmācības, prognozes un metriku ilgums",
+                                model=res["model"], stage=stage)
+
+def _job_or_404(job_id):
+    job = current_app.extensions["jobs"].get(job_id)
+    if job is None:
+        return None, (jsonify({"error": "Uzdevums nav atrasts"}), 404)
+    return job, None
+
+def _job_public(job):
+    # Uzdevuma stāvoklis bez rezultātiem (tie ir atsevišķā endpointā)
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "created": job["created"],
+        "started": job["started"],
+        "finished": job["finished"],
+        "error": job["error"],
+    }
 
-        status = "done"
+@main_bp.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    # Uzdevuma statuss un progress pa modeļiem
+    job, err = _job_or_404(job_id)
+    if err:
+        return err
+    return jsonify(_job_public(job))
 
-    except Exception as exc:
-        error = str(exc)
-        status = "idle"
+@main_bp.route("/jobs/<job_id>/results", methods=["GET"])
+def job_results(job_id):
+    # Gala rezultāti (409, ja uzdevums vēl nav veiksmīgi pabeigts)
+    job, err = _job_or_404(job_id)
+    if err:
+        return err
+    if job["status"] != "done":
+        return jsonify(_job_public(job)), 409
+    return jsonify({"job_id": job_id, "results": job["results"]})
+
+@main_bp.route("/jobs/<job_id>/profile", methods=["GET"])
+def job_profile(job_id):
+    # cProfile kopsavilkums (teksts) uzdevumam, kas palaists ar profile=1
+    job, err = _job_or_404(job_id)
+    if err:
+        return err
+    path = job["meta"].get("profile_path")
+    if not path:
+        return jsonify({"error": "Šim uzdevumam profilēšana nav ieslēgta"}), 404
+    if job["status"] not in FINISHED_STATES or not Path(path).exists():
+        return jsonify(_job_public(job)), 409
+    limit = request.args.get("limit", 40, type=int)
+    return Response(profile_summary(path, limit=limit), mimetype="text/plain")
+
+@main_bp.route("/jobs/<job_id>/cancel", methods=["POST"])
+def job_cancel(job_id):
+    # Atceļ gaidošu vai strādājošu uzdevumu
+    job, err = _job_or_404(job_id)
+    if err:
+        return err
+    cancelled = current_app.extensions["jobs"].cancel(job_id)
+    if not _wants_json():
+        return redirect(url_for("main.job_view", job_id=job_id), code=303)
+    return jsonify({"job_id": job_id, "cancelled": cancelled})
+
+@main_bp.route("/jobs/<job_id>/view", methods=["GET"])
+def job_view(job_id):
+    # HTML lapa uzdevumam: kamēr tas strādā, lapa aptaujā /jobs/<job_id>
+    job = current_app.extensions["jobs"].get(job_id)
+    if job is None:
+        return redirect(url_for("main.index"))
+
+    form_state = job["meta"].get("form_state", {})
+    status = job["status"]
+    if status == "done":
+        view_status = "done"
+    elif status in FINISHED_STATES:
+        view_status = "idle"
+    else:
+        view_status = "running"
+
+    error = job["error"]
+    if status == "cancelled":
+        error = "Eksperiments tika atcelts"
+
+    # Meklēšanas leaderboard rindām nav eksperimenta tabulas kolonnu — tas ir pieejams /jobs/<id>/results
+    results = job["results"] if job["meta"].get("kind") != "search" else None
 
     return render_template(
         "index.html",
         error=error,
         results=results,
         form_state=form_state,
-        status=status,
+        status=view_status,
+        job=_job_public(job),
     )
 
-def _timestamp():
-    # Izveido laika zīmogu vēstures ierakstiem (datums + laiks milisekundēs)
-    now = datetime.now()
-    return now.strftime("%Y-%m-%d %H:%M:%S.") + f"{int(now.microsecond / 1000):03d}"
+@main_bp.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    # Skaitītāji un latentuma histogrammas Prometheus teksta formātā
+    return Response(current_app.extensions["metrics"].render(),
+                    mimetype="text/plain; version=0.0.4")
+
+@main_bp.route("/datasets/stats", methods=["GET"])
+def dataset_stats():
+    # Datu kopu krātuves statistika: trāpījumi, netrāpījumi, ierakstu skaits un izmērs
+    return jsonify(current_app.extensions["dataset_store"].stats())
+
+@main_bp.route("/models/backends", methods=["GET"])
+def model_backends():
+    # Modeļu bibliotēku stāvoklis: vai ielādētas šajā (servera) procesā un fona priekšielādes rezultāts
+    return jsonify({
+        "server": backend_status(),
+        "warmup": current_app.extensions["warmup"],
+    })
+
+# Modeļa atslēga: <datu nospiedums>_<konfigurācijas hash> (store.config_key)
+MODEL_KEY_RE = re.compile(r"[0-9a-f]{32}_[0-9a-f]{32}")
+
+# Datu kopas nospiedums (dataset_fp no rezultātu rindas; krātuvēs — atslēgas sākums)
+DATASET_FP_RE = re.compile(r"[0-9a-f]{1,32}")
+
+@main_bp.route("/predict", methods=["GET", "POST"])
+def predict():
+    # Nākamās izlozes varbūtības no saglabāta modeļa (bez pārtrenēšanas)
+    # Parametri: key (model_key no rezultātu rindas) vai dataset_fp + lottery + model un pēc izvēles
+    # window, window_mode, split_ratio, early_stopping, features (model_mode un feature_format — no konfigurācijas)
+    # Atbilde: {"probabilities": [max_num], "top": k_main skaitļi ar lielāko varbūtību, ...}
+
+    start = time.perf_counter()
+    values = request.values
+    key = values.get("key")
+    if not key:
+        dataset_fp = values.get("dataset_fp")
+        lottery = values.get("lottery", "viking")
+        if not dataset_fp:
+            return jsonify({"error": "Jānorāda key vai dataset_fp"}), 400
+        if lottery not in LOTTERY_MAX_NUM:
+            return jsonify({"error": "Nezināms loterijas tips"}), 400
+        try:
+            window = int(values.get("window", "1"))
+            split_ratio = float(values.get("split_ratio", "0.7"))
+            if window <= 0:
+                raise ValueError("Loga parametrs ir jābūt pozitīvam veselam skaitlim")
+            model_options = ModelOptions(
+                model_mode=values.get("model_mode", current_app.config["MODEL_MODE"]),
+                feature_format=values.get("feature_format", current_app.config["FEATURE_FORMAT"]),
+                early_stopping=values.get("early_stopping", "") in ("1", "true", "on"),
+                features=_features_option(),
+            )
+            key = model_key(dataset_fp, lottery, values.get("model", "logreg_sgd"), window=window,
+                            window_mode=values.get("window_mode", "concat"), split_ratio=split_ratio,
+                            model_options=model_options)
+        except ValueError as exc:
+            return jsonify({"error": str(exc)}), 400
+
+    # Atslēga ir faila nosaukums krātuvē, tāpēc tiek pieņemts tikai config_key formāts
+    if not MODEL_KEY_RE.fullmatch(key):
+        return jsonify({"error": "Nederīga modeļa atslēga"}), 400
+
+    predicted = predict_next(current_app.extensions["model_cache"], key)
+    if predicted is None:
+        return jsonify({"error": "Modelis nav saglabāts — vispirms palaidiet eksperimentu ar šiem parametriem",
+                        "key": key}), 404
+    proba, meta, warm = predicted
+
+    metrics = current_app.extensions["metrics"]
+    metrics.inc("model_cache_total", help="Saglabāto modeļu kešatmiņas pieprasījumi (/predict)",
+                result="hit" if warm else "miss")
+    seconds = time.perf_counter() - start
+    metrics.observe("predict_seconds", seconds, help="/predict ilgums (ielāde no diska un prognoze)",
+                    cache="hit" if warm else "miss")
+
+    k_main = meta.get("k_main", LOTTERY_K_MAIN.get(meta["lottery"]))
+    top = (proba.argsort(kind="stable")[::-1][:k_main] + 1).tolist()
+    return jsonify({
+        "key": key,
+        **meta,
+        "probabilities": proba.tolist(),
+        "top": top,
+        "warm": warm,
+        "seconds": round(seconds, 4),
+    })
+
+@main_bp.route("/models/store/stats", methods=["GET"])
+def model_store_stats():
+    # Saglabāto modeļu krātuves (disks) un siltās kešatmiņas (atmiņa) statistika
+    return jsonify({
+        "enabled": current_app.config["MODEL_STORE"],
+        "store": current_app.extensions["model_store"].stats(),
+        "memory": current_app.extensions["model_cache"].stats(),
+    })
 
-def _save_outputs(df_norm, results, lottery, window):
-    # Saglabā tikai trīs failus:
+@main_bp.route("/models/store/invalidate", methods=["POST"])
+def model_store_invalidate():
+    # Dzēš saglabātos modeļus: visus vai tikai vienai datu kopai (dataset_fp)
+    dataset_fp = request.values.get("dataset_fp") or None
+    if dataset_fp is not None and not DATASET_FP_RE.fullmatch(dataset_fp):
+        return jsonify({"error": "Nederīgs datu kopas nospiedums"}), 400
+    current_app.extensions["model_cache"].invalidate(dataset_fp)
+    removed = current_app.extensions["model_store"].invalidate(dataset_fp)
+    return jsonify({"removed": removed})
+
+@main_bp.route("/results-cache/stats", methods=["GET"])
+def result_cache_stats():
+    # Rezultātu kešatmiņas statistika
+    return jsonify(current_app.extensions["result_cache"].stats())
+
+@main_bp.route("/results-cache/invalidate", methods=["POST"])
+def result_cache_invalidate():
+    # Dzēš rezultātu kešatmiņu: visu vai tikai vienai datu kopai (dataset_fp no rezultātu rindas)
+    dataset_fp = request.values.get("dataset_fp") or None
+    if dataset_fp is not None and not DATASET_FP_RE.fullmatch(dataset_fp):
+        return jsonify({"error": "Nederīgs datu kopas nospiedums"}), 400
+    removed = current_app.extensions["result_cache"].invalidate(dataset_fp)
+    return jsonify({"removed": removed})
+
+def _history_filters():
+    # Nolasa vēstures filtrus no query string (tukšs = nefiltrēt)
+    window = request.args.get("window") or None
+    return {
+        "lottery": request.args.get("lottery") or None,
+        "model": request.args.get("model") or None,
+        "window": int(window) if window is not None else None,
+        "since": request.args.get("since") or None,
+        "until": request.args.get("until") or None,
+    }
+
+@main_bp.route("/history", methods=["GET"])
+def history():
+    # Eksperimentu vēsture ar filtriem (lottery, model, window, since, until) un lapošanu (limit, offset)
+    try:
+        filters = _history_filters()
+        limit = int(request.args.get("limit", 100))
+        offset = int(request.args.get("offset", 0))
+    except ValueError:
+        return jsonify({"error": "window, limit un offset jābūt veseliem skaitļiem"}), 400
+
+    rows, total = current_app.extensions["history"].query(limit=limit, offset=offset, **filters)
+    return jsonify({"total": total, "limit": limit, "offset": offset, "results": rows})
+
+@main_bp.route("/history/export.csv", methods=["GET"])
+def history_export():
+    # Vēstures CSV eksports pēc pieprasījuma (tie paši filtri kā /history, bez lapošanas)
+    try:
+        filters = _history_filters()
+    except ValueError:
+        return jsonify({"error": "window jābūt veselam skaitlim"}), 400
+
+    buf = io.StringIO()
+    current_app.extensions["history"].export_csv(buf, **filters)
+    return Response(
+        buf.getvalue(),
+        mimetype="text/csv",
+        headers={"Content-Disposition": "attachment; filename=results_history.csv"},
+    )
+
+def _save_outputs(df_norm, results, lottery, window=None, steps=None):
+    # Saglabā divus failus un vēstures ierakstu:
     # - normalized_latest.csv (pēdējais normalizētais datasets)
     # - results_latest.csv (pēdējie eksperimenta rezultāti)
-    # - results_history.csv (visu skrējienu vēsture)
+    # - vēsture SQLite datubāzē (tikai pievieno rindas; CSV — /history/export.csv)
+    # Walk-forward režīmā papildus backtest_steps_latest.csv (metrikas katram solim)
+    # window=None — katras rindas logs vēsturē tiek ņemts no rindas (vairākas konfigurācijas)
+    # Faili tiek rakstīti atomāri (pagaidu fails + pārdēvēšana) un zem slēdzenes starp procesiem,
+    # lai "latest" faili vienmēr būtu pilni un no viena un tā paša uzdevuma
 
     from flask import current_app
     import pandas as pd
 
     outputs_dir = current_app.config["OUTPUTS_DIR"]
 
-    # 1) Saglabā pēdējo normalizēto datasetu
-    df_norm.to_csv(outputs_dir / "normalized_latest.csv", index=False)
+    start = time.perf_counter()
+
+    with file_lock(outputs_dir / OUTPUTS_LOCK):
+        # 1) Saglabā pēdējo normalizēto datasetu
+        with atomic_path(outputs_dir / "normalized_latest.csv") as tmp:
+            df_norm.to_csv(tmp, index=False)
+        if steps is not None:
+            with atomic_path(outputs_dir / "backtest_steps_latest.csv") as tmp:
+                steps.to_csv(tmp, index=False)
 
-    # 2) Saglabā pēdējos rezultātus
-    df_res = pd.DataFrame(results)
-    df_res.to_csv(outputs_dir / "results_latest.csv", index=False)
+        # Rezultātu rindās t_save_outputs ietver lielākos failus (normalizētie dati, soļi);
+        # pilns saglabāšanas laiks (ar vēsturi) tiek pievienots /metrics histogrammai
+        saved = round(time.perf_counter() - start, 4)
+        for res in results:
+            res["t_save_outputs"] = saved
+
+        # 2) Saglabā pēdējos rezultātus
+        with atomic_path(outputs_dir / "results_latest.csv") as tmp:
+            pd.DataFrame(results).to_csv(tmp, index=False)
 
     # 3) Pievieno rezultātus vēsturei
-    history_path = outputs_dir / "results_history.csv"
-    df_res_with_meta = df_res.copy()
-    df_res_with_meta["timestamp"] = _timestamp()
-    df_res_with_meta["lottery"] = lottery
-    df_res_with_meta["window"] = window
-
-    if history_path.exists():
-        df_old = pd.read_csv(history_path)
-        df_all = pd.concat([df_old, df_res_with_meta], ignore_index=True)
-        df_all.to_csv(history_path, index=False)
-    else:
-        df_res_with_meta.to_csv(history_path, index=False)
\ No newline at end of file
+    current_app.extensions["history"].append(results, timestamp_now(), lottery, window)
+    current_app.extensions["metrics"].observe("save_outputs_seconds", time.perf_counter() - start,
+                                              help="Rezultātu CSV un vēstures saglabāšanas ilgums")
\ No newline at end of file
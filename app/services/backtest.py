@@ -0,0 +1,170 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+# Walk-forward backtests: modelis tiek novērtēts izlozi pēc izlozes laika secībā
+# - sākumā modeļi tiek apmācīti uz vecākajām start_ratio rindām
+# - katram nākamajam solim t: prognoze izlozei t tikai no datiem līdz t-1, pēc tam izloze t kļūst par treniņa datiem
+# - SGD loģistiskā regresija tiek atjaunināta inkrementāli (partial_fit ar katru jaunu izlozi)
+# - RandomForest un XGBoost tiek pilnībā pārtrenēti ik pēc refit_every soļiem (starp tiem — tas pats modelis)
+# - bāzes modeļi (frequency, decayed_frequency, recency) jau ir walk-forward: viens kumulatīvs piegājiens
+# Rezultāts: metrikas katram solim un kopējās metrikas (tās pašas kā 70/30 eksperimentā)
+
+from .features import build_draw_matrix, build_lagged_features
+from .metrics import evaluate, evaluate_rows
+from .models import MODEL_BUILDERS, IncrementalLogReg, set_n_jobs, fit_and_predict
+from .frequency import FREQUENCY_MODELS, predict_frequency
+from .experiment import LOTTERY_MAX_NUM, LOTTERY_K_MAIN, MODEL_NAMES
+from .store import array_fingerprint
+from .instrumentation import StageTimer
+from .options import ModelOptions
+
+# Modeļi, kas tiek atjaunināti ar partial_fit (pārējie — ar periodisku pārtrenēšanu)
+INCREMENTAL_MODELS = ("logreg_sgd",)
+
+# Ik pēc cik inkrementālajiem soļiem tiek izsaukts progress (atcelšanas pārbaude)
+PROGRESS_EVERY_STEPS = 50
+
+
+def _walk_incremental(name, X, Y, start, progress=None):
+    # SGD: viena pilna apmācība, tad prognoze + partial_fit katrā solī
+    model = IncrementalLogReg().fit(X[:start], Y[:start])
+    n = len(Y)
+    proba = np.empty((n - start, Y.shape[1]), dtype=np.float64)
+    for t in range(start, n):
+        if progress is not None and t > start and (t - start) % PROGRESS_EVERY_STEPS == 0:
+            # Ļauj atcelt uzdevumu soļu starpā
+            progress(name, "running")
+        proba[t - start] = model.predict_proba(X[t:t + 1])[0]
+        model.partial_fit(X[t:t + 1], Y[t:t + 1])
+    return proba, 1
+
+
+def _walk_refit(name, X, Y, start, refit_every, model_mode, core_budget=None, progress=None):
+    # Ansambļi: pārtrenēšana ik pēc refit_every soļiem, starp tām visa bloka prognoze vienā predict_proba
+    # refit_every=0 nozīmē, ka modelis tiek apmācīts tikai vienreiz
+    n = len(Y)
+    block = refit_every if refit_every > 0 else n - start
+    parts = []
+    refits = 0
+    for b in range(start, n, block):
+        if progress is not None and refits:
+            # Ļauj atcelt uzdevumu starp pārtrenēšanām
+            progress(name, "running")
+        model = MODEL_BUILDERS[name](mode=model_mode)
+        if core_budget is not None:
+            set_n_jobs(model, core_budget)
+        parts.append(fit_and_predict(model, X[:b], Y[:b], X[b:b + block]))
+        refits += 1
+    return np.vstack(parts), refits
+
+
+def run_walk_forward(df_norm: pd.DataFrame, lottery: str, window: int = 1, window_mode: str = "concat",
+                     start_ratio: float = 0.7, refit_every: int = 10, core_budget: int = None, progress=None,
+                     draw_matrix=None, timer=None, model_options: ModelOptions = None):
+    # Izpilda walk-forward backtestu ar visiem modeļiem
+    # start_ratio — vecāko rindu daļa sākotnējai apmācībai
+    # refit_every — cik soļu starp RandomForest/XGBoost pārtrenēšanām (0 = nepārtrenēt)
+    # Atgriež (results, steps):
+    # - results: viena rinda katram modelim ar kopējām metrikām (tās pašas kolonnas kā run_experiment)
+    # - steps: viena rinda katram modelim un solim (datums, logloss, brier, hit_k_main, hit_10)
+    # timer — StageTimer ar iepriekšējo posmu laikiem; rindās tiek pievienotas t_<posms> kolonnas
+    # model_options — ModelOptions (kā run_experiment): model_mode, feature_format ("sparse" — soļu rindas tiek
+    #   ņemtas kā CSR griezumi) un features (katra rinda ir tikai no iepriekšējām izlozēm);
+    #   agrīnā apturēšana un nulles sadalījums backtestā netiek atbalstīti
+
+    if lottery not in LOTTERY_MAX_NUM:
+        raise ValueError("Nezināms loterijas tips eksperimentam")
+    max_num = LOTTERY_MAX_NUM[lottery]
+    k_main = LOTTERY_K_MAIN[lottery]
+
+    if not 0 < start_ratio < 1:
+        raise ValueError("Treniņa daļai jābūt starp 0 un 1")
+    if refit_every < 0:
+        raise ValueError("Pārtrenēšanas intervālam jābūt nenegatīvam veselam skaitlim")
+    opts = model_options if model_options is not None else ModelOptions()
+    if opts.early_stopping or opts.null_sims:
+        raise ValueError("Agrīnā apturēšana un nulles sadalījums darbojas tikai 70/30 eksperimentā")
+
+    if timer is None:
+        timer = StageTimer()
+    with timer.stage("features"):
+        if draw_matrix is None:
+            draw_matrix = build_draw_matrix(df_norm, max_num=max_num)
+        dates, draws = draw_matrix
+        X, Y = build_lagged_features(draws, window=window, mode=window_mode, sparse=opts.sparse,
+                                     features=opts.features)
+        dates = dates.iloc[window:].reset_index(drop=True)
+
+    n = len(Y)
+    if n < 10:
+        raise ValueError("Nepietiek datu pēc lagged apstrādes (vajag vismaz 10 rindas)")
+    start = int(n * start_ratio)
+    dataset_fp = array_fingerprint(draws, dates.to_numpy())[:32]
+
+    Y_test = Y[start:]
+    test_dates = dates.iloc[start:].dt.date.astype(str).to_numpy()
+
+    results = []
+    steps = []
+    for name in MODEL_NAMES:
+        if progress is not None:
+            progress(name, "running")
+
+        t0 = time.perf_counter()
+        if name in FREQUENCY_MODELS:
+            # Y[start:] ir izlozes draws[window + start:]
+            proba, refits = predict_frequency(name, draws, window + start), 0
+        elif name in INCREMENTAL_MODELS:
+            proba, refits = _walk_incremental(name, X, Y, start, progress=progress)
+        else:
+            proba, refits = _walk_refit(name, X, Y, start, refit_every, opts.model_mode,
+                                        core_budget=core_budget, progress=progress)
+        fit_seconds = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        scores = evaluate(Y_test, proba, ks=(k_main, 10))
+        per_step = evaluate_rows(Y_test, proba, ks=(k_main, 10))
+        metrics_seconds = time.perf_counter() - t0
+
+        results.append({
+            "model": name,
+            "logloss": scores["logloss"],
+            "brier": scores["brier"],
+            "hit_k_main": scores["hit_at"][k_main],
+            "hit_10": scores["hit_at"][10],
+            "k_main": int(k_main),
+            "train_rows": int(start),
+            "test_rows": int(len(Y_test)),
+            "train_date_from": dates.iloc[:start].min().date().isoformat(),
+            "train_date_to": dates.iloc[:start].max().date().isoformat(),
+            "test_date_from": dates.iloc[start:].min().date().isoformat(),
+            "test_date_to": dates.iloc[start:].max().date().isoformat(),
+            "window": int(window),
+            "window_mode": window_mode,
+            **opts.columns(),
+            "dataset_fp": dataset_fp,
+            "evaluation": "walk_forward",
+            "refit_every": int(refit_every),
+            "refits": int(refits),
+            "from_cache": False,
+            **timer.columns(),
+            "t_fit": round(fit_seconds, 4),
+            "t_metrics": round(metrics_seconds, 4),
+        })
+
+        steps.append(pd.DataFrame({
+            "model": name,
+            "step": np.arange(len(Y_test)),
+            "date": test_dates,
+            "logloss": per_step["logloss"],
+            "brier": per_step["brier"],
+            "hit_k_main": per_step["hit_at"][k_main],
+            "hit_10": per_step["hit_at"][10],
+        }))
+
+        if progress is not None:
+            progress(name, "done")
+
+    return results, pd.concat(steps, ignore_index=True)
@@ -0,0 +1,170 @@
+import numpy as np
+
+from .metrics import PROBA_EPS, top_k_mask
+
+# Monte Carlo nulles sadalījums metrikām: ko uz tā paša testa loga iegūtu nejaušs prognozētājs
+# - "shuffle": modeļa prognožu rindas tiek sajauktas starp testa izlozēm (tās pašas varbūtības,
+#   bet bez saiknes ar konkrēto izlozi) — pārbauda, vai modelis izmanto vēsturi, nevis tikai biežumus
+# - "labels": katrā rindā varbūtības tiek sajauktas starp skaitļiem (nejaušs skaitļu izvēles prognozētājs;
+#   hit@k šajā gadījumā atbilst nejaušai k skaitļu izvēlei)
+#
+# Visas metrikas ir summas pa rindām, tāpēc simulācijai pietiek ar krustotajiem reizinājumiem
+# Y_i · A_{π(i)} (A = log(p) - log(1-p), p vai top-k maska); pārējie saskaitāmie permutācijā nemainās
+# "shuffle" režīmā krustotie reizinājumi visiem rindu pāriem tiek aprēķināti vienreiz (n x n matricas),
+# un katra simulācija ir tikai indeksēšana un summa — tūkstošiem simulāciju pietiek ar dažām sekundēm
+
+NULL_METHODS = ("shuffle", "labels")
+
+# Metrikas, kurām mazāka vērtība ir labāka (pārējām — lielāka)
+LOWER_IS_BETTER = ("logloss", "brier")
+
+# Līdz šim testa rindu skaitam "shuffle" izmanto n x n matricas; lielākiem logiem — tiešu aprēķinu pa partijām
+GRAM_MAX_ROWS = 4096
+
+# Maksimālais elementu skaits vienā simulāciju partijā (ierobežo atmiņu)
+BATCH_ELEMENTS = 4_000_000
+
+
+def _random_columns(rng, b, n, n_labels, c):
+    # Nejaušas permutācijas pirmās c kolonnas katrai no b x n rindām: [b, n, c] bez atkārtojumiem
+    # Ja c ir mazs pret n_labels (loterijās 5-6 no 48-50), neatkarīgi izvilktas kolonnas ar atkārtojumiem
+    # tiek izvilktas no jauna (tā ir precīzi vienmērīga izvēle bez atkārtošanas, bez pilnas kārtošanas)
+
+    if c * c > 2 * n_labels:
+        return np.argsort(rng.random((b, n, n_labels), dtype=np.float32), axis=2)[:, :, :c]
+
+    cols = rng.integers(0, n_labels, size=(b * n, c))
+    pending = np.arange(b * n)
+    while pending.size:
+        sub = cols[pending]
+        repeated = np.zeros(pending.size, dtype=bool)
+        for i in range(1, c):
+            repeated |= (sub[:, i:i + 1] == sub[:, :i]).any(axis=1)
+        pending = pending[repeated]
+        cols[pending] = rng.integers(0, n_labels, size=(pending.size, c))
+    return cols.reshape(b, n, c)
+
+
+def _cross_sums(Y, mats, n_sims, rng, method, batch_elements=BATCH_ELEMENTS):
+    # Katrai matricai A atgriež masīvu [n_sims] ar sum_i Y_i · A_{perm(i)} (vai rindā sajauktu A_i)
+
+    n, n_labels = Y.shape
+    out = [np.empty(n_sims, dtype=np.float64) for _ in mats]
+    rows = np.arange(n)
+
+    gram = method == "shuffle" and n <= GRAM_MAX_ROWS
+    if gram:
+        # G[i, j] = Y_i · A_j; simulācija = sum_i G[i, perm(i)]
+        grams = [Y @ m.T for m in mats]
+        per_sim = n
+    else:
+        per_sim = n * n_labels
+    if method == "labels":
+        # Y_i ir 0/1, tāpēc Y_i · A_i[σ] ir A_i summa pa c_i nejauši izvēlētām kolonnām (c_i — izlozēto
+        # skaitļu skaits rindā): pietiek ar nejaušas permutācijas pirmajām c_i kolonnām
+        counts = Y.sum(axis=1).astype(np.int64)
+        c_max = max(1, int(counts.max()))
+        weight = (np.arange(c_max)[None, :] < counts[:, None]).astype(np.float32)
+    batch = max(1, batch_elements // per_sim)
+
+    for start in range(0, n_sims, batch):
+        b = min(batch, n_sims - start)
+        if method == "shuffle":
+            perms = rng.permuted(np.broadcast_to(rows, (b, n)), axis=1)
+            if gram:
+                for acc, g in zip(out, grams):
+                    acc[start:start + b] = g[rows, perms].sum(axis=1, dtype=np.float64)
+            else:
+                for acc, m in zip(out, mats):
+                    acc[start:start + b] = np.einsum("ij,bij->b", Y, m[perms], dtype=np.float64)
+        else:
+            # Katrā rindā neatkarīga skaitļu permutācija; vajag tikai tās pirmās c_max pozīcijas
+            cols = _random_columns(rng, b, n, n_labels, c_max)
+            for acc, m in zip(out, mats):
+                acc[start:start + b] = np.einsum("ij,bij->b", weight, m[rows[None, :, None], cols],
+                                                 dtype=np.float64)
+    return out
+
+
+def null_distribution(Y_true: np.ndarray, proba: np.ndarray, ks=(10,), n_sims: int = 1000, seed: int = 42,
+                      method: str = "shuffle", eps: float = PROBA_EPS):
+    # Simulē n_sims nejaušus prognozētājus un atgriež to metriku sadalījumu
+    # Formāts kā evaluate: {"logloss": [n_sims], "brier": [n_sims], "hit_at": {k: [n_sims]}}
+    # Metrikas tiek aprēķinātas tāpat kā evaluate (apgrieztas varbūtības, hit@k = trāpījumi / k)
+
+    if method not in NULL_METHODS:
+        raise ValueError(f"Nezināma nulles sadalījuma metode: {method}")
+    if n_sims <= 0:
+        raise ValueError("Simulāciju skaitam jābūt pozitīvam")
+
+    y = np.asarray(Y_true, dtype=np.float32)
+    raw = np.asarray(proba, dtype=np.float32)
+    p = np.clip(raw, eps, 1 - eps)
+    q = np.clip(1 - raw, eps, 1 - eps)
+    n, n_labels = y.shape
+    total = float(n * n_labels)
+
+    log_q = np.log(q)
+    log_ratio = np.log(p) - log_q
+    ks = [int(k) for k in ks]
+    masks = [top_k_mask(p, k).astype(np.float32) for k in ks]
+
+    rng = np.random.default_rng(seed)
+    ll_cross, p_cross, *hit_cross = _cross_sums(y, [log_ratio, p] + masks, n_sims, rng, method)
+
+    # Saskaitāmie, kas nemainās, sajaucot rindas vai skaitļus rindā
+    log_q_sum = log_q.sum(dtype=np.float64)
+    square_sum = np.square(y).sum(dtype=np.float64) + np.square(p).sum(dtype=np.float64)
+
+    return {
+        "logloss": -(log_q_sum + ll_cross) / total,
+        "brier": (square_sum - 2.0 * p_cross) / total,
+        "hit_at": {k: hits / (n * float(k)) for k, hits in zip(ks, hit_cross)},
+    }
+
+
+def null_columns(observed: dict, null: dict, ci: float = 0.95) -> dict:
+    # Rezultātu rindas kolonnas katrai metrikai: <metrika>_p, _null_mean, _null_lo, _null_hi
+    # observed un null — {metrikas kolonna: vērtība} un {metrikas kolonna: simulāciju masīvs}
+    # p-vērtība ir empīriska (1 + nejaušie, kas ir tikpat labi vai labāki) / (1 + simulācijas);
+    # josla — nulles sadalījuma centrālais ci intervāls
+
+    if not 0 < ci < 1:
+        raise ValueError("Ticamības līmenim jābūt starp 0 un 1")
+    tail = (1 - ci) / 2
+    columns = {}
+    for name, value in observed.items():
+        sims = null[name]
+        if name in LOWER_IS_BETTER:
+            as_good = np.count_nonzero(sims <= value)
+        else:
+            as_good = np.count_nonzero(sims >= value)
+        lo, hi = np.quantile(sims, [tail, 1 - tail])
+        columns[f"{name}_p"] = float((1 + as_good) / (1 + len(sims)))
+        columns[f"{name}_null_mean"] = float(sims.mean())
+        columns[f"{name}_null_lo"] = float(lo)
+        columns[f"{name}_null_hi"] = float(hi)
+    return columns
+
+
+def null_baseline(Y_true: np.ndarray, proba: np.ndarray, scores: dict, k_main: int, n_sims: int = 1000,
+                  seed: int = 42, method: str = "shuffle", ci: float = 0.95) -> dict:
+    # Nulles sadalījuma kolonnas vienam modelim run_experiment rezultātu rindai
+    # scores — evaluate rezultāts tam pašam Y_true un proba (ks ietver k_main un 10)
+
+    null = null_distribution(Y_true, proba, ks=(k_main, 10), n_sims=n_sims, seed=seed, method=method)
+    observed = {
+        "logloss": scores["logloss"],
+        "brier": scores["brier"],
+        "hit_k_main": scores["hit_at"][k_main],
+        "hit_10": scores["hit_at"][10],
+    }
+    sims = {
+        "logloss": null["logloss"],
+        "brier": null["brier"],
+        "hit_k_main": null["hit_at"][k_main],
+        "hit_10": null["hit_at"][10],
+    }
+    columns = null_columns(observed, sims, ci=ci)
+    columns.update(null_sims=int(n_sims), null_method=method)
+    return columns
@@ -0,0 +1,281 @@
+import hashlib
+import itertools
+import json
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+
+import pandas as pd
+from werkzeug.utils import secure_filename
+
+from .experiment import run_experiment, load_draws, LOTTERY_MAX_NUM
+from .features import build_lagged_features
+from .files import atomic_path
+from .history import timestamp_now
+from .ingest import DEFAULT_CHUNK_ROWS
+from .instrumentation import StageTimer
+from .options import ModelOptions
+from .parallel import share_arrays, attach_arrays, release_shared
+from .store import file_key
+
+# Partiju izpilde no komandrindas (bez Flask formas): manifests ar datu kopām un parametru kombinācijām
+# - katra datu kopa tiek nolasīta un normalizēta vienreiz (rezultāts — datu kopu krātuvē)
+# - lagged features tiek aprēķinātas vienreiz katram (window, window_mode) galvenajā procesā un kopā ar
+#   izložu matricu ieliktas koplietojamā atmiņā; grupas kombinācijas (split_ratio, model_mode) tās tikai pievieno
+# - kombinācijas tiek izpildītas procesu pūlā (run_experiment, 70/30 sadalījums)
+# - rezultāti tiek pievienoti tai pašai vēsturei (outputs/history.sqlite3) kā tīmekļa eksperimenti
+# - katra pabeigtā kombinācija tiek atzīmēta vēsturē tajā pašā transakcijā kā tās rezultāti,
+#   tāpēc pārtraukta partija, palaista vēlreiz, turpina no vietas, kur apstājās
+#
+# Manifests (JSON):
+# {
+#   "name": "sweep",
+#   "defaults": {"windows": [1], "window_modes": ["concat"], "split_ratios": [0.7], "model_modes": ["ovr"]},
+#   "datasets": [
+#     {"path": "uploads/viking.xlsx", "lottery": "viking", "file_format": "raw", "windows": [1, 2, 3]}
+#   ]
+# }
+# Ceļi tiek izšķirti relatīvi pret manifesta mapi
+
+# Parametri, kuru visas kombinācijas tiek izpildītas (manifesta atslēga -> run_experiment arguments)
+SWEEP_PARAMS = {
+    "windows": "window",
+    "window_modes": "window_mode",
+    "split_ratios": "split_ratio",
+    "model_modes": "model_mode",
+}
+
+SWEEP_DEFAULTS = {"windows": [1], "window_modes": ["concat"], "split_ratios": [0.7], "model_modes": ["ovr"]}
+
+
+def load_manifest(path: Path):
+    # Nolasa manifestu un atgriež (nosaukums, datu kopu saraksts)
+    # Katrai datu kopai: {"path", "lottery", "file_format", "combos": [{window, window_mode, ...}, ...]}
+
+    path = Path(path)
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError) as exc:
+        raise ValueError(f"Neizdevās nolasīt manifestu: {exc}")
+    if not isinstance(manifest, dict):
+        raise ValueError("Manifestam jābūt JSON objektam")
+
+    manifest_defaults = manifest.get("defaults") or {}
+    if not isinstance(manifest_defaults, dict):
+        raise ValueError("Manifesta defaults jābūt JSON objektam")
+    defaults = dict(SWEEP_DEFAULTS, **manifest_defaults)
+    entries = manifest.get("datasets")
+    if not entries:
+        raise ValueError("Manifestā nav datu kopu (datasets)")
+    if not isinstance(entries, list):
+        raise ValueError("Manifesta datasets jābūt sarakstam")
+
+    datasets = []
+    for i, entry in enumerate(entries, start=1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"Manifesta datu kopai {i} jābūt JSON objektam")
+        if not isinstance(entry.get("path"), str) or not entry["path"]:
+            raise ValueError(f"Manifesta datu kopai {i} nav norādīts ceļš (path)")
+        spec = dict(defaults, **entry)
+        if spec.get("lottery") not in LOTTERY_MAX_NUM:
+            raise ValueError(f"Nezināms loterijas tips manifestā: {spec.get('lottery')}")
+        if spec.get("file_format", "raw") not in ("raw", "prepared"):
+            raise ValueError(f"Nezināms faila formāts manifestā: {spec.get('file_format')}")
+        dataset_path = (path.parent / spec["path"]).resolve()
+        if not dataset_path.exists():
+            raise ValueError(f"Datu fails nav atrasts: {dataset_path}")
+
+        # Viena vērtība (piem., "windows": 3) tiek uzskatīta par sarakstu ar vienu elementu
+        values = [v if isinstance(v, list) else [v] for v in (spec[key] for key in SWEEP_PARAMS)]
+        combos = [dict(zip(SWEEP_PARAMS.values(), combo)) for combo in itertools.product(*values)]
+        datasets.append({
+            "path": dataset_path,
+            "lottery": spec["lottery"],
+            "file_format": spec.get("file_format", "raw"),
+            "combos": combos,
+        })
+    # Nosaukums tiek izmantots izvades faila nosaukumā
+    name = secure_filename(str(manifest.get("name") or "")) or secure_filename(path.stem) or "batch"
+    return name, datasets
+
+
+def combo_marker(dataset_key: str, combo: dict) -> str:
+    # Pabeigtas kombinācijas atzīme vēstures meta tabulā (dati + parametri)
+    config = json.dumps(combo, sort_keys=True)
+    return f"batch:{dataset_key}:{hashlib.sha256(config.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _prepare_dataset(path, lottery, file_format, dataset_store, dataset_key, chunk_rows):
+    # Izpildās worker procesā: nolasa un normalizē failu vienreiz un saglabā krātuvē
+    timer = StageTimer()
+    df_norm, _, cache_state = load_draws(path, lottery, file_format, dataset_store=dataset_store,
+                                         dataset_key=dataset_key, chunk_rows=chunk_rows, timer=timer)
+    return len(df_norm), cache_state, timer.timings
+
+
+def _share_group(draws, dates, window, window_mode, timer):
+    # Galvenajā procesā: lagged features vienam (window, window_mode) un to ielikšana koplietojamā atmiņā
+    # kopā ar izložu matricu; atgriež (shm objekti, specifikācijas, posmu laiki kombinācijām)
+    group_timer = StageTimer(timer.timings)
+    with group_timer.stage("features"):
+        X, Y = build_lagged_features(draws, window=window, mode=window_mode)
+    handles, specs = share_arrays({"X": X, "Y": Y, "draws": draws, "dates": dates.to_numpy()})
+    return handles, specs, group_timer.timings
+
+
+def _run_combo(specs, timings, lottery, combo, core_budget):
+    # Izpildās worker procesā: pievienojas grupas features un izložu matricai un izpilda vienu kombināciju
+    handles, arrays = attach_arrays(specs)
+    try:
+        dates = pd.Series(arrays["dates"].copy())
+        return run_experiment(None, lottery=lottery, draw_matrix=(dates, arrays["draws"]),
+                              lagged=(arrays["X"], arrays["Y"]), core_budget=core_budget,
+                              timer=StageTimer(timings), window=combo["window"], window_mode=combo["window_mode"],
+                              split_ratio=combo["split_ratio"],
+                              model_options=ModelOptions(model_mode=combo["model_mode"]))
+    finally:
+        # Masīvi jāatlaiž pirms shm aizvēršanas
+        arrays.clear()
+        release_shared(handles, unlink=False)
+
+
+def run_batch(manifest_path: Path, history, dataset_store, outputs_dir: Path, workers: int = 2,
+              core_budget: int = None, chunk_rows: int = DEFAULT_CHUNK_ROWS, rerun: bool = False, log=print):
+    # Izpilda visas manifesta kombinācijas; atgriež kopsavilkumu {"done", "skipped", "failed", "results"}
+    # history — HistoryStore, dataset_store — DatasetStore (tie paši, ko izmanto Flask lietotne)
+    # core_budget — kopējais kodolu skaits; katrai kombinācijai tiek dots core_budget // workers
+    # rerun=True izpilda arī jau pabeigtās kombinācijas
+
+    name, datasets = load_manifest(manifest_path)
+    outputs_dir = Path(outputs_dir)
+    per_task_cores = max(1, (core_budget or os.cpu_count() or 1) // workers)
+
+    # Kombinācijas, kas vēl nav pabeigtas (atslēga — faila saturs, tāpēc pārsaukts fails netiek izpildīts vēlreiz)
+    pending = []
+    skipped = 0
+    for ds in datasets:
+        ds["key"] = file_key(ds["path"], ds["lottery"], ds["file_format"])
+        todo = []
+        for combo in ds["combos"]:
+            marker = combo_marker(ds["key"], combo)
+            if not rerun and history.has_marker(marker):
+                skipped += 1
+            else:
+                todo.append((combo, marker))
+        if todo:
+            pending.append((ds, todo))
+
+    total = sum(len(todo) for _, todo in pending)
+    log(f"Partija '{name}': {total} kombinācijas izpildei, {skipped} jau pabeigtas")
+
+    results_all = []
+    done = failed = 0
+    interrupted = False
+    # Koplietojamās atmiņas grupas: id -> [shm objekti, nepabeigto kombināciju skaits]
+    groups = {}
+    group_ids = itertools.count()
+
+    def combo_finished(group_id):
+        groups[group_id][1] -= 1
+        if groups[group_id][1] == 0:
+            release_shared(groups.pop(group_id)[0])
+
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"))
+    try:
+        # 1) katra datu kopa tiek sagatavota vienreiz; 2) pēc tam tās kombinācijas tiek ieliktas pūlā
+        running = {}
+        for ds, todo in pending:
+            future = executor.submit(_prepare_dataset, ds["path"], ds["lottery"], ds["file_format"],
+                                     dataset_store, ds["key"], chunk_rows)
+            running[future] = ("prepare", ds, todo)
+
+        while running:
+            try:
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            except KeyboardInterrupt:
+                # Pirmais Ctrl+C: gaidošās kombinācijas tiek atceltas, strādājošās tiek pabeigtas un saglabātas
+                # Otrais Ctrl+C pārtrauc uzreiz
+                if interrupted:
+                    raise
+                interrupted = True
+                log("Pārtraukts: tiek pabeigtas strādājošās kombinācijas (vēlreiz Ctrl+C — pārtraukt uzreiz)")
+                for future in list(running):
+                    if future.cancel():
+                        del running[future]
+                continue
+
+            for future in finished:
+                kind, ds, item = running.pop(future)
+                try:
+                    result = future.result()
+                except KeyboardInterrupt:
+                    # Ctrl+C terminālī saņem arī worker procesi
+                    interrupted = True
+                    continue
+                except Exception as exc:
+                    if kind == "prepare":
+                        failed += len(item)
+                        log(f"  KĻŪDA {ds['path'].name}: {exc}")
+                    else:
+                        failed += 1
+                        combo_finished(item[2])
+                        log(f"  KĻŪDA {ds['path'].name} {item[0]}: {exc}")
+                    continue
+
+                if kind == "prepare":
+                    rows, cache_state, _ = result
+                    log(f"  {ds['path'].name}: {rows} izlozes ({'no krātuves' if cache_state == 'hit' else 'nolasīts'})")
+                    if interrupted:
+                        continue
+                    timer = StageTimer()
+                    try:
+                        _, (dates, draws), _ = load_draws(ds["path"], ds["lottery"], ds["file_format"],
+                                                          dataset_store=dataset_store, dataset_key=ds["key"],
+                                                          chunk_rows=chunk_rows, timer=timer)
+                    except Exception as exc:
+                        failed += len(item)
+                        log(f"  KĻŪDA {ds['path'].name}: {exc}")
+                        continue
+                    by_lags = {}
+                    for combo, marker in item:
+                        by_lags.setdefault((combo["window"], combo["window_mode"]), []).append((combo, marker))
+                    for (window, window_mode), group in by_lags.items():
+                        try:
+                            handles, specs, timings = _share_group(draws, dates, window, window_mode, timer)
+                        except Exception as exc:
+                            failed += len(group)
+                            log(f"  KĻŪDA {ds['path'].name} window={window} {window_mode}: {exc}")
+                            continue
+                        group_id = next(group_ids)
+                        groups[group_id] = [handles, len(group)]
+                        for combo, marker in group:
+                            f = executor.submit(_run_combo, specs, timings, ds["lottery"], combo, per_task_cores)
+                            running[f] = ("combo", ds, (combo, marker, group_id))
+                    continue
+
+                combo, marker, group_id = item
+                combo_finished(group_id)
+                for res in result:
+                    res.update(batch=name, dataset=ds["path"].name, lottery=ds["lottery"])
+                history.append(result, timestamp_now(), ds["lottery"], combo["window"], marker=marker)
+                results_all.extend(result)
+                done += 1
+                best = min(result, key=lambda r: r["logloss"])
+                log(f"  [{done + failed}/{total}] {ds['path'].name} {combo} -> "
+                    f"labākais {best['model']} logloss={best['logloss']:.4f}")
+    finally:
+        executor.shutdown(wait=not interrupted, cancel_futures=True)
+        for handles, _ in groups.values():
+            release_shared(handles)
+
+    if results_all:
+        outputs_dir.mkdir(parents=True, exist_ok=True)
+        with atomic_path(outputs_dir / f"batch_{name}_latest.csv") as tmp:
+            pd.DataFrame(results_all).to_csv(tmp, index=False)
+
+    log(f"Pabeigtas: {done}, izlaistas: {skipped}, kļūdas: {failed}")
+    if interrupted:
+        # Pabeigtās kombinācijas jau ir vēsturē; atkārtota palaišana turpinās ar pārējām
+        raise KeyboardInterrupt
+    return {"done": done, "skipped": skipped, "failed": failed, "results": results_all}
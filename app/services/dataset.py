@@ -1,10 +1,18 @@
+import time
+
+import numpy as np
 import pandas as pd
+from itertools import chain
 from pathlib import Path
 
 # Definēju kolonnas, kas raksturīgas LatLoto RAW formātam
 # Tas palīdz saprast, ka fails ir RAW un pirms izmantošanas tas jāapstrādā īpašā veidā
 RAW_COLUMNS = ["Izlozes Nr.", "Datums", "Izlozētie skaitļi"]
 
+# Viens skaitļa "tokens" pēc atdalītāju aizvietošanas ar atstarpēm
+# Atbilst tam, ko pieņem int() vecajā _parse_numbers_list (zīme, cipari, "_" starp cipariem)
+_NUMBER_TOKEN = r"(?:^|(?<=\s))([+-]?\d+(?:_\d+)*)(?=\s|$)"
+
 
 def read_table(path: Path) -> pd.DataFrame:
     # Nolasa CSV vai Excel failu, automātiski nosakot formātu pēc paplašinājuma
@@ -80,45 +88,222 @@ def _parse_main_and_bonus(value):
 
 def _detect_lottery_from_numbers(main_counts, bonus_counts, max_main, max_bonus):
     # Mēģina noteikt loterijas tipu pēc datu struktūras
-    
+    # main_counts un bonus_counts var būt saraksti vai numpy masīvi (skaits katrā rindā)
+
+    main_counts = np.asarray(main_counts)
+    bonus_counts = np.asarray(bonus_counts)
+
     # Viking Lotto: 6 galvenie skaitļi (1..48) un 1 bonusa skaitlis (1..5)
-    if max_main <= 48 and all(c == 6 for c in main_counts) and all(b == 1 for b in bonus_counts):
+    if max_main <= 48 and np.all(main_counts == 6) and np.all(bonus_counts == 1):
         return "viking"
 
     # Eurojackpot: 5 galvenie skaitļi + 2 bonusi, diapazoni 1..50 un 1..12
-    if max_main <= 50 and all(c == 5 for c in main_counts) and all(b in (0, 2) for b in bonus_counts):
+    if max_main <= 50 and np.all(main_counts == 5) and np.all(np.isin(bonus_counts, (0, 2))):
         return "euro"
 
     return "unknown"
 
 
-def normalize_any(df_raw: pd.DataFrame, lottery: str, file_format: str) -> pd.DataFrame:
+def normalize_any(df_raw: pd.DataFrame, lottery: str, file_format: str, legacy: bool = False) -> pd.DataFrame:
     # Apstrādā RAW un prepared failus un pārvērš tos vienotā formātā
     # Pēc normalizācijas pārbauda, lai nesajauktu Viking Lotto un Eurojackpot datus
+    # legacy=True izmanto veco rindu-pa-rindai apstrādi (salīdzināšanai ar vektorizēto)
+
+    check_header(df_raw, file_format)
+    if file_format == "raw":
+        df_norm = _normalize_raw(df_raw, legacy=legacy)
+    else:
+        df_norm = _normalize_prepared(df_raw)
+
+    # Šeit notiek galvenā drošības pārbaude
+    _validate_lottery_safety(df_norm, lottery)
+
+    return df_norm
+
+
+def check_header(df_raw: pd.DataFrame, file_format: str):
+    # Pārbauda, vai tabulā ir izvēlētajam formātam vajadzīgās kolonnas
+    # Pietiek ar pirmo bloku, tāpēc straumētā ielādē nepareizs fails tiek noraidīts uzreiz
 
-    
     if file_format == "raw":
         if not is_latloto_raw(df_raw):
             raise ValueError("RAW formāts izvēlēts, bet trūkst nepieciešamās kolonnas")
-        df_norm = _normalize_raw(df_raw)
-
     elif file_format == "prepared":
         if not is_prepared(df_raw):
             raise ValueError("Prepared formāts izvēlēts, bet trūkst nepieciešamās kolonnas")
-        df_norm = _normalize_prepared(df_raw)
-
     else:
         raise ValueError("Nezināms file_format parametrs")
 
-    # Šeit notiek galvenā drošības pārbaude
-    _validate_lottery_safety(df_norm, lottery)
 
+def normalize_chunks(chunks, lottery: str, file_format: str, timer=None) -> pd.DataFrame:
+    # Straumēta normalize_any: chunks ir neapstrādātu DataFrame bloku iterators (piem., iter_table_chunks)
+    # Galvene tiek pārbaudīta pēc pirmā bloka; katrs bloks tiek normalizēts uzreiz, un atmiņā paliek
+    # tikai kompaktās normalizētās kolonnas. Rezultāts ir tāds pats kā normalize_any visai tabulai
+    # timer (StageTimer) — ja dots, tiek uzskaitīts laiks posmiem "read", "normalize" un "validate"
+
+    parts = []
+    date_format = None
+    chunks = iter(chunks)
+    t_read = t_norm = 0.0
+    while True:
+        start = time.perf_counter()
+        chunk = next(chunks, None)
+        t_read += time.perf_counter() - start
+        if chunk is None:
+            break
+
+        start = time.perf_counter()
+        if not parts:
+            check_header(chunk, file_format)
+            if file_format == "prepared":
+                date_format = _guess_date_format(chunk["date"])
+        if file_format == "raw":
+            parts.append(_normalize_raw(chunk, sort=False))
+        else:
+            parts.append(_normalize_prepared(chunk, sort=False, date_format=date_format))
+        t_norm += time.perf_counter() - start
+
+    if not parts:
+        raise ValueError("Fails ir tukšs")
+
+    start = time.perf_counter()
+    df_norm = pd.concat(parts, ignore_index=True)
+    if file_format == "raw" and len(parts) > 1:
+        # Katrā blokā kolonnas dtype ir atkarīgs no trūkstošajām vērtībām tajā blokā,
+        # tāpēc pēc apvienošanas tas tiek noteikts no jauna visai kolonnai
+        for c in ["n1", "n2", "n3", "n4", "n5", "n6", "b1", "b2"]:
+            col = pd.to_numeric(df_norm[c], errors="coerce")
+            present = col.notna().to_numpy()
+            values = col.fillna(0).to_numpy(dtype=np.int64)
+            df_norm[c] = _padded_column((values[:, None], present[:, None]), 0)
+
+    df_norm = df_norm.sort_values("date").reset_index(drop=True)
+    t_norm += time.perf_counter() - start
+
+    start = time.perf_counter()
+    _validate_lottery_safety(df_norm, lottery)
+    if timer is not None:
+        timer.add("read", t_read)
+        timer.add("normalize", t_norm)
+        timer.add("validate", time.perf_counter() - start)
     return df_norm
 
 
-def _normalize_raw(df_raw: pd.DataFrame) -> pd.DataFrame:
+def _guess_date_format(dates: pd.Series):
+    # Nosaka datuma formātu no pirmās teksta vērtības tāpat kā pd.to_datetime(..., dayfirst=True)
+    from pandas.tseries.api import guess_datetime_format
+
+    first = dates.dropna()
+    if first.empty or not isinstance(first.iloc[0], str):
+        return None
+    return guess_datetime_format(first.iloc[0], dayfirst=True)
+
+
+def _normalize_raw(df_raw: pd.DataFrame, legacy: bool = False, sort: bool = True) -> pd.DataFrame:
     # Normalizē LatLoto RAW formātu uz vienotu kolonnu struktūru
     # Tiek izveidotas kolonnas n1..n6 un b1..b2, lai visi dati būtu vienādā formā
+    # Pēc noklusējuma tiek izmantota kolonnu (vektorizētā) apstrāde
+    # sort=False atstāj faila rindu secību (blokiem, kurus kārto pēc apvienošanas)
+
+    if legacy:
+        return _normalize_raw_legacy(df_raw)
+
+    df = df_raw.reset_index(drop=True)
+    n_rows = len(df)
+
+    # Atdalītājus aizvieto ar atstarpēm un sadala pie pirmā "+"
+    # NaN šūnas kļūst par "nan" un tajās vienkārši netiek atrasts neviens skaitlis
+    text = df["Izlozētie skaitļi"].astype(str).str.replace(r"[,;]", " ", regex=True)
+    parts = text.str.partition("+")
+
+    mains = _tokens_to_sorted_matrix(parts[0], n_rows, width=6)
+    bonuses = _tokens_to_sorted_matrix(parts[2], n_rows, width=2)
+
+    data = {
+        "draw_no": df["Izlozes Nr."].to_numpy(),
+        "date": _parse_dates(df["Datums"]),
+    }
+    for i in range(6):
+        data[f"n{i+1}"] = _padded_column(mains, i)
+    for i in range(2):
+        data[f"b{i+1}"] = _padded_column(bonuses, i)
+
+    df_norm = pd.DataFrame(data)
+    if sort:
+        df_norm = df_norm.sort_values("date").reset_index(drop=True)
+    return df_norm
+
+
+def _tokens_to_sorted_matrix(text: pd.Series, n_rows: int, width: int):
+    # Izvelk visus skaitļus no teksta kolonnas un katrā rindā tos sakārto augošā secībā
+    # Atgriež (vērtības [n_rows, width], aizpildījuma maska [n_rows, width])
+    # Ja rindā ir vairāk skaitļu nekā width, liekie tiek atmesti (kā vecajā ceļā)
+
+    values = np.zeros((n_rows, width), dtype=np.int64)
+    present = np.zeros((n_rows, width), dtype=bool)
+
+    found = text.str.findall(_NUMBER_TOKEN)
+    lengths = found.str.len().to_numpy()
+    if lengths.sum() == 0:
+        return values, present
+
+    # Saplacina visus atrastos tokenus vienā masīvā un atceras, no kuras rindas tie nāk
+    rows = np.repeat(np.arange(n_rows), lengths)
+    nums = pd.Series(list(chain.from_iterable(found)), dtype=object).astype(np.int64).to_numpy()
+
+    # Sakārto pēc (rinda, skaitlis) un aprēķina pozīciju rindas ietvaros
+    order = np.lexsort((nums, rows))
+    rows = rows[order]
+    nums = nums[order]
+    pos = np.arange(len(rows)) - np.searchsorted(rows, rows, side="left")
+
+    keep = pos < width
+    values[rows[keep], pos[keep]] = nums[keep]
+    present[rows[keep], pos[keep]] = True
+    return values, present
+
+
+def _padded_column(matrix, i: int) -> pd.Series:
+    # Veido kolonnu ar tādu pašu dtype, kādu dotu pd.DataFrame(records) vecajā ceļā:
+    # - visi skaitļi ir -> int64
+    # - neviena skaitļa nav -> object ar None
+    # - daļēji -> float64 ar NaN
+
+    values, present = matrix
+    col_values = values[:, i]
+    col_present = present[:, i]
+
+    if col_present.all():
+        return pd.Series(col_values, dtype="int64")
+    if not col_present.any():
+        return pd.Series([None] * len(col_values), dtype=object)
+    return pd.Series(np.where(col_present, col_values, np.nan))
+
+
+def _parse_dates(dates: pd.Series) -> pd.Series:
+    # Parsē visu datumu kolonnu vienā izsaukumā
+    # LatLoto datumi ir formā dd.mm.yyyy, tāpēc vispirms mēģinu tieši šo formātu
+    # Ja tas neizdodas (jaukti formāti), katru unikālo vērtību parsē atsevišķi ar to pašu
+    # pd.to_datetime(..., dayfirst=True), ko izmantoja vecais ceļš, lai rezultāts nemainītos
+
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return pd.to_datetime(dates)
+
+    try:
+        return pd.to_datetime(dates, format="%d.%m.%Y")
+    except (ValueError, TypeError):
+        pass
+
+    codes, uniques = pd.factorize(dates)
+    parsed = [pd.to_datetime(u, dayfirst=True) for u in uniques]
+    # Pēdējā pozīcija ir NaT, uz to norāda kods -1 (trūkstošās vērtības)
+    lookup = pd.to_datetime(pd.Series(parsed + [pd.NaT], dtype=object))
+    return pd.Series(lookup.to_numpy()[codes])
+
+
+def _normalize_raw_legacy(df_raw: pd.DataFrame) -> pd.DataFrame:
+    # Sākotnējā rindu-pa-rindai RAW normalizācija
+    # Saglabāta, lai varētu salīdzināt rezultātus ar vektorizēto ceļu
 
     records = []
 
@@ -151,12 +336,14 @@ def _normalize_raw(df_raw: pd.DataFrame) -> pd.DataFrame:
     return df_norm
 
 
-def _normalize_prepared(df_raw: pd.DataFrame) -> pd.DataFrame:
+def _normalize_prepared(df_raw: pd.DataFrame, sort: bool = True, date_format: str = None) -> pd.DataFrame:
     # Apstrādā jau sagatavotu failu, nodrošinot, ka visas nepieciešamās kolonnas pastāv
     # Ja kāda kolonna trūkst, tā tiek izveidota automātiski
 
     df = df_raw.copy()
-    df["date"] = pd.to_datetime(df["date"], dayfirst=True)
+    # date_format — formāts, kas noteikts no visa faila pirmā datuma (straumētā ielādē), lai visi bloki
+    # tiktu parsēti vienādi; citādi pandas to nosaka pats no pirmās vērtības
+    df["date"] = pd.to_datetime(df["date"], dayfirst=True, format=date_format)
 
     cols = ["draw_no", "date", "n1", "n2", "n3", "n4", "n5", "n6", "b1", "b2"]
     for c in cols:
@@ -168,58 +355,103 @@ def _normalize_prepared(df_raw: pd.DataFrame) -> pd.DataFrame:
         df[c] = pd.to_numeric(df[c], errors="coerce").astype("Int64")
 
     df = df[cols]
-    df = df.sort_values("date").reset_index(drop=True)
+    if sort:
+        df = df.sort_values("date").reset_index(drop=True)
+    else:
+        df = df.reset_index(drop=True)
     return df
 
 
-def _validate_lottery_safety(df_norm: pd.DataFrame, lottery: str):
-    # Šī ir drošības funkcija, kas pārbauda, vai lietotāja izvēlētais loterijas tips atbilst faktiskajiem datiem
-    # Tas novērš situācijas, kur:
-    # - Viking Lotto dati tiek analizēti kā Eurojackpot
-    # - Eurojackpot dati tiek analizēti kā Viking Lotto
-    # - dati satur skaitļus ārpus atļautā diapazona
-    # Ja tiek konstatēta neatbilstība, funkcija izmet kļūdu un aptur apstrādi
+class LotterySafetyError(ValueError):
+    # Kļūda, ja dati neatbilst izvēlētajai loterijai
+    # Papildus ziņojumam satur visas atrastās problēmas un to rindu indeksus
 
-    main_counts = []
-    bonus_counts = []
-    max_main = 0
-    max_bonus = 0
+    def __init__(self, issues):
+        super().__init__(issues[0]["error"])
+        self.issues = issues
+        self.rows = np.unique(np.concatenate([i["rows"] for i in issues]))
 
-    for _, row in df_norm.iterrows():
-        mains = [row["n1"], row["n2"], row["n3"], row["n4"], row["n5"]]
-        if not pd.isna(row.get("n6", pd.NA)):
-            mains.append(row["n6"])
-        mains_clean = [int(x) for x in mains if not pd.isna(x)]
+    def __reduce__(self):
+        # Ļauj kļūdu nodot starp procesiem (pickle), saglabājot visas problēmas
+        return (type(self), (self.issues,))
 
-        bonuses = []
-        if "b1" in df_norm.columns and not pd.isna(row.get("b1", pd.NA)):
-            bonuses.append(int(row["b1"]))
-        if "b2" in df_norm.columns and not pd.isna(row.get("b2", pd.NA)):
-            bonuses.append(int(row["b2"]))
 
-        main_counts.append(len(mains_clean))
-        bonus_counts.append(len(bonuses))
+def numbers_matrix(df_norm: pd.DataFrame, cols):
+    # Pārvērš norādītās kolonnas vienā veselo skaitļu matricā [n_rows, len(cols)]
+    # Atgriež (vērtības, aizpildījuma maska); trūkstošās kolonnas/šūnas maskā ir False
+
+    n_rows = len(df_norm)
+    values = np.zeros((n_rows, len(cols)), dtype=np.int64)
+    present = np.zeros((n_rows, len(cols)), dtype=bool)
+
+    for j, c in enumerate(cols):
+        if c not in df_norm.columns:
+            continue
+        col = pd.to_numeric(df_norm[c], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        mask = ~np.isnan(col)
+        values[mask, j] = col[mask].astype(np.int64)
+        present[:, j] = mask
+
+    return values, present
+
+
+def check_lottery_safety(df_norm: pd.DataFrame, lottery: str):
+    # Pārbauda, vai dati atbilst izvēlētajai loterijai, izmantojot masīvu operācijas
+    # Atgriež sarakstu ar problēmām: [{"error": ziņojums, "rows": df_norm rindu pozīcijas}, ...]
+    # Tukšs saraksts nozīmē, ka dati ir derīgi
+
+    if lottery not in ("viking", "euro"):
+        raise ValueError("Nezināms loterijas tips")
 
-        if mains_clean:
-            max_main = max(max_main, max(mains_clean))
-        if bonuses:
-            max_bonus = max(max_bonus, max(bonuses))
+    # n1..n5 ir obligātas, n6 un b1..b2 var nebūt
+    for c in ["n1", "n2", "n3", "n4", "n5"]:
+        if c not in df_norm.columns:
+            raise KeyError(c)
+
+    mains, mains_present = numbers_matrix(df_norm, ["n1", "n2", "n3", "n4", "n5", "n6"])
+    bonuses, bonuses_present = numbers_matrix(df_norm, ["b1", "b2"])
+
+    main_counts = mains_present.sum(axis=1)
+    bonus_counts = bonuses_present.sum(axis=1)
+
+    # Maksimums katrā rindā (trūkstošās šūnas neskaitās, minimums ir 0 kā vecajā ceļā)
+    row_max_main = np.where(mains_present, mains, 0).max(axis=1, initial=0)
+    row_max_bonus = np.where(bonuses_present, bonuses, 0).max(axis=1, initial=0)
+    max_main = int(row_max_main.max(initial=0))
+    max_bonus = int(row_max_bonus.max(initial=0))
 
     detected = _detect_lottery_from_numbers(main_counts, bonus_counts, max_main, max_bonus)
+    all_rows = np.arange(len(df_norm))
 
     if lottery == "viking":
-        if detected == "euro":
-            raise ValueError("Fails izskatās pēc Eurojackpot, bet izvēlēts 'viking'")
-        if max_main > 48:
-            raise ValueError("Galvenie skaitļi pārsniedz 48 — tas nav derīgs Viking Lotto")
-
-    elif lottery == "euro":
-        if detected == "viking":
-            raise ValueError("Fails izskatās pēc Viking Lotto, bet izvēlēts 'euro'")
-        if max_main > 50:
-            raise ValueError("Galvenie skaitļi pārsniedz 50 — tas nav derīgs Eurojackpot")
-        if max_bonus > 12:
-            raise ValueError("Bonusa skaitļi pārsniedz 12 — tas nav derīgs Eurojackpot")
-
+        checks = [
+            (detected == "euro", all_rows,
+             "Fails izskatās pēc Eurojackpot, bet izvēlēts 'viking'"),
+            (max_main > 48, np.flatnonzero(row_max_main > 48),
+             "Galvenie skaitļi pārsniedz 48 — tas nav derīgs Viking Lotto"),
+        ]
     else:
-        raise ValueError("Nezināms loterijas tips")
\ No newline at end of file
+        checks = [
+            (detected == "viking", all_rows,
+             "Fails izskatās pēc Viking Lotto, bet izvēlēts 'euro'"),
+            (max_main > 50, np.flatnonzero(row_max_main > 50),
+             "Galvenie skaitļi pārsniedz 50 — tas nav derīgs Eurojackpot"),
+            (max_bonus > 12, np.flatnonzero(row_max_bonus > 12),
+             "Bonusa skaitļi pārsniedz 12 — tas nav derīgs Eurojackpot"),
+        ]
+
+    return [{"error": msg, "rows": rows} for failed, rows, msg in checks if failed]
+
+
+def _validate_lottery_safety(df_norm: pd.DataFrame, lottery: str):
+    # Šī ir drošības funkcija, kas pārbauda, vai lietotāja izvēlētais loterijas tips atbilst faktiskajiem datiem
+    # Tas novērš situācijas, kur:
+    # - Viking Lotto dati tiek analizēti kā Eurojackpot
+    # - Eurojackpot dati tiek analizēti kā Viking Lotto
+    # - dati satur skaitļus ārpus atļautā diapazona
+    # Ja tiek konstatēta neatbilstība, funkcija izmet LotterySafetyError (ValueError) ar pirmo
+    # ziņojumu; visas problēmas un rindu indeksi pieejami kļūdas .issues un .rows laukos
+
+    issues = check_lottery_safety(df_norm, lottery)
+    if issues:
+        raise LotterySafetyError(issues)
@@ -1,21 +1,97 @@
+import time
+
 import numpy as np
 import pandas as pd
+from pathlib import Path
 
-# Sklearn metrikas modeļu novērtēšanai: 
-# log_loss: mēra prognožu ticamību (jo mazāks, jo labāk) 
-# mean_squared_error: Brier score (jo mazāks, jo labāk)
-from sklearn.metrics import log_loss, mean_squared_error
+# Metrikas modeļu novērtēšanai (visa varbūtību matrica vienā reizē):
+# logloss: mēra prognožu ticamību (jo mazāks, jo labāk)
+# brier: Brier score (jo mazāks, jo labāk)
+# hit@k: trāpījumi top-k prognozēs (jo lielāks, jo labāk)
+from .metrics import evaluate
 
 # Izslēdz brīdinājumus par matricas reizināšanu
 import warnings 
 warnings.filterwarnings("ignore", message=".*matmul.*", category=RuntimeWarning)
 
 # Modeļu būvēšana un prognozēšana
-from .models import build_logreg_sgd, build_random_forest, build_xgboost_like, fit_and_predict
+from .models import MODEL_BUILDERS, set_n_jobs, fit_and_predict, predict_proba_matrix
+
+# Boosting ar agrīno apturēšanu (hronoloģiska validācijas daļa) un eksperimenta laika budžetu
+from .models import build_model, training_info, EARLY_STOPPING_MODELS
+
+# Slēgtas formas bāzes modeļi (biežums, novecojošs biežums, pauze kopš pēdējās parādīšanās)
+from .frequency import FREQUENCY_MODELS, frequency_params, predict_frequency
+
+# Paralēla modeļu apmācība ar koplietojamu atmiņu
+from .parallel import fit_models_parallel
+
+# Izložu one-hot matrica un lagged features
+from .features import build_draw_matrix, build_lagged_features, build_next_features, WINDOW_MODES, check_features
+
+# Modeļa un features opcijas (režīms, formāts, features, agrīnā apturēšana, nulles sadalījums) vienā objektā
+from .options import ModelOptions
+
+# Posmu laika uzskaite (t_<posms> kolonnas rezultātos) un pēc izvēles cProfile
+from .instrumentation import StageTimer, profile_call
+
+# Monte Carlo nulles sadalījums (p-vērtības un joslas salīdzinājumam ar nejaušu prognozētāju)
+from .baseline import null_baseline
 
-def run_experiment(df_norm: pd.DataFrame, lottery: str, window: int = 1):
-    # Izpilda eksperimentu ar trim modeļiem (LogReg, RandomForest, XGBoost-like)
-    # Izmanto lagged features: prev_vec -> curr_vec
+# Rezultātu kešatmiņas atslēgas (datu nospiedums + konfigurācija)
+from .store import array_fingerprint, config_key
+
+# Datu ielāde pa blokiem un normalizācija (izmanto fona uzdevumos)
+from .dataset import normalize_chunks
+from .ingest import iter_table_chunks, DEFAULT_CHUNK_ROWS
+
+# Pamat skaitļu diapazons katrai loterijai
+LOTTERY_MAX_NUM = {"viking": 48, "euro": 50}
+
+# Pamat skaitļu skaits vienā izlozē (K_main metrikai hit@K_main)
+LOTTERY_K_MAIN = {"viking": 6, "euro": 5}
+
+# Novērtēšanas veidi: viens 70/30 sadalījums vai walk-forward backtests
+EVALUATIONS = ("holdout", "walk_forward")
+
+# Modeļu nosaukumi tādā secībā, kādā tie tiek trenēti: vispirms apmācāmie modeļi, tad bāzes modeļi
+LEARNED_MODELS = list(MODEL_BUILDERS)
+BASELINE_MODELS = list(FREQUENCY_MODELS)
+MODEL_NAMES = LEARNED_MODELS + BASELINE_MODELS
+
+def run_experiment(df_norm: pd.DataFrame, lottery: str, window: int = 1, window_mode: str = "concat",
+                   hit_curve: bool = False, progress=None, parallel: bool = False,
+                   core_budget: int = None, draw_matrix=None, split_ratio: float = 0.7, result_cache=None,
+                   cache_bypass: bool = False, timer=None, models=None, lagged=None, model_store=None,
+                   model_options: ModelOptions = None):
+    # Izpilda eksperimentu ar trim modeļiem (LogReg, RandomForest, XGBoost-like) un bāzes modeļiem
+    # (frequency, decayed_frequency, recency — bez apmācības, viens kumulatīvs piegājiens pa izložu matricu)
+    # Izmanto lagged features: pēdējās window izlozes -> nākamā izloze
+    # window_mode nosaka, vai pēdējās izlozes tiek saliktas kopā ("concat") vai summētas ("sum")
+    # hit_curve=True katram modelim pievieno pilnu hit@1..max_num līkni
+    # progress(modelis, stāvoklis) — neobligāts callback ("running" / "done") fona uzdevumiem
+    # parallel=True trenē modeļus vienlaikus atsevišķos procesos (dati koplietojamā atmiņā)
+    # core_budget — kopējais kodolu skaits visiem modeļiem (None = visi mašīnas kodoli)
+    # draw_matrix — jau aprēķināts (dates, draws) no build_draw_matrix (piem., no datu kešatmiņas)
+    # split_ratio — vecāko rindu daļa treniņam (pārējās — testam)
+    # result_cache — ResultCache; ja tajā jau ir rezultāts ar tiem pašiem datiem un konfigurāciju,
+    #   modeļi netiek trenēti vēlreiz (cache_bypass=True šo pārbaudi izlaiž, bet rezultātu saglabā)
+    # timer — StageTimer ar iepriekšējo posmu laikiem (nolasīšana, normalizācija); katrā rezultātu rindā
+    #   tiek pievienotas t_<posms> kolonnas, kā arī modeļa t_fit, t_predict un t_metrics
+    # models — modeļu apakškopa (None = visi MODEL_NAMES)
+    # lagged — jau aprēķināti (X, Y) šim window un window_mode (piem., vairākām konfigurācijām ar to pašu logu)
+    # model_store — ModelStore; apmācītie modeļi tiek saglabāti kopā ar nākamās izlozes X rindu (GET /predict),
+    #   rezultātu rindās — model_key; kešatmiņas rezultāts tiek izmantots tikai tad, ja visi modeļi jau ir krātuvē
+    # model_options — ModelOptions (None = noklusējums):
+    # - model_mode — "ovr" (viens modelis katram skaitlim) vai "native" (viens multi-label modelis)
+    # - feature_format — "dense" (numpy) vai "sparse" (CSR; modeļi to apstrādā bez pārvēršanas blīvā matricā)
+    # - features — X features grupas (FEATURE_SETS; None = tikai lagged one-hot): piem. ("lags", "gaps", "freq")
+    # - early_stopping=True — boosting modeļi (EARLY_STOPPING_MODELS) atdala pēdējo treniņa daļu validācijai un
+    #   apstājas, kad validācijas logloss vairs neuzlabojas; rindās — rounds, rounds_min, rounds_max
+    # - time_budget — sekundes visam eksperimentam (tikai ar early_stopping): boosting modeļi tiek trenēti pēdējie
+    #   un apstājas termiņā (budget_exhausted); rezultāts ir atkarīgs no ātruma, tāpēc netiek kešots
+    # - null_sims > 0 katram modelim pievieno Monte Carlo nulles sadalījumu (null_sims nejauši prognozētāji,
+    #   null_method — "shuffle" vai "labels", null_seed): <metrika>_p un <metrika>_null_lo/_null_hi/_null_mean
     # Atgriež metrikas un informāciju par treniņu/testu periodiem
 
     # Nosaka loterijas parametrus
@@ -28,106 +104,427 @@ def run_experiment(df_norm: pd.DataFrame, lottery: str, window: int = 1):
     else:
         raise ValueError("Nezināms loterijas tips eksperimentam")
 
-    # Sagatavo lagged features (prev_vec un curr_vec)
-    df_feat = _prepare_lagged_features(df_norm, max_num=max_num)
-    df_feat = df_feat.sort_values("date").reset_index(drop=True)
+    if timer is None:
+        timer = StageTimer()
+    opts = model_options if model_options is not None else ModelOptions()
+
+    # Laika budžets skaitās no eksperimenta sākuma (time.time() — kopīgs arī worker procesiem)
+    deadline = time.time() + opts.time_budget if opts.time_budget is not None else None
+
+    model_names = _check_models(models)
 
-    n = len(df_feat)
+    # Sagatavo lagged features no vienas nepārtrauktas izložu matricas
+    with timer.stage("features"):
+        if draw_matrix is None:
+            draw_matrix = build_draw_matrix(df_norm, max_num=max_num)
+        dates, draws = draw_matrix
+        X, Y = lagged if lagged is not None else build_lagged_features(draws, window=window, mode=window_mode,
+                                                                       sparse=opts.sparse, features=opts.features)
+        dates = dates.iloc[window:].reset_index(drop=True)
+
+    n = len(Y)
     if n < 10:
         raise ValueError("Nepietiek datu pēc lagged apstrādes (vajag vismaz 10 rindas)")
 
-    # 70% treniņam, 30% testam
-    split_idx = int(n * 0.7)
-    train = df_feat.iloc[:split_idx]
-    test = df_feat.iloc[split_idx:]
+    # Rezultātu kešatmiņa: modeļi ir deterministiski (random_state=42), tāpēc tie paši dati un
+    # tā pati konfigurācija vienmēr dod tos pašus rezultātus
+    dataset_fp = array_fingerprint(draws, dates.to_numpy())[:32]
+
+    # Apmācāmo modeļu atslēgas modeļu krātuvē
+    # (ar laika budžetu boosting modeļi netiek saglabāti — tie ir atkarīgi no ātruma, ne tikai konfigurācijas)
+    model_keys = {}
+    if model_store is not None:
+        model_keys = {name: model_key(dataset_fp, lottery, name, window=window, window_mode=window_mode,
+                                      split_ratio=split_ratio, model_options=opts)
+                      for name in model_names if name in MODEL_BUILDERS
+                      and not (deadline is not None and name in EARLY_STOPPING_MODELS)}
+
+    cache_key = None
+    if result_cache is not None and deadline is None:
+        config = _experiment_config(lottery, window, window_mode, split_ratio, opts.model_mode, hit_curve, model_names)
+        config.update(opts.result_config(model_names))
+        cache_key = config_key(dataset_fp, config)
+        with timer.stage("cache_lookup"):
+            cached = None if cache_bypass else result_cache.get(cache_key)
+            # Ja kāds modelis krātuvē nav (vai ir izmests), tas jāapmāca no jauna
+            if cached is not None and not all(model_store.contains(k) for k in model_keys.values()):
+                cached = None
+        if cached is not None:
+            results = cached[0]
+            for res in results:
+                res["from_cache"] = True
+                res["model_key"] = model_keys.get(res["model"])
+                # Modeļi netika trenēti; posmu laiki ir šī pieprasījuma laiki
+                res.update({"t_fit": 0.0, "t_predict": 0.0, "t_metrics": 0.0})
+                if "t_model_save" in res:
+                    res["t_model_save"] = 0.0
+                res.update(timer.columns())
+                if progress is not None:
+                    progress(res["model"], "done")
+            return results
+
+    # Pēc noklusējuma 70% treniņam, 30% testam
+    if not 0 < split_ratio < 1:
+        raise ValueError("Treniņa daļai jābūt starp 0 un 1")
+    split_idx = int(n * split_ratio)
 
     # Sagatavo X un Y matricas
-    X_train = np.stack(train["prev_vec"].values)
-    Y_train = np.stack(train["curr_vec"].values)
-    X_test = np.stack(test["prev_vec"].values)
-    Y_test = np.stack(test["curr_vec"].values)
+    X_train, X_test = X[:split_idx], X[split_idx:]
+    Y_train, Y_test = Y[:split_idx], Y[split_idx:]
 
     # Datumu diapazoni (informatīvi)
-    train_date_from = train["date"].min().date().isoformat()
-    train_date_to = train["date"].max().date().isoformat()
-    test_date_from = test["date"].min().date().isoformat()
-    test_date_to = test["date"].max().date().isoformat()
+    train_date_from = dates.iloc[:split_idx].min().date().isoformat()
+    train_date_to = dates.iloc[:split_idx].max().date().isoformat()
+    test_date_from = dates.iloc[split_idx:].min().date().isoformat()
+    test_date_to = dates.iloc[split_idx:].max().date().isoformat()
 
     results = []
 
-    # Modeļu saraksts
-    models = [
-        ("logreg_sgd", build_logreg_sgd()),
-        ("random_forest", build_random_forest()),
-        ("xgboost", build_xgboost_like()),
-    ]
+    # Saglabājamie modeļi: atslēga, nākamās izlozes X rinda un apraksts (/predict atbildei)
+    persist = {}
+    if model_keys:
+        x_next = build_next_features(draws, window=window, mode=window_mode, sparse=opts.sparse,
+                                     features=opts.features)
+        for name, key in model_keys.items():
+            persist[name] = (key, x_next, {
+                "model": name,
+                "lottery": lottery,
+                "max_num": int(max_num),
+                "k_main": int(k_main),
+                "window": int(window),
+                "window_mode": window_mode,
+                "split_ratio": float(split_ratio),
+                **opts.describe(),
+                "dataset_fp": dataset_fp,
+                "train_rows": int(split_idx),
+                "train_date_to": train_date_to,
+                "last_draw_date": dates.iloc[-1].date().isoformat(),
+            })
+
+    # Modeļu apmācība un prognozes (secīgi vai paralēli)
+    # Secīgi boosting modeļi ir pēdējie (LEARNED_MODELS secība), tāpēc laika budžeta atlikums paliek tiem
+    learned = [name for name in model_names if name in MODEL_BUILDERS]
+    early = opts.early_stopping_params(deadline)
+    model_timings = {}
+    model_info = {}
+    if parallel and learned:
+        probas = fit_models_parallel(learned, X_train, Y_train, X_test, core_budget=core_budget,
+                                     progress=progress, mode=opts.model_mode, timings=model_timings,
+                                     model_store=model_store, persist=persist, early_stopping=early,
+                                     info=model_info)
+    else:
+        probas = {}
+        for name in learned:
+            if progress is not None:
+                progress(name, "running")
+
+            model = build_model(name, mode=opts.model_mode, early_stopping=early)
+            if core_budget is not None:
+                set_n_jobs(model, core_budget)
+            model_timer = StageTimer()
+            probas[name] = fit_and_predict(model, X_train, Y_train, X_test, timer=model_timer)
+            model_info[name] = training_info(model)
+            if name in persist:
+                key, x_next, meta = persist[name]
+                with model_timer.stage("model_save"):
+                    model_store.put(key, model, x_next, meta)
+            model_timings[name] = model_timer.timings
+
+            if progress is not None:
+                progress(name, "done")
 
-    # Izpilda katru modeli
-    for name, model in models:
-        proba = fit_and_predict(model, X_train, Y_train, X_test)
+    # Bāzes modeļi: testa rindas Y[split_idx:] ir izlozes draws[window + split_idx:]
+    for name in model_names:
+        if name not in FREQUENCY_MODELS:
+            continue
+        if progress is not None:
+            progress(name, "running")
+        # Nav apmācības: viss aprēķins ir prognozes posms
+        model_timer = StageTimer({"fit": 0.0})
+        with model_timer.stage("predict"):
+            probas[name] = predict_frequency(name, draws, window + split_idx)
+        model_timings[name] = model_timer.timings
+        if progress is not None:
+            progress(name, "done")
 
-        # Aizsardzība pret 0 un 1 (logloss nevar aprēķināt)
-        proba_clipped = np.clip(proba, 1e-6, 1 - 1e-6)
+    # Aprēķina metrikas katram modelim (vienmēr tajā pašā secībā)
+    for name in model_names:
+        proba = probas[name]
 
-        # Metrikas
-        ll = log_loss(Y_test.ravel(), proba_clipped.ravel())
-        brier = mean_squared_error(Y_test.ravel(), proba_clipped.ravel())
-        hit_k_main = _hit_at_k(Y_test, proba_clipped, k=k_main)
-        hit_10 = _hit_at_k(Y_test, proba_clipped, k=10)
+        # Metrikas (varbūtības tiek apgrieztas pret 0 un 1 metriku modulī)
+        model_timer = StageTimer(model_timings.get(name))
+        with model_timer.stage("metrics"):
+            scores = evaluate(Y_test, proba, ks=(k_main, 10), curve=hit_curve)
+            null = null_baseline(Y_test, proba, scores, k_main, n_sims=opts.null_sims, seed=opts.null_seed,
+                                 method=opts.null_method) if opts.null_sims else {}
 
         # Rezultātu rinda
         res = {
             "model": name,
-            "logloss": float(ll),
-            "brier": float(brier),
-            "hit_k_main": float(hit_k_main),
-            "hit_10": float(hit_10),
+            "logloss": scores["logloss"],
+            "brier": scores["brier"],
+            "hit_k_main": scores["hit_at"][k_main],
+            "hit_10": scores["hit_at"][10],
             "k_main": int(k_main),
-            "train_rows": int(len(train)),
-            "test_rows": int(len(test)),
+            "train_rows": int(len(Y_train)),
+            "test_rows": int(len(Y_test)),
             "train_date_from": train_date_from,
             "train_date_to": train_date_to,
             "test_date_from": test_date_from,
             "test_date_to": test_date_to,
             "window": int(window),
+            "window_mode": window_mode,
+            **opts.columns(),
+            "dataset_fp": dataset_fp,
+            "model_key": model_keys.get(name),
+            "from_cache": False,
         }
+        if opts.early_stopping:
+            res.update(early_stopping=True, time_budget=opts.time_budget, **model_info.get(name, {}))
+        res.update(null)
+        res.update(timer.columns())
+        res.update(model_timer.columns())
+        if hit_curve:
+            res["hit_curve"] = scores["hit_curve"]
         results.append(res)
 
+    if cache_key is not None:
+        result_cache.put(cache_key, results, probas)
+
     return results
 
-def _prepare_lagged_features(df_norm: pd.DataFrame, max_num: int) -> pd.DataFrame:
-    # Pārvērš katru izlozi par one-hot vektoru (garums = max_num)
-    # Izveido prev_vec (iepriekšējā izloze) un curr_vec (pašreizējā izloze)
-
-    rows = []
-    for _, row in df_norm.iterrows():
-        mains = [row["n1"], row["n2"], row["n3"], row["n4"], row["n5"]]
-        if not pd.isna(row.get("n6", pd.NA)):
-            mains.append(row["n6"])
-        mains_clean = [int(x) for x in mains if not pd.isna(x)]
-
-        vec = np.zeros(max_num, dtype=int)
-        for m in mains_clean:
-            if 1 <= m <= max_num:
-                vec[m - 1] = 1
-
-        rows.append({"date": pd.to_datetime(row["date"]), "vec": vec})
-
-    df_vec = pd.DataFrame(rows).sort_values("date").reset_index(drop=True)
-    prev_vecs = [None] + df_vec["vec"].tolist()[:-1]
-    df_vec["prev_vec"] = prev_vecs
-    df_vec["curr_vec"] = df_vec["vec"]
-
-    return df_vec.dropna(subset=["prev_vec"]).reset_index(drop=True)
-
-def _hit_at_k(Y_true: np.ndarray, proba: np.ndarray, k: int) -> float:
-    # Aprēķina hit@k — cik bieži patiesie skaitļi ir starp top-k prognozētajiem
-
-    hits = []
-    for y, p in zip(Y_true, proba):
-        top_idx = np.argsort(p)[-k:]
-        top_set = set(top_idx.tolist())
-        true_idx = set(np.where(y == 1)[0].tolist())
-        inter = len(true_idx.intersection(top_set))
-        hits.append(inter / float(k))
-    return float(np.mean(hits))
\ No newline at end of file
+def _check_models(models):
+    # Pārbauda modeļu apakškopu un atgriež to MODEL_NAMES secībā (None = visi modeļi)
+    if models is None:
+        return MODEL_NAMES
+    unknown = [m for m in models if m not in MODEL_NAMES]
+    if unknown:
+        raise ValueError(f"Nezināmi modeļi: {', '.join(map(str, unknown))}")
+    if not models:
+        raise ValueError("Jāizvēlas vismaz viens modelis")
+    return [m for m in MODEL_NAMES if m in models]
+
+def _experiment_config(lottery, window, window_mode, split_ratio, model_mode, hit_curve, model_names=MODEL_NAMES):
+    # Pilna eksperimenta konfigurācija rezultātu kešatmiņas atslēgai
+    # Ietver katra modeļa visus parametrus un bibliotēku versijas; n_jobs netiek iekļauts,
+    # jo tas neietekmē rezultātu (tikai ātrumu)
+
+    import sklearn
+    from .models import HAS_XGB
+
+    models = {}
+    for name in model_names:
+        if name in FREQUENCY_MODELS:
+            models[name] = frequency_params(name)
+            continue
+        params = MODEL_BUILDERS[name](mode=model_mode).get_params(deep=True)
+        models[name] = {k: v for k, v in params.items() if not k.endswith("n_jobs")}
+
+    versions = {"sklearn": sklearn.__version__, "numpy": np.__version__}
+    if HAS_XGB:
+        import xgboost
+        versions["xgboost"] = xgboost.__version__
+
+    return {
+        "lottery": lottery,
+        "window": int(window),
+        "window_mode": window_mode,
+        "split_ratio": float(split_ratio),
+        "model_mode": model_mode,
+        "hit_curve": bool(hit_curve),
+        "models": models,
+        "versions": versions,
+    }
+
+
+def model_key(dataset_fp: str, lottery: str, model: str, window: int = 1, window_mode: str = "concat",
+              split_ratio: float = 0.7, model_options: ModelOptions = None) -> str:
+    # Viena apmācītā modeļa atslēga modeļu krātuvē: datu nospiedums + modeļa pilna konfigurācija
+    # (tā pati funkcija tiek izmantota saglabājot un GET /predict)
+    # Modeļa opcijas nāk no ModelOptions.model_config — tām pašām, ko izmanto rezultātu kešatmiņas atslēga
+
+    if model not in MODEL_BUILDERS:
+        raise ValueError(f"Saglabāti tiek tikai apmācāmie modeļi ({', '.join(MODEL_BUILDERS)})")
+    opts = model_options if model_options is not None else ModelOptions()
+    config = _experiment_config(lottery, window, window_mode, split_ratio, opts.model_mode, False, [model])
+    del config["hit_curve"]
+    config.update(opts.model_config([model]))
+    return config_key(dataset_fp, config)
+
+
+def predict_next(model_cache, key: str):
+    # Nākamās izlozes varbūtības [max_num] no saglabāta modeļa (bez apmācības)
+    # Atgriež (varbūtības, apraksts, vai modelis jau bija atmiņā) vai None, ja modeļa krātuvē nav
+
+    loaded = model_cache.get(key)
+    if loaded is None:
+        return None
+    (model, x_next, meta), warm = loaded
+    proba = np.asarray(predict_proba_matrix(model, x_next), dtype=np.float64)[0]
+    return proba, meta, warm
+
+
+def load_draws(path: Path, lottery: str, file_format: str, dataset_store=None, dataset_key: str = None,
+               chunk_rows: int = DEFAULT_CHUNK_ROWS, timer=None):
+    # Nolasa un normalizē failu pa blokiem vai paņem jau apstrādātos datus no krātuves
+    # Atgriež (df_norm, (dates, draws), "hit" / "miss"); posmu laiki tiek pierakstīti timer
+
+    if timer is None:
+        timer = StageTimer()
+
+    cached = None
+    if dataset_store is not None and dataset_key is not None:
+        with timer.stage("dataset_load"):
+            cached = dataset_store.get(dataset_key)
+
+    if cached is not None:
+        df_norm, dates, draws = cached
+        return df_norm, (dates, draws), "hit"
+
+    chunks = iter_table_chunks(Path(path), chunksize=chunk_rows)
+    df_norm = normalize_chunks(chunks, lottery=lottery, file_format=file_format, timer=timer)
+    with timer.stage("features"):
+        draw_matrix = build_draw_matrix(df_norm, max_num=LOTTERY_MAX_NUM.get(lottery, 0))
+    if dataset_store is not None and dataset_key is not None:
+        with timer.stage("dataset_store"):
+            dataset_store.put(dataset_key, df_norm, *draw_matrix)
+    return df_norm, draw_matrix, "miss"
+
+
+def run_experiment_from_file(path: Path, lottery: str, file_format: str, window: int = 1,
+                             window_mode: str = "concat", progress=None, dataset_store=None,
+                             dataset_key: str = None, evaluation: str = "holdout",
+                             chunk_rows: int = DEFAULT_CHUNK_ROWS, timings: dict = None,
+                             profile_path: Path = None, **options):
+    # Pilna plūsma no faila: nolasīšana pa blokiem (chunk_rows rindas) -> normalizācija -> eksperiments
+    # Paredzēta izpildei fona procesā; atgriež (df_norm, results, info)
+    # Ja norādīta dataset_store un dataset_key, normalizētie dati tiek ņemti no krātuves
+    # (vai saglabāti tajā pēc pirmās apstrādes); info["dataset_cache"] = "hit" / "miss"
+    # evaluation="walk_forward" izpilda run_walk_forward; soļu metrikas ir info["steps"] (DataFrame)
+    # timings — jau izmērītie posmi galvenajā procesā (piem., {"upload_save": s})
+    # profile_path — ja dots, visa plūsma tiek izpildīta ar cProfile un statistika saglabāta šajā failā
+    # options tiek nodoti run_experiment vai run_walk_forward (piem., parallel, core_budget, refit_every,
+    #   model_options)
+
+    kwargs = dict(window=window, window_mode=window_mode, progress=progress, dataset_store=dataset_store,
+                  dataset_key=dataset_key, evaluation=evaluation, chunk_rows=chunk_rows, timings=timings,
+                  **options)
+    if profile_path is not None:
+        return profile_call(profile_path, run_experiment_from_file, path, lottery, file_format, **kwargs)
+
+    timer = StageTimer(timings)
+    df_norm, draw_matrix, cache_state = load_draws(path, lottery, file_format, dataset_store=dataset_store,
+                                                   dataset_key=dataset_key, chunk_rows=chunk_rows, timer=timer)
+
+    info = {"dataset_key": dataset_key, "dataset_cache": cache_state}
+    if evaluation == "walk_forward":
+        from .backtest import run_walk_forward
+
+        results, info["steps"] = run_walk_forward(df_norm, lottery=lottery, window=window,
+                                                  window_mode=window_mode, progress=progress,
+                                                  draw_matrix=draw_matrix, timer=timer, **options)
+    elif evaluation == "holdout":
+        results = run_experiment(df_norm, lottery=lottery, window=window, window_mode=window_mode,
+                                 progress=progress, draw_matrix=draw_matrix, timer=timer, **options)
+    else:
+        raise ValueError(f"Nezināms novērtēšanas veids: {evaluation}")
+    return df_norm, results, info
+
+
+def check_configs(configs, max_configs: int = None):
+    # Pārbauda konfigurāciju sarakstu (JSON API) un atgriež to ar noklusējuma vērtībām:
+    # [{"window": 1, "window_mode": "concat", "split_ratio": 0.7, "models": [...], "features": ["lags"]}, ...]
+
+    if not isinstance(configs, list) or not configs:
+        raise ValueError("Konfigurācijām jābūt netukšam sarakstam")
+    if max_configs is not None and len(configs) > max_configs:
+        raise ValueError(f"Pārāk daudz konfigurāciju (maksimums {max_configs})")
+
+    checked = []
+    for i, cfg in enumerate(configs, start=1):
+        if not isinstance(cfg, dict):
+            raise ValueError(f"Konfigurācijai {i} jābūt objektam")
+        unknown = set(cfg) - {"window", "window_mode", "split_ratio", "models", "features"}
+        if unknown:
+            raise ValueError(f"Konfigurācijā {i} nezināmi lauki: {', '.join(sorted(unknown))}")
+
+        window = cfg.get("window", 1)
+        if isinstance(window, bool) or not isinstance(window, int) or window <= 0:
+            raise ValueError(f"Konfigurācijā {i} logam jābūt pozitīvam veselam skaitlim")
+        window_mode = cfg.get("window_mode", "concat")
+        if window_mode not in WINDOW_MODES:
+            raise ValueError(f"Konfigurācijā {i} nezināms loga režīms: {window_mode}")
+        split_ratio = cfg.get("split_ratio", 0.7)
+        if isinstance(split_ratio, bool) or not isinstance(split_ratio, (int, float)) or not 0 < split_ratio < 1:
+            raise ValueError(f"Konfigurācijā {i} treniņa daļai jābūt starp 0 un 1")
+        models = cfg.get("models")
+        if models is not None and not isinstance(models, list):
+            raise ValueError(f"Konfigurācijā {i} modeļiem jābūt sarakstam")
+        features = cfg.get("features")
+        if features is not None and not isinstance(features, list):
+            raise ValueError(f"Konfigurācijā {i} features jābūt sarakstam")
+        try:
+            features = check_features(features)
+        except ValueError as exc:
+            raise ValueError(f"Konfigurācijā {i}: {exc}")
+
+        checked.append({
+            "window": window,
+            "window_mode": window_mode,
+            "split_ratio": float(split_ratio),
+            "models": _check_models(models),
+            "features": features,
+        })
+    return checked
+
+
+def run_configs_from_file(path: Path, lottery: str, file_format: str, configs, progress=None,
+                          dataset_store=None, dataset_key: str = None, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                          timings: dict = None, model_options: ModelOptions = None, **options):
+    # Vairākas konfigurācijas vienam failam: nolasīšana un normalizācija vienreiz, lagged features vienreiz
+    # katram (window, window_mode, features) kopumam, tad run_experiment katrai konfigurācijai (configs — no check_configs)
+    # model_options — kopīgās modeļa opcijas; katras konfigurācijas features aizvieto model_options.features
+    # Katras konfigurācijas rezultāti tiek nosūtīti uzreiz: progress("config_<i>", "done", {"config": i, "results"})
+    # Atgriež (df_norm, visu konfigurāciju rezultāti, info)
+
+    if lottery not in LOTTERY_MAX_NUM:
+        raise ValueError("Nezināms loterijas tips eksperimentam")
+
+    base_options = model_options if model_options is not None else ModelOptions()
+    timer = StageTimer(timings)
+    df_norm, draw_matrix, cache_state = load_draws(path, lottery, file_format, dataset_store=dataset_store,
+                                                   dataset_key=dataset_key, chunk_rows=chunk_rows, timer=timer)
+
+    lagged = {}
+    all_results = []
+    for i, cfg in enumerate(configs):
+        step = f"config_{i}"
+        if progress is not None:
+            progress(step, "running")
+            # Modeļu progress tiek izmantots tikai atcelšanas pārbaudei starp modeļiem
+            model_progress = lambda name, state, step=step: progress(step, "running")
+        else:
+            model_progress = None
+
+        cfg_timer = StageTimer(timer.timings)
+        cfg_options = base_options.replace(features=cfg["features"])
+        features_key = (cfg["window"], cfg["window_mode"], cfg_options.features)
+        if features_key not in lagged:
+            with cfg_timer.stage("features"):
+                lagged[features_key] = build_lagged_features(draw_matrix[1], window=cfg["window"],
+                                                             mode=cfg["window_mode"], sparse=cfg_options.sparse,
+                                                             features=cfg_options.features)
+
+        results = run_experiment(df_norm, lottery=lottery, draw_matrix=draw_matrix, progress=model_progress,
+                                 timer=cfg_timer, lagged=lagged[features_key], window=cfg["window"],
+                                 window_mode=cfg["window_mode"], split_ratio=cfg["split_ratio"],
+                                 models=cfg["models"], model_options=cfg_options, **options)
+        for res in results:
+            res["config"] = i
+            res["split_ratio"] = cfg["split_ratio"]
+        all_results.extend(results)
+        if progress is not None:
+            progress(step, "done", {"config": i, "results": results})
+
+    info = {"dataset_key": dataset_key, "dataset_cache": cache_state}
+    return df_norm, all_results, info
@@ -0,0 +1,113 @@
+import numpy as np
+
+# Vēstures features katrai izlozei (papildus lagged one-hot), katra rinda — tikai no iepriekšējām izlozēm:
+# - gaps: izlozes kopš skaitlis pēdējo reizi parādījās (1 = bija iepriekšējā izlozē)
+# - freq: skaitļa biežums pēdējās W izlozēs katram W no FREQ_WINDOWS (sākumā — pa visām pieejamajām)
+# - pairs: cik bieži skaitlis vēsturē izlozēts kopā ar iepriekšējās izlozes skaitļiem
+#   (kopīgo parādīšanos skaits, dalīts ar izložu skaitu, lai vērtības nepieaugtu līdz ar vēsturi)
+#
+# Visi aprēķini ir viens piegājiens pa izložu matricu ar stāvokli, ko nodod tālāk: gaps un freq — blokos ar
+# kumulatīvām summām (pēdējā redzēšana), pairs — pa izlozēm (pāru skaitītāji, k skaitļi izlozē) —
+# O(n_draws x max_num), vēsture netiek pārlasīta katrai rindai. Rinda i atbilst mērķa izlozei t = start + i (X rindas build_lagged_features secībā);
+# visas funkcijas atgriež float32 matricu [n_draws - start, max_num * <kolonnu grupas>]
+
+# Rindu skaits vienā blokā (gaps, freq)
+BLOCK_ROWS = 65_536
+
+# Slīdošā biežuma logi (izlozes)
+FREQ_WINDOWS = (10, 50, 200)
+
+# Grupu secība X kolonnās
+ENGINE_FEATURES = ("gaps", "freq", "pairs")
+
+
+def _block_ranges(begin: int, end: int, size: int):
+    return [(b0, min(end, b0 + size)) for b0 in range(begin, end, size)]
+
+
+def _check_start(draws: np.ndarray, start: int):
+    if not 1 <= start <= len(draws):
+        raise ValueError("Features vajag vismaz vienu iepriekšējo izlozi katrai rindai")
+
+
+def gap_features(draws: np.ndarray, start: int) -> np.ndarray:
+    # g[t, j] = t - (pēdējā izloze pirms t ar skaitli j); ja skaitlis vēl nav redzēts — t + 1
+    _check_start(draws, start)
+    n, max_num = draws.shape
+    out = np.empty((n - start, max_num), dtype=np.float32)
+
+    # Pēdējās izlozes indekss, kurā skaitlis redzēts (-1 = vēl nav redzēts), pirms kārtējā bloka
+    last_seen = np.full(max_num, -1, dtype=np.int64)
+    # Bloks pa avota izlozēm s = t - 1 (pēdējā redzēšana līdz s ieskaitot)
+    for s0, s1 in _block_ranges(0, n - 1, BLOCK_ROWS):
+        rows = np.arange(s0, s1, dtype=np.int64)[:, None]
+        seen_at = np.maximum.accumulate(np.where(draws[s0:s1], rows, -1), axis=0)
+        seen_at = np.maximum(seen_at, last_seen)
+        lo = max(s0, start - 1)
+        if lo < s1:
+            out[lo + 1 - start:s1 + 1 - start] = (rows[lo - s0:] + 1) - seen_at[lo - s0:]
+        last_seen = seen_at[-1]
+    return out
+
+
+def freq_features(draws: np.ndarray, start: int, windows=FREQ_WINDOWS) -> np.ndarray:
+    # f_W[t, j] = (izlozes ar j starp t - W un t - 1) / min(W, t); kolonnas pa logiem [W1 ..., W2 ..., ...]
+    # Slīdošā summa ir kumulatīvās summas starpība; blokam pietiek ar max(W) iepriekšējām rindām
+    _check_start(draws, start)
+    windows = [int(w) for w in windows]
+    if not windows or min(windows) < 1:
+        raise ValueError("Biežuma logiem jābūt pozitīviem")
+    n, max_num = draws.shape
+    out = np.empty((n - start, max_num * len(windows)), dtype=np.float32)
+    longest = max(windows)
+
+    for t0, t1 in _block_ranges(start, n, BLOCK_ROWS):
+        lo = max(0, t0 - longest)
+        # cum[k] = izložu summa no lo līdz lo + k - 1
+        cum = np.zeros((t1 - lo, max_num), dtype=np.int32)
+        np.cumsum(draws[lo:t1 - 1], axis=0, dtype=np.int32, out=cum[1:])
+        t = np.arange(t0, t1)
+        for i, w in enumerate(windows):
+            begin = np.maximum(t - w, 0)
+            counts = cum[t - lo] - cum[begin - lo]
+            out[t0 - start:t1 - start, i * max_num:(i + 1) * max_num] = counts / (t - begin)[:, None]
+    return out
+
+
+def pair_features(draws: np.ndarray, start: int) -> np.ndarray:
+    # p[t, j] = sum_{i izlozē t-1, i != j} C[i, j] / t, kur C[i, j] — izlozes pirms t ar abiem skaitļiem
+    # Pāru skaitītāji C [max_num, max_num] tiek atjaunināti pa vienai izlozei: izlozē ir tikai k skaitļi,
+    # tāpēc gan rinda (k rindu summa no C), gan atjauninājums (k x k pāri) ir O(k x max_num)
+    _check_start(draws, start)
+    n, max_num = draws.shape
+    out = np.empty((n - start, max_num), dtype=np.float32)
+
+    # C diagonālē — skaitļa parādīšanās skaits (rindā tas tiek atņemts)
+    pairs = np.zeros((max_num, max_num), dtype=np.int64)
+    rows, cols = np.nonzero(draws[:n - 1])
+    bounds = np.searchsorted(rows, np.arange(n))
+    for s in range(n - 1):
+        idx = cols[bounds[s]:bounds[s + 1]]
+        pairs[np.ix_(idx, idx)] += 1
+        if s + 1 >= start:
+            row = pairs[idx].sum(axis=0)
+            row[idx] -= pairs[idx, idx]
+            out[s + 1 - start] = row / (s + 1)
+    return out
+
+
+# Features grupas: nosaukums -> funkcija(draws, start)
+ENGINE_BUILDERS = {
+    "gaps": gap_features,
+    "freq": freq_features,
+    "pairs": pair_features,
+}
+
+
+def build_engine_features(draws: np.ndarray, start: int, groups) -> np.ndarray:
+    # Izvēlēto grupu features blakus (ENGINE_FEATURES secībā) mērķa izlozēm draws[start:]
+    unknown = [g for g in groups if g not in ENGINE_BUILDERS]
+    if unknown:
+        raise ValueError(f"Nezināmas features grupas: {', '.join(unknown)}")
+    blocks = [ENGINE_BUILDERS[g](draws, start) for g in ENGINE_FEATURES if g in groups]
+    return blocks[0] if len(blocks) == 1 else np.hstack(blocks)
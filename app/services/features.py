@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .dataset import numbers_matrix
+from .feature_engine import build_engine_features, ENGINE_FEATURES
+
+# Pamat skaitļu kolonnas normalizētajā formātā
+MAIN_COLUMNS = ["n1", "n2", "n3", "n4", "n5", "n6"]
+
+# Atbalstītie veidi, kā no pēdējām window izlozēm izveidot X:
+# - concat: pēdējo window izložu one-hot vektori viens aiz otra (garums window * max_num)
+# - sum: cik reizes katrs skaitlis parādījās pēdējās window izlozēs (garums max_num)
+WINDOW_MODES = ("concat", "sum")
+
+# X glabāšanas formāts: "dense" (numpy uint8) vai "sparse" (scipy CSR float32, tikai nenulles elementi)
+# Katrā izlozē ir tikai 5-6 vieninieki no 48-50, tāpēc platiem logiem CSR aizņem daudz mazāk atmiņas,
+# un modeļi (SGD ar StandardScaler(with_mean=False), RandomForest, XGBoost) to apstrādā bez pārvēršanas blīvā
+FEATURE_FORMATS = ("dense", "sparse")
+
+# Features grupas, ko var izvēlēties katram eksperimentam:
+# - lags: pēdējo window izložu one-hot (pēc window_mode)
+# - gaps, freq, pairs: vēstures features no feature_engine (pauze, slīdošie biežumi, pāru kopīgā parādīšanās)
+FEATURE_SETS = ("lags",) + ENGINE_FEATURES
+DEFAULT_FEATURES = ("lags",)
+
+
+def check_features(features) -> tuple:
+    # Pārbauda features grupu sarakstu un atgriež to FEATURE_SETS secībā (None = DEFAULT_FEATURES)
+    if features is None:
+        return DEFAULT_FEATURES
+    if isinstance(features, str):
+        features = [f for f in features.split(",") if f]
+    unknown = [f for f in features if f not in FEATURE_SETS]
+    if unknown:
+        raise ValueError(f"Nezināmas features grupas: {', '.join(map(str, unknown))}")
+    if not features:
+        raise ValueError("Jāizvēlas vismaz viena features grupa")
+    return tuple(f for f in FEATURE_SETS if f in features)
+
+
+def build_draw_matrix(df_norm: pd.DataFrame, max_num: int):
+    # Pārvērš visas izlozes vienā nepārtrauktā uint8 matricā [n_draws, max_num]
+    # Pozīcija i = 1, ja skaitlis i+1 ir izlozē; skaitļi ārpus 1..max_num tiek ignorēti
+    # Atgriež (datumi, matrica), sakārtotus pēc datuma
+
+    df = df_norm.sort_values("date").reset_index(drop=True)
+    values, present = numbers_matrix(df, MAIN_COLUMNS)
+
+    valid = present & (values >= 1) & (values <= max_num)
+    rows, cols = np.nonzero(valid)
+
+    # Viens "scatter" ieraksts visiem skaitļiem uzreiz
+    draws = np.zeros((len(df), max_num), dtype=np.uint8)
+    draws[rows, values[rows, cols] - 1] = 1
+
+    dates = pd.to_datetime(df["date"]).reset_index(drop=True)
+    return dates, draws
+
+
+def build_lagged_features(draws: np.ndarray, window: int = 1, mode: str = "concat", sparse: bool = False,
+                          features=DEFAULT_FEATURES):
+    # Izveido X un Y no izložu matricas:
+    # - Y(t) = izloze t
+    # - X(t) = pēdējās window izlozes pirms t (t-window .. t-1)
+    # Pirmās window rindas tiek atmestas, jo tām nav pilnas vēstures
+    # Atgriež (X, Y); Y ir skats uz draws (bez kopēšanas)
+    # sparse=True — X ir CSR matrica (build_sparse_lagged), blīvā X netiek veidota nemaz
+    # features — grupas no FEATURE_SETS; vēstures grupas tiek pievienotas kā float32 kolonnas aiz lagged daļas
+
+    if window < 1:
+        raise ValueError("Loga parametram jābūt pozitīvam veselam skaitlim")
+    if mode not in WINDOW_MODES:
+        raise ValueError(f"Nezināms loga režīms: {mode}")
+    features = check_features(features)
+    if features != ("lags",):
+        return _with_engine_features(draws, window, mode, sparse, features)
+    if sparse:
+        return build_sparse_lagged(draws, window=window, mode=mode)
+
+    n_draws, max_num = draws.shape
+    if n_draws <= window:
+        empty_width = max_num * window if mode == "concat" else max_num
+        return np.zeros((0, empty_width), dtype=np.uint8), draws[:0]
+
+    Y = draws[window:]
+
+    if window == 1:
+        # Vienkāršākais gadījums: X ir tikai nobīdīts skats uz to pašu matricu
+        return draws[:-1], Y
+
+    # Skats [n_draws - window + 1, window, max_num] bez datu kopēšanas;
+    # pēdējais logs beidzas ar pēdējo izlozi, tam nav mērķa, tāpēc tiek atmests
+    windows = sliding_window_view(draws, window, axis=0)[:-1]
+    windows = windows.transpose(0, 2, 1)
+
+    if mode == "concat":
+        # Modeļiem vajag 2D matricu, tāpēc šeit notiek vienīgā kopēšana
+        X = np.ascontiguousarray(windows).reshape(len(Y), window * max_num)
+    else:
+        # Agregācija pa logu: jauna matrica ir tikai [n, max_num] liela
+        dtype = np.uint8 if window <= np.iinfo(np.uint8).max else np.uint16
+        X = windows.sum(axis=1, dtype=dtype)
+
+    return X, Y
+
+
+def build_sparse_lagged(draws: np.ndarray, window: int = 1, mode: str = "concat"):
+    # Tās pašas X un Y kā build_lagged_features, bet X ir scipy CSR float32 [n, window * max_num] (concat)
+    # vai [n, max_num] (sum); tiek izmantoti tikai izložu nenulles elementi (O(window * nnz) laiks un atmiņa)
+    # Izložu matrica vispirms tiek pārvērsta CSR (no np.nonzero), tad:
+    # - concat: window nobīdītu rindu skatu salikšana blakus (hstack)
+    # - sum: nobīdīto skatu summa (atkārtotās pozīcijas tiek saskaitītas)
+
+    from scipy import sparse as sp
+
+    n_draws, max_num = draws.shape
+    n = max(n_draws - window, 0)
+    width = max_num * window if mode == "concat" else max_num
+    if not n:
+        return sp.csr_matrix((0, width), dtype=np.float32), draws[:0]
+
+    rows, cols = np.nonzero(draws)
+    indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n_draws))])
+    D = sp.csr_matrix((np.ones(len(cols), dtype=np.float32), cols.astype(np.int32), indptr),
+                      shape=(n_draws, max_num))
+
+    # Logā pozīcija lag rindai i ir izloze i + lag
+    shifted = [D[lag:lag + n] for lag in range(window)]
+    if mode == "concat":
+        X = sp.hstack(shifted, format="csr", dtype=np.float32)
+    else:
+        X = sum(shifted[1:], shifted[0]).tocsr()
+    return X, draws[window:]
+
+
+def build_next_features(draws: np.ndarray, window: int = 1, mode: str = "concat", sparse: bool = False,
+                        features=DEFAULT_FEATURES):
+    # X rinda nākamajai (vēl nenotikušajai) izlozei: pēdējās window izlozes tajā pašā formā kā build_lagged_features
+    # Pēc pēdējās izlozes tiek pievienota tukša rinda, un tās X ir vienīgā build_lagged_features rinda
+    # Vēstures grupām (gaps, freq, pairs) vajag visu vēsturi, tāpēc tad tukšā rinda tiek pievienota visai matricai
+
+    if len(draws) < window:
+        raise ValueError("Nepietiek izložu nākamās izlozes features (vajag vismaz window izlozes)")
+    features = check_features(features)
+    history = draws if features != ("lags",) else draws[len(draws) - window:]
+    tail = np.vstack([history, np.zeros((1, draws.shape[1]), dtype=draws.dtype)])
+    X, _ = build_lagged_features(tail, window=window, mode=mode, sparse=sparse, features=features)
+    return X[-1:]
+
+
+def _with_engine_features(draws, window, mode, sparse, features):
+    # lagged X (ja izvēlēts) + vēstures features tām pašām mērķa izlozēm draws[window:]
+    Y = draws[window:]
+    if not len(Y):
+        return build_lagged_features(draws, window=window, mode=mode, sparse=sparse)
+    engine = build_engine_features(draws, window, [f for f in features if f != "lags"])
+    if "lags" not in features:
+        return (_csr(engine) if sparse else engine), Y
+
+    X, _ = build_lagged_features(draws, window=window, mode=mode, sparse=sparse)
+    if sparse:
+        from scipy import sparse as sp
+        return sp.hstack([X, _csr(engine)], format="csr", dtype=np.float32), Y
+    return np.hstack([X.astype(np.float32), engine]), Y
+
+
+def _csr(X):
+    from scipy import sparse as sp
+    return sp.csr_matrix(X, dtype=np.float32)
@@ -0,0 +1,74 @@
+import os
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+# Failu operācijas, kas ir drošas vairākiem procesiem (piem., vairāki gunicorn worker):
+# - atomic_path: fails tiek uzrakstīts pagaidu failā tajā pašā mapē un tad atomāri pārdēvēts (os.replace),
+#   tāpēc lasītājs vienmēr redz vai nu veco, vai pilnu jauno failu, nekad pusē uzrakstītu
+# - file_lock: ekskluzīva slēdzene starp procesiem (fcntl.flock vai Windows msvcrt.locking)
+# - unique_dir: atsevišķa mape katram pieprasījumam (augšupielādes vairs nepārraksta viena otru)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Cik bieži Windows slēdzene mēģina vēlreiz (sekundes)
+LOCK_RETRY_SECONDS = 0.05
+
+
+@contextmanager
+def atomic_path(path: Path):
+    # Dod pagaidu ceļu rakstīšanai; ja bloks beidzas bez kļūdas, tas aizstāj path, citādi tiek dzēsts
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        try:
+            tmp.unlink()
+        except FileNotFoundError:
+            pass
+
+
+@contextmanager
+def file_lock(path: Path, timeout: float = None):
+    # Ekskluzīva slēdzene starp procesiem un pavedieniem (slēdzenes fails tiek izveidots, ja nav)
+    # timeout=None — gaida bez ierobežojuma; citādi pēc timeout sekundēm TimeoutError
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with open(path, "a+b") as f:
+        while True:
+            try:
+                if fcntl is not None:
+                    flags = fcntl.LOCK_EX | (fcntl.LOCK_NB if deadline is not None else 0)
+                    fcntl.flock(f.fileno(), flags)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise TimeoutError(f"Neizdevās iegūt slēdzeni: {path.name}")
+                time.sleep(LOCK_RETRY_SECONDS)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def unique_dir(root: Path) -> Path:
+    # Izveido jaunu mapi ar nejaušu nosaukumu (uuid) zem root
+    path = Path(root) / uuid.uuid4().hex
+    path.mkdir(parents=True)
+    return path
@@ -0,0 +1,150 @@
+import inspect
+
+import numpy as np
+
+# Slēgtas formas statistiskie bāzes modeļi (bez apmācības), kas tiek aprēķināti no izložu matricas:
+# - frequency: cik bieži skaitlis parādījies visās iepriekšējās izlozēs
+# - decayed_frequency: tas pats ar eksponenciālu novecošanu (half_life izlozes)
+# - recency: izlozes kopš skaitlis pēdējo reizi redzēts -> empīriskā varbūtība tam parādīties ar šādu pauzi
+#
+# Katra prognoze izlozei t izmanto tikai izlozes pirms t (skaitītāji tiek atjaunināti ar katru izlozi, tāpat kā
+# walk-forward), tāpēc tie paši aprēķini der gan 70/30 eksperimentam, gan backtestam
+# Aprēķins ir viens kumulatīvs piegājiens pa izložu matricu blokos (O(max_num) uz izlozi, ierobežota atmiņa):
+# bloka iekšienē — numpy kumulatīvās summas, starp blokiem tiek nodots skaitītāju stāvoklis
+# Visas funkcijas atgriež varbūtību matricu [n_draws - start, max_num] tāpat kā predict_proba
+
+# Rindu skaits vienā blokā
+BLOCK_ROWS = 65_536
+
+# Eksponenciālās novecošanas blokā λ^(-i) nedrīkst kļūt pārāk liels (precizitāte), tāpēc bloks tiek ierobežots
+DECAY_MAX_SCALE = 1e8
+
+
+def _block_ranges(begin: int, end: int, size: int):
+    return [(b0, min(end, b0 + size)) for b0 in range(begin, end, size)]
+
+
+def _prior(draws: np.ndarray, start: int) -> float:
+    # Vidējā varbūtība, ka skaitlis ir izlozē (k / max_num), tikai no izlozēm pirms start
+    if start < 1:
+        raise ValueError("Bāzes modeļiem vajag vismaz vienu izlozi pirms testa perioda")
+    return float(draws[:start].mean(dtype=np.float64))
+
+
+def frequency_proba(draws: np.ndarray, start: int, alpha: float = 1.0) -> np.ndarray:
+    # p_t(j) = (izložu skaits ar j pirms t + alpha * prior) / (izložu skaits pirms t + alpha)
+    # alpha — izlīdzināšana uz vidējo varbūtību (mazai vēsturei)
+
+    n, max_num = draws.shape
+    prior = _prior(draws, start)
+    out = np.empty((n - start, max_num), dtype=np.float64)
+
+    counts = draws[:start].sum(axis=0, dtype=np.float64)
+    for b0, b1 in _block_ranges(start, n, BLOCK_ROWS):
+        block = draws[b0:b1]
+        # Skaitītāji pirms katras rindas (kumulatīvā summa bez pašas rindas)
+        before = counts + np.cumsum(block, axis=0, dtype=np.float64) - block
+        seen = np.arange(b0, b1, dtype=np.float64)[:, None]
+        out[b0 - start:b1 - start] = (before + alpha * prior) / (seen + alpha)
+        counts = before[-1] + block[-1]
+    return out
+
+
+def decayed_frequency_proba(draws: np.ndarray, start: int, half_life: float = 50.0,
+                            alpha: float = 1.0) -> np.ndarray:
+    # Kā frequency, bet izloze pirms d izlozēm sver λ^d (λ = 0.5^(1/half_life)):
+    # S_t = λ * (S_{t-1} + izloze_{t-1}), W_t = λ * (W_{t-1} + 1), p_t = (S_t + alpha * prior) / (W_t + alpha)
+    # Bloka iekšienē rekursija ir slēgtā formā: S_{b0+i} = λ^i * (S_{b0} + sum_{s<i} λ^(-s) * izloze_s)
+
+    if half_life <= 0:
+        raise ValueError("Pussabrukšanas periodam jābūt pozitīvam")
+
+    n, max_num = draws.shape
+    prior = _prior(draws, start)
+    out = np.empty((n - start, max_num), dtype=np.float64)
+
+    decay = 0.5 ** (1.0 / half_life)
+    size = int(min(BLOCK_ROWS, max(1, np.log(DECAY_MAX_SCALE) / -np.log(decay))))
+
+    state = np.zeros(max_num, dtype=np.float64)
+    weight = 0.0
+    for b0, b1 in _block_ranges(0, n, size):
+        block = draws[b0:b1]
+        # λ^i (novecošana līdz rindai i) un λ^(-s) (rindas s svars attiecībā pret bloka sākumu)
+        steps = np.arange(b1 - b0, dtype=np.float64)
+        scale = decay ** steps
+        inv = decay ** -steps
+        before = scale[:, None] * (state + np.cumsum(inv[:, None] * block, axis=0) - inv[:, None] * block)
+        before_w = scale * (weight + np.cumsum(inv) - inv)
+
+        if b1 > start:
+            lo = max(b0, start)
+            out[lo - start:b1 - start] = ((before[lo - b0:] + alpha * prior) /
+                                          (before_w[lo - b0:, None] + alpha))
+
+        # Stāvoklis pirms nākamā bloka
+        state = decay * (before[-1] + block[-1])
+        weight = decay * (before_w[-1] + 1.0)
+    return out
+
+
+def recency_proba(draws: np.ndarray, start: int, max_gap: int = None, alpha: float = 1.0) -> np.ndarray:
+    # Pauze g = izlozes kopš skaitlis pēdējo reizi redzēts (1 = bija iepriekšējā izlozē; g >= max_gap — viena grupa)
+    # p_t(j) = varbūtība, ka skaitlis ar pauzi g parādās nākamajā izlozē, novērtēta no izlozēm pirms start:
+    # (trāpījumi ar pauzi g + alpha * prior) / (gadījumi ar pauzi g + alpha)
+    # Pauzes tiek atjauninātas ar katru izlozi (arī testa periodā); tabula — tikai no treniņa perioda
+    # max_gap=None — 4 vidējās pauzes (4 / prior)
+
+    n, max_num = draws.shape
+    prior = _prior(draws, start)
+    if max_gap is None:
+        max_gap = int(np.ceil(4.0 / prior)) if prior > 0 else 1
+    if max_gap < 1:
+        raise ValueError("Maksimālajai pauzei jābūt pozitīvai")
+    out = np.empty((n - start, max_num), dtype=np.float64)
+
+    hits = np.zeros(max_gap + 1, dtype=np.float64)
+    trials = np.zeros(max_gap + 1, dtype=np.float64)
+    table = None
+
+    # Pēdējās izlozes indekss, kurā skaitlis redzēts (-1 = vēl nav redzēts)
+    last_seen = np.full(max_num, -1, dtype=np.int32)
+    for b0, b1 in _block_ranges(0, start, BLOCK_ROWS) + _block_ranges(start, n, BLOCK_ROWS):
+        block = draws[b0:b1]
+        rows = np.arange(b0, b1, dtype=np.int32)[:, None]
+        seen_at = np.maximum.accumulate(np.where(block, rows, -1), axis=0)
+        seen_at = np.maximum(seen_at, last_seen)
+        # Pēdējā redzēšana pirms rindas (iekļaujot iepriekšējos blokus)
+        before = np.vstack([last_seen[None, :], seen_at[:-1]])
+        gaps = np.minimum(rows - before, max_gap)
+
+        if b0 < start:
+            trials += np.bincount(gaps.ravel(), minlength=max_gap + 1)
+            hits += np.bincount(gaps.ravel(), weights=block.ravel(), minlength=max_gap + 1)
+        else:
+            if table is None:
+                table = (hits + alpha * prior) / (trials + alpha)
+            out[b0 - start:b1 - start] = table[gaps]
+        last_seen = seen_at[-1]
+    return out
+
+
+# Bāzes modeļi: nosaukums -> funkcija(draws, start, **params)
+FREQUENCY_MODELS = {
+    "frequency": frequency_proba,
+    "decayed_frequency": decayed_frequency_proba,
+    "recency": recency_proba,
+}
+
+
+def frequency_params(name: str) -> dict:
+    # Modeļa noklusējuma parametri (rezultātu kešatmiņas atslēgai)
+    signature = inspect.signature(FREQUENCY_MODELS[name])
+    return {k: p.default for k, p in signature.parameters.items() if p.default is not inspect.Parameter.empty}
+
+
+def predict_frequency(name: str, draws: np.ndarray, start: int, **params) -> np.ndarray:
+    # Varbūtības izlozēm draws[start:], katra tikai no iepriekšējām izlozēm
+    if name not in FREQUENCY_MODELS:
+        raise ValueError(f"Nezināms bāzes modelis: {name}")
+    return FREQUENCY_MODELS[name](draws, start, **params)
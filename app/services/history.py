@@ -0,0 +1,191 @@
+import json
+import math
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+# Eksperimentu vēsture SQLite datubāzē (aizstāj results_history.csv pārrakstīšanu)
+# - katrs skrējiens tikai pievieno rindas (INSERT vienā transakcijā), nevis pārraksta visu failu
+# - indeksi uz timestamp, lottery, model un window ļauj ātri filtrēt
+# - rezultātu rindas kolonnas laika gaitā mainās, tāpēc pilna rinda tiek glabāta JSON kolonnā
+# - CSV eksports tikai pēc pieprasījuma (export_csv)
+# - vairāki procesi (gunicorn worker) raksta vienā datubāzē: ierakstīšana notiek BEGIN IMMEDIATE transakcijā
+#   (SQLite rakstīšanas slēdzene starp procesiem, gaida līdz timeout), tāpēc pārbaude + ieraksts ir atomāri
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    lottery TEXT NOT NULL,
+    model TEXT,
+    window INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_timestamp ON results (timestamp);
+CREATE INDEX IF NOT EXISTS idx_results_lottery ON results (lottery);
+CREATE INDEX IF NOT EXISTS idx_results_model ON results (model);
+CREATE INDEX IF NOT EXISTS idx_results_window ON results (window);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Lapošanas ierobežojumi vaicājumiem
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+def timestamp_now() -> str:
+    # Laika zīmogs vēstures ierakstiem (datums + laiks milisekundēs)
+    now = datetime.now()
+    return now.strftime("%Y-%m-%d %H:%M:%S.") + f"{int(now.microsecond / 1000):03d}"
+
+
+def _clean(value):
+    # JSON nepieņem NaN (pandas tukšās vērtības) un numpy tipus
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _where(lottery=None, model=None, window=None, since=None, until=None):
+    # Sastāda WHERE daļu un parametrus no filtriem (None = nefiltrēt)
+    where = []
+    params = []
+    for column, value in (("lottery", lottery), ("model", model), ("window", window)):
+        if value is not None:
+            where.append(f"{column} = ?")
+            params.append(value)
+    if since is not None:
+        where.append("timestamp >= ?")
+        params.append(since)
+    if until is not None:
+        where.append("timestamp <= ?")
+        params.append(until)
+    return (f"WHERE {' AND '.join(where)}" if where else ""), params
+
+
+class HistoryStore:
+    # Append-only eksperimentu vēsture; savienojums tiek atvērts katrai operācijai,
+    # jo ierakstīšana notiek no fona uzdevumu pavediena, bet lasīšana — no pieprasījumu pavedieniem
+
+    def __init__(self, path: Path, timeout: float = 30.0):
+        self.path = Path(path)
+        self.timeout = timeout
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            # WAL ļauj lasīt vēsturi, kamēr cits process/pavediens raksta
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self, immediate: bool = False):
+        # Savienojums vienai operācijai: commit veiksmes gadījumā, rollback kļūdas gadījumā, vienmēr close
+        # immediate=True — rakstīšanas slēdzene jau transakcijas sākumā (citi rakstītāji gaida, lasītāji ne)
+        conn = sqlite3.connect(self.path, timeout=self.timeout)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                if immediate:
+                    conn.execute("BEGIN IMMEDIATE")
+                yield conn
+        finally:
+            conn.close()
+
+    def append(self, results, timestamp: str, lottery: str, window: int = None, marker: str = None) -> int:
+        # Pievieno viena skrējiena rezultātu rindas; atgriež pievienoto rindu skaitu
+        # window=None — katras rindas logs tiek ņemts no tās "window" vērtības (vairākas konfigurācijas)
+        # marker — ja dots, tiek ierakstīts meta tabulā tajā pašā transakcijā (partiju atsākšanai:
+        # atzīme ir tad un tikai tad, ja rezultāti ir saglabāti)
+        rows = []
+        for res in results:
+            data = {k: _clean(v) for k, v in res.items()}
+            data["timestamp"] = timestamp
+            data["lottery"] = lottery
+            data["window"] = int(window if window is not None else data["window"])
+            rows.append((timestamp, lottery, data.get("model"), data["window"], json.dumps(data)))
+
+        with self._connect(immediate=True) as conn:
+            conn.executemany(
+                "INSERT INTO results (timestamp, lottery, model, window, data) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            if marker is not None:
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (marker, timestamp))
+        return len(rows)
+
+    def has_marker(self, marker: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM meta WHERE key = ?", (marker,)).fetchone() is not None
+
+    def query(self, lottery: str = None, model: str = None, window: int = None,
+              since: str = None, until: str = None, limit: int = DEFAULT_LIMIT, offset: int = 0):
+        # Atgriež (rindas, kopējais skaits) — jaunākās vispirms
+        # since/until salīdzina ar timestamp tekstu ("YYYY-MM-DD HH:MM:SS.mmm"), tāpēc der arī "YYYY-MM-DD"
+
+        clause, params = _where(lottery, model, window, since, until)
+        limit = max(0, min(int(limit), MAX_LIMIT))
+        offset = max(0, int(offset))
+
+        with self._connect() as conn:
+            total = conn.execute(f"SELECT COUNT(*) FROM results {clause}", params).fetchone()[0]
+            cursor = conn.execute(
+                f"SELECT id, data FROM results {clause} ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?",
+                params + [limit, offset],
+            )
+            rows = [dict(json.loads(r["data"]), id=r["id"]) for r in cursor]
+        return rows, total
+
+    def export_csv(self, target, lottery: str = None, model: str = None, window: int = None,
+                   since: str = None, until: str = None) -> int:
+        # CSV eksports pēc pieprasījuma (visa vēsture vai filtrēta); target — ceļš vai faila objekts
+        # Rindas tiek izvadītas hronoloģiski, kā iepriekšējā results_history.csv
+        clause, params = _where(lottery, model, window, since, until)
+        with self._connect() as conn:
+            cursor = conn.execute(f"SELECT data FROM results {clause} ORDER BY id", params)
+            df = pd.DataFrame([json.loads(r["data"]) for r in cursor])
+        df.to_csv(target, index=False)
+        return len(df)
+
+    def import_csv(self, csv_path: Path) -> int:
+        # Vienreizējs esošā results_history.csv imports
+        # Importētā faila ceļš tiek atzīmēts meta tabulā, tāpēc atkārtots izsaukums neko nedara
+        # Vairāki worker procesi var startēt vienlaikus: atzīme tiek pārbaudīta vēlreiz rakstīšanas transakcijā
+        csv_path = Path(csv_path)
+        marker = f"imported:{csv_path.resolve()}"
+
+        if self.has_marker(marker) or not csv_path.exists():
+            return 0
+
+        df = pd.read_csv(csv_path)
+        rows = []
+        for rec in df.to_dict(orient="records"):
+            data = {k: _clean(v) for k, v in rec.items()}
+            window = data.get("window")
+            rows.append((
+                str(data.get("timestamp") or ""),
+                str(data.get("lottery") or ""),
+                data.get("model"),
+                int(window) if window is not None else None,
+                json.dumps(data),
+            ))
+
+        with self._connect(immediate=True) as conn:
+            if conn.execute("SELECT 1 FROM meta WHERE key = ?", (marker,)).fetchone():
+                return 0
+            conn.executemany(
+                "INSERT INTO results (timestamp, lottery, model, window, data) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (marker, str(len(rows))))
+        return len(rows)
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
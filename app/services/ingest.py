@@ -0,0 +1,111 @@
+import hashlib
+from itertools import islice
+from pathlib import Path
+
+import pandas as pd
+
+from .files import atomic_path
+
+# Augšupielādēto failu straumēta apstrāde ar ierobežotu atmiņu
+# - save_upload: augšupielādes straume tiek rakstīta diskā pa blokiem un vienlaikus jaukta (SHA-256),
+#   tāpēc fails nav jālasa otrreiz krātuves atslēgai
+# - iter_table_chunks: CSV tiek lasīts pa rindu blokiem (pd.read_csv chunksize), XLSX — pa rindām
+#   read-only režīmā (python-calamine, ja instalēts, citādi openpyxl read_only)
+# - galvenes pārbaude notiek jau pēc pirmā bloka, tāpēc nepareizs fails tiek noraidīts uzreiz
+# Atmiņā vienlaikus ir tikai viens neapstrādāts bloks; uzkrāti tiek tikai normalizētie dati
+
+# Rindu skaits vienā blokā (Flask konfigurācijā INGEST_CHUNK_ROWS)
+DEFAULT_CHUNK_ROWS = 50_000
+
+# Straumes kopēšanas bloka izmērs baitos
+COPY_BLOCK_BYTES = 1 << 20
+
+# Ātrāks Excel lasītājs (Rust calamine), ja instalēts
+try:
+    from python_calamine import CalamineWorkbook  # type: ignore
+    HAS_CALAMINE = True
+except Exception:
+    CalamineWorkbook = None  # type: ignore
+    HAS_CALAMINE = False
+
+
+def save_upload(stream, dest: Path):
+    # Kopē augšupielādes straumi uz dest pa blokiem un atgriež SHA-256 objektu ar faila saturu
+    # (atslēgu pabeidz store.finish_key ar loteriju un formātu)
+    # Fails parādās dest tikai pilnībā uzrakstīts (pagaidu fails + atomāra pārdēvēšana)
+    h = hashlib.sha256()
+    with atomic_path(dest) as tmp:
+        with open(tmp, "wb") as out:
+            for block in iter(lambda: stream.read(COPY_BLOCK_BYTES), b""):
+                h.update(block)
+                out.write(block)
+    return h
+
+
+def _table_kind(path: Path) -> str:
+    suffix = Path(path).suffix.lower()
+    if suffix == ".csv":
+        return "csv"
+    if suffix in [".xlsx", ".xls"]:
+        return "excel"
+    raise ValueError("Neatbalstīts faila formāts. Izmanto CSV vai XLSX")
+
+
+def _excel_rows(path: Path):
+    # Atgriež Excel pirmās lapas rindu iteratoru (tuple vērtības, bez stilu objektiem)
+    if HAS_CALAMINE:
+        sheet = CalamineWorkbook.from_path(str(path)).get_sheet_by_index(0)
+        yield from sheet.iter_rows()
+        return
+
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from wb.worksheets[0].iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def _iter_excel_chunks(path: Path, chunksize: int):
+    rows = _excel_rows(path)
+    try:
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = list(header)
+        width = len(columns)
+
+        # Pilnīgi tukšas rindas tiek izlaistas (piem., formatētas, bet tukšas rindas lapas beigās)
+        # Tukšas šūnas ("") kļūst par None, kā pd.read_excel tās pārvērš par NaN
+        values = ([None if v == "" else v for v in row] for row in rows)
+        values = (row for row in values if any(v is not None for v in row))
+        while True:
+            block = list(islice(values, chunksize))
+            if not block:
+                return
+            block = [row[:width] + [None] * (width - len(row)) for row in block]
+            yield pd.DataFrame(block, columns=columns)
+    finally:
+        rows.close()
+
+
+def iter_table_chunks(path: Path, chunksize: int = DEFAULT_CHUNK_ROWS):
+    # Nolasa CSV vai Excel failu pa blokiem (DataFrame ar ne vairāk kā chunksize rindām)
+    # Tāda pati formāta noteikšana pēc paplašinājuma kā read_table
+    kind = _table_kind(path)
+    if kind == "csv":
+        with pd.read_csv(path, chunksize=chunksize) as reader:
+            yield from reader
+    else:
+        yield from _iter_excel_chunks(path, chunksize)
+
+
+def read_header_chunk(path: Path, rows: int = 100) -> pd.DataFrame:
+    # Nolasa tikai faila sākumu (galvenes pārbaudei pirms uzdevuma ielikšanas rindā)
+    chunks = iter_table_chunks(path, chunksize=rows)
+    try:
+        return next(chunks, pd.DataFrame())
+    finally:
+        # Aizver lasītāju (Excel darbgrāmatu / CSV failu), neizlasot pārējo failu
+        chunks.close()
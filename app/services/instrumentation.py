@@ -0,0 +1,139 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+# Viegla instrumentācija eksperimentu plūsmai:
+# - StageTimer: posmu ilgumi (augšupielāde, nolasīšana, normalizācija, features, fit/predict, metrikas, saglabāšana)
+#   tiek ierakstīti katrā rezultātu rindā kā t_<posms> kolonnas
+# - MetricsRegistry: kopējie skaitītāji un latentuma histogrammas Prometheus teksta formātā (GET /metrics)
+# - profile_call: pēc izvēles cProfile vienam pieprasījumam (rezultāts .prof failā)
+
+# Posmi, kas tiek mērīti katram modelim atsevišķi (pārējie t_<posms> ir kopīgi visam skrējienam)
+MODEL_STAGES = ("fit", "predict", "metrics", "model_save")
+
+# Histogrammu robežas sekundēs (no milisekundēm līdz vairākām minūtēm)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+class StageTimer:
+    # Uzkrāj posmu ilgumus sekundēs {posms: sekundes}; objekts ir pickle-draudzīgs (tikai vārdnīca)
+
+    def __init__(self, initial: dict = None):
+        self.timings = dict(initial or {})
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float):
+        # Atkārtots posms (piem., katrs nolasītais bloks) tiek summēts
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def columns(self, prefix: str = "t_") -> dict:
+        # Rezultātu rindas kolonnas: {"t_normalize": 0.1234, ...}
+        return {f"{prefix}{name}": round(seconds, 4) for name, seconds in self.timings.items()}
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{key}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class MetricsRegistry:
+    # Skaitītāji un histogrammas galvenajā procesā (pavedienu drošs)
+    # Nosaukumi tiek papildināti ar prefiksu, piem., "jobs_total" -> "lotteligence_jobs_total"
+
+    def __init__(self, prefix: str = "lotteligence"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._help = {}
+
+    def _name(self, name: str) -> str:
+        return f"{self.prefix}_{name}" if self.prefix else name
+
+    def inc(self, name: str, value: float = 1.0, help: str = None, **labels):
+        # Palielina skaitītāju (nosaukumam jābeidzas ar _total)
+        name = self._name(name)
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            if help:
+                self._help.setdefault(name, help)
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, help: str = None, buckets=DEFAULT_BUCKETS, **labels):
+        # Pievieno novērojumu histogrammai (piem., posma ilgumu sekundēs)
+        name = self._name(name)
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            if help:
+                self._help.setdefault(name, help)
+            hist = self._histograms.setdefault(name, {"buckets": tuple(buckets), "series": {}})
+            series = hist["series"].setdefault(key, {"counts": [0] * len(hist["buckets"]), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(hist["buckets"]):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def render(self) -> str:
+        # Prometheus teksta formāts (text/plain; version=0.0.4)
+        lines = []
+        with self._lock:
+            for name in sorted(self._counters):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in sorted(self._counters[name].items()):
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+
+            for name in sorted(self._histograms):
+                hist = self._histograms[name]
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, series in sorted(hist["series"].items()):
+                    # Prometheus bucket vērtības ir kumulatīvas (observe jau skaita visas robežas >= value)
+                    for bound, count in zip(hist["buckets"], series["counts"]):
+                        labels = key + (("le", _format_value(bound)),)
+                        lines.append(f"{name}_bucket{_format_labels(labels)} {count}")
+                    labels = key + (("le", "+Inf"),)
+                    lines.append(f"{name}_bucket{_format_labels(labels)} {series['count']}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {_format_value(series['sum'])}")
+                    lines.append(f"{name}_count{_format_labels(key)} {series['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def profile_call(path, fn, *args, **kwargs):
+    # Izpilda fn ar cProfile un saglabā statistiku path failā (pstats formātā)
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn, *args, **kwargs)
+    finally:
+        profiler.dump_stats(str(path))
+
+
+def profile_summary(path, limit: int = 40, sort: str = "cumulative") -> str:
+    # Teksta kopsavilkums no .prof faila (lēnākās funkcijas pēc kumulatīvā laika)
+    buf = io.StringIO()
+    stats = pstats.Stats(str(path), stream=buf)
+    stats.sort_stats(sort).print_stats(limit)
+    return buf.getvalue()
@@ -0,0 +1,351 @@
+import itertools
+import json
+import multiprocessing as mp
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, CancelledError
+from pathlib import Path
+
+from .files import atomic_path
+
+# Fona uzdevumi (jobs) eksperimentiem
+# Smagā apmācība notiek ierobežotā procesu pūlā, nevis pieprasījuma pavedienā:
+# - submit() uzreiz atgriež job_id
+# - worker procesi sūta progresu (modelis -> stāvoklis) caur kopīgu rindu
+# - rindas garums ir ierobežots, lai daži smagi faili nenoslogotu serveri
+# - atcelšana: gaidošs uzdevums tiek izņemts no rindas, strādājošs apstājas pirms nākamā modeļa
+# - ar JobStore stāvoklis tiek rakstīts arī diskā, tāpēc /jobs/<id> var apkalpot jebkurš servera process
+
+# Uzdevuma stāvokļi
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+# Uzdevuma identifikators (uuid4().hex) — arī faila nosaukums JobStore
+JOB_ID_RE = re.compile(r"[0-9a-f]{32}")
+
+
+class JobQueueFull(RuntimeError):
+    # Rinda ir pilna — jauns uzdevums netiek pieņemts
+    pass
+
+
+class JobCancelled(Exception):
+    # Tiek izmesta worker procesā, ja uzdevums atcelts apstrādes laikā
+    pass
+
+
+class JobStore:
+    # Uzdevumu stāvoklis diskā, kopīgs visiem servera procesiem (piem., gunicorn worker bez "sticky" maršrutēšanas):
+    # - <id>.json — uzdevuma kopija (statuss, progress, daļējie un gala rezultāti); to raksta tikai process,
+    #   kas uzdevumu pieņēma, pēc katras izmaiņas (atomic_path), lasīt var jebkurš process
+    # - <id>.cancel — atcelšanas pieprasījums no cita procesa; worker to pārbauda katrā progress() izsaukumā
+
+    def __init__(self, root: Path, keep_finished: int = 100):
+        self.root = Path(root)
+        self.keep_finished = keep_finished
+
+    def _path(self, job_id: str, suffix: str = ".json"):
+        if not JOB_ID_RE.fullmatch(job_id or ""):
+            return None
+        return self.root / f"{job_id}{suffix}"
+
+    def cancel_path(self, job_id: str) -> str:
+        return str(self._path(job_id, ".cancel"))
+
+    def put(self, job: dict):
+        with atomic_path(self._path(job["id"])) as tmp:
+            tmp.write_text(json.dumps(job), encoding="utf-8")
+
+    def get(self, job_id: str):
+        # Uzdevuma kopija vai None (nav, nederīgs id)
+        path = self._path(job_id)
+        if path is None:
+            return None
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def request_cancel(self, job_id: str):
+        path = self._path(job_id, ".cancel")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+
+    def clear_cancel(self, job_id: str):
+        try:
+            os.unlink(self.cancel_path(job_id))
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        # Dzēš vecākos pabeigtos uzdevumus, ja failu ir vairāk nekā keep_finished (aktīvie paliek)
+        entries = []
+        for p in self.root.glob("*.json"):
+            try:
+                entries.append((p.stat().st_mtime, p))
+            except FileNotFoundError:
+                continue
+        for _, p in sorted(entries)[:max(0, len(entries) - self.keep_finished)]:
+            job = self.get(p.stem)
+            if job is not None and job["status"] in FINISHED_STATES:
+                p.unlink(missing_ok=True)
+                self.clear_cancel(p.stem)
+
+
+def _job_entry(job_id, fn, args, kwargs, events, cancel_flags, cancel_path=None):
+    # Izpildās worker procesā: sagatavo progress() un izsauc uzdevuma funkciju
+    # progress(step, state) nosūta notikumu un pārbauda, vai uzdevums nav atcelts
+    # (arī no cita servera procesa — cancel_path fails JobStore mapē)
+    # progress(step, state, payload) papildus nosūta daļējo rezultātu (piem., vienas konfigurācijas
+    # rezultātus), kas galvenajā procesā pieejams uzreiz — job["partial"]
+
+    def cancelled():
+        return cancel_flags.get(job_id) or (cancel_path is not None and os.path.exists(cancel_path))
+
+    def progress(step, state, payload=None):
+        if cancelled():
+            raise JobCancelled()
+        events.put((job_id, step, state, payload))
+
+    if cancelled():
+        raise JobCancelled()
+    events.put((job_id, None, RUNNING, None))
+    return fn(*args, progress=progress, **kwargs)
+
+
+class JobManager:
+    # Pārvalda fona uzdevumus un to stāvokli galvenajā procesā
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 8, keep_finished: int = 100, metrics=None,
+                 initializer=None, store: JobStore = None):
+        # metrics — MetricsRegistry; ja dots, tiek skaitīti pabeigtie uzdevumi un to ilgums
+        # initializer — moduļa līmeņa funkcija, ko katrs worker process izsauc startējot (piem., models.warm_up)
+        # store — JobStore; ja dots, get() un cancel() atrod arī citu servera procesu uzdevumus
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.keep_finished = keep_finished
+        self.metrics = metrics
+        self.initializer = initializer
+        self.store = store
+
+        self._jobs = OrderedDict()
+        self._futures = {}
+        self._lock = threading.Lock()
+
+        # Pūls un kopīgie objekti tiek izveidoti tikai pirmajā submit()
+        self._executor = None
+        self._mp_manager = None
+        self._events = None
+        self._cancel_flags = None
+        self._listener = None
+
+    def _ensure_started(self):
+        if self._executor is not None:
+            return
+
+        # "spawn" ir drošāks par fork, jo Flask serveris var būt daudzpavedienu
+        ctx = mp.get_context("spawn")
+        self._mp_manager = ctx.Manager()
+        self._events = self._mp_manager.Queue()
+        self._cancel_flags = self._mp_manager.dict()
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=ctx,
+                                             initializer=self.initializer)
+
+        self._listener = threading.Thread(target=self._listen, daemon=True)
+        self._listener.start()
+
+    def _listen(self):
+        # Nolasa progresa notikumus no worker procesiem
+        while True:
+            try:
+                job_id, step, state, payload = self._events.get()
+            except (EOFError, OSError):
+                return
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None or job["status"] in FINISHED_STATES:
+                    continue
+                if step is None:
+                    job["status"] = state
+                    job["started"] = time.time()
+                else:
+                    job["progress"][step] = state
+                if payload is not None:
+                    job["partial"].append({"step": step, "data": payload})
+                self._persist(job)
+
+    def _persist(self, job):
+        # Uzdevuma kopija JobStore (izsauc ar self._lock, lai vecāka kopija nepārrakstītu jaunāku)
+        # Diska kļūda neaptur uzdevumu — stāvoklis paliek pieejams šajā procesā
+        if self.store is None:
+            return
+        try:
+            self.store.put(job)
+        except (OSError, TypeError, ValueError):
+            pass
+
+    def warm_up(self, fn, timeout: float = None) -> list:
+        # Iepriekš startē pūlu un visus worker procesus (katrs izpilda fn vienreiz), lai pirmais
+        # uzdevums negaidītu procesu startu un bibliotēku importu; atgriež fn rezultātus
+        # Spawn pūls procesus veido tikai pēc vajadzības, tāpēc tiek iesniegti max_workers izsaukumi
+        with self._lock:
+            self._ensure_started()
+            futures = [self._executor.submit(fn) for _ in range(self.max_workers)]
+        return [f.result(timeout=timeout) for f in futures]
+
+    def submit(self, fn, *args, steps=(), meta=None, on_done=None, on_finish=None, **kwargs) -> str:
+        # Ieliek uzdevumu rindā un atgriež tā identifikatoru
+        # fn jābūt moduļa līmeņa funkcijai ar keyword argumentu progress
+        # steps: sagaidāmie soļi (piem., modeļu nosaukumi) progresa attēlošanai
+        # on_done(job, result) tiek izsaukts galvenajā procesā pēc veiksmīgas izpildes
+        # on_finish(job_id, status) — galvenajā procesā pēc jebkura iznākuma (piem., augšupielādes dzēšanai)
+
+        with self._lock:
+            active = sum(1 for j in self._jobs.values() if j["status"] not in FINISHED_STATES)
+            if active >= self.max_workers + self.max_pending:
+                raise JobQueueFull("Pārāk daudz aktīvu eksperimentu, mēģiniet vēlāk")
+
+            self._ensure_started()
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                "id": job_id,
+                "status": QUEUED,
+                "created": time.time(),
+                "started": None,
+                "finished": None,
+                "progress": {step: "pending" for step in steps},
+                "meta": dict(meta or {}),
+                "partial": [],
+                "results": None,
+                "error": None,
+            }
+
+            cancel_path = self.store.cancel_path(job_id) if self.store is not None else None
+            future = self._executor.submit(
+                _job_entry, job_id, fn, args, kwargs, self._events, self._cancel_flags, cancel_path
+            )
+            self._futures[job_id] = future
+            self._persist(self._jobs[job_id])
+            self._evict_finished()
+
+        future.add_done_callback(lambda f: self._finish(job_id, f, on_done, on_finish))
+        return job_id
+
+    def _finish(self, job_id, future, on_done, on_finish=None):
+        # Izsaucas, kad worker process pabeidz (vai uzdevums atcelts)
+        error = None
+        result = None
+        status = DONE
+        try:
+            result = future.result()
+        except (CancelledError, JobCancelled):
+            status = CANCELLED
+        except Exception as exc:
+            status = FAILED
+            error = str(exc)
+
+        if status == DONE and on_done is not None:
+            try:
+                result = on_done(self.get(job_id), result)
+            except Exception as exc:
+                status = FAILED
+                error = str(exc)
+
+        if on_finish is not None:
+            try:
+                on_finish(job_id, status)
+            except Exception:
+                pass
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            self._futures.pop(job_id, None)
+            try:
+                self._cancel_flags.pop(job_id, None)
+            except (OSError, EOFError):
+                # Manager process jau apturēts (shutdown)
+                pass
+            if job is None:
+                return
+            job["status"] = status
+            job["finished"] = time.time()
+            if status == DONE:
+                # Pēdējie progresa notikumi var pienākt vēlāk par rezultātu
+                job["progress"] = {step: DONE for step in job["progress"]}
+            job["results"] = result if status == DONE else None
+            job["error"] = error
+            self._persist(job)
+            timing = (job["created"], job["started"], job["finished"])
+
+        if self.store is not None:
+            self.store.clear_cancel(job_id)
+
+        if self.metrics is not None:
+            created, started, finished = timing
+            self.metrics.inc("jobs_total", help="Pabeigtie eksperimentu uzdevumi pēc stāvokļa", status=status)
+            self.metrics.observe("job_duration_seconds", finished - created,
+                                 help="Uzdevuma ilgums no ielikšanas rindā līdz pabeigšanai", status=status)
+            if started is not None:
+                self.metrics.observe("job_queue_wait_seconds", started - created,
+                                     help="Gaidīšanas laiks rindā līdz worker sāka darbu")
+
+    def _evict_finished(self):
+        # Glabā tikai pēdējos keep_finished pabeigtos uzdevumus (vecākie tiek izmesti)
+        finished = [jid for jid, j in self._jobs.items() if j["status"] in FINISHED_STATES]
+        for jid in itertools.islice(finished, max(0, len(finished) - self.keep_finished)):
+            del self._jobs[jid]
+        if self.store is not None:
+            try:
+                self.store.evict()
+            except OSError:
+                pass
+
+    def get(self, job_id):
+        # Atgriež uzdevuma stāvokļa kopiju (vai None, ja tāda nav)
+        # Šī procesa uzdevumi — no atmiņas, citu procesu uzdevumi — no JobStore
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                snapshot = dict(job)
+                snapshot["progress"] = dict(job["progress"])
+                snapshot["partial"] = list(job["partial"])
+                return snapshot
+        return self.store.get(job_id) if self.store is not None else None
+
+    def cancel(self, job_id) -> bool:
+        # Atceļ uzdevumu; atgriež False, ja tas jau ir pabeigts vai neeksistē
+        # Cita procesa uzdevumam tiek atstāts atcelšanas pieprasījums JobStore: worker apstājas pie nākamā
+        # soļa (gaidošs — tiklīdz sāk darbu), un stāvokli uz "cancelled" nomaina process, kas to pieņēma
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                remote = self.store.get(job_id) if self.store is not None else None
+                if remote is None or remote["status"] in FINISHED_STATES:
+                    return False
+                self.store.request_cancel(job_id)
+                return True
+            if job["status"] in FINISHED_STATES:
+                return False
+            future = self._futures.get(job_id)
+            self._cancel_flags[job_id] = True
+
+        # Gaidošu uzdevumu var izņemt no rindas uzreiz, strādājošs apstāsies pie nākamā soļa
+        if future is not None:
+            future.cancel()
+        return True
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._mp_manager.shutdown()
+            self._executor = None
@@ -0,0 +1,99 @@
+import numpy as np
+
+# Varbūtību apgriešana, lai logloss nebūtu bezgalīgs (tāpat kā iepriekš experiment.py)
+PROBA_EPS = 1e-6
+
+
+def top_k_mask(proba: np.ndarray, k: int) -> np.ndarray:
+    # Atgriež bool masku [n_samples, n_labels] ar top-k varbūtībām katrā rindā
+    # Slieksni atrod ar np.partition (bez pilnas kārtošanas)
+    # Vienādu vērtību gadījumā priekšroka ir lielākam indeksam (kā np.argsort(kind="stable")[-k:])
+
+    n_samples, n_labels = proba.shape
+    if k >= n_labels:
+        return np.ones_like(proba, dtype=bool)
+    if k <= 0:
+        return np.zeros_like(proba, dtype=bool)
+
+    # k-tā lielākā vērtība katrā rindā
+    kth = np.partition(proba, n_labels - k, axis=1)[:, n_labels - k][:, None]
+
+    above = proba > kth
+    tied = proba == kth
+
+    # Cik vietas vēl jāaizpilda ar sliekšņa vērtībām; tās aizpilda no labās puses
+    needed = k - above.sum(axis=1, keepdims=True)
+    tied_rank_from_right = np.cumsum(tied[:, ::-1], axis=1)[:, ::-1]
+
+    return above | (tied & (tied_rank_from_right <= needed))
+
+
+def hit_at_k(Y_true: np.ndarray, proba: np.ndarray, k: int) -> float:
+    # Aprēķina hit@k — cik bieži patiesie skaitļi ir starp top-k prognozētajiem
+    # Vidējais (trāpījumi / k) pa visām rindām
+
+    hits = (top_k_mask(proba, k) & (Y_true == 1)).sum(axis=1)
+    return float(np.mean(hits / float(k)))
+
+
+def hit_curve(Y_true: np.ndarray, proba: np.ndarray, max_k: int = None) -> np.ndarray:
+    # Aprēķina hit@1..max_k vienā piegājienā
+    # Līknei vajag pilnu secību, tāpēc kolonnas tiek sakārtotas vienreiz (stabili, no labās puses,
+    # lai vienādu vērtību secība sakristu ar top_k_mask) un trāpījumi tiek skaitīti kumulatīvi
+
+    n_samples, n_labels = proba.shape
+    max_k = n_labels if max_k is None else min(max_k, n_labels)
+
+    order = np.argsort(-proba[:, ::-1], axis=1, kind="stable")[:, :max_k]
+    top_idx = n_labels - 1 - order
+
+    hits = np.take_along_axis(Y_true == 1, top_idx, axis=1)
+    cum_hits = np.cumsum(hits, axis=1).mean(axis=0)
+
+    ks = np.arange(1, max_k + 1)
+    return cum_hits / ks
+
+
+def evaluate_rows(Y_true: np.ndarray, proba: np.ndarray, ks=(10,), eps: float = PROBA_EPS):
+    # Tās pašas metrikas kā evaluate, bet katrai rindai atsevišķi (walk-forward soļiem)
+    # Atgriež vārdnīcu ar masīviem garumā n_samples: {"logloss", "brier", "hit_at": {k: ...}}
+
+    y = np.asarray(Y_true, dtype=np.float32)
+    raw = np.asarray(proba, dtype=np.float32)
+    p = np.clip(raw, eps, 1 - eps)
+    q = np.clip(1 - raw, eps, 1 - eps)
+
+    ll = -np.mean(y * np.log(p) + (1 - y) * np.log(q), axis=1, dtype=np.float64)
+    brier = np.mean(np.square(y - p), axis=1, dtype=np.float64)
+
+    y_bool = y == 1
+    hit_at = {int(k): (top_k_mask(p, int(k)) & y_bool).sum(axis=1) / float(k) for k in ks}
+    return {"logloss": ll, "brier": brier, "hit_at": hit_at}
+
+
+def evaluate(Y_true: np.ndarray, proba: np.ndarray, ks=(10,), curve: bool = False, eps: float = PROBA_EPS):
+    # Aprēķina logloss, Brier un hit@k visām ks vērtībām vienā funkcijā
+    # Aprēķini notiek ar float32 masīviem; summas tiek uzkrātas float64 precizitātē
+    # Atgriež vārdnīcu: {"logloss": ..., "brier": ..., "hit_at": {k: ...}}
+    # Ja curve=True, pievieno arī "hit_curve" (hit@1..max_num saraksts)
+
+    y = np.asarray(Y_true, dtype=np.float32)
+    raw = np.asarray(proba, dtype=np.float32)
+    p = np.clip(raw, eps, 1 - eps)
+    # 1 - eps nav precīzi attēlojams float32, tāpēc arī 1 - p tiek apgriezts atsevišķi
+    q = np.clip(1 - raw, eps, 1 - eps)
+
+    # LogLoss un Brier uz saplacināta multi-label vektora (kā Y_test.ravel() pret proba.ravel())
+    ll = -np.mean(y * np.log(p) + (1 - y) * np.log(q), dtype=np.float64)
+    brier = np.mean(np.square(y - p), dtype=np.float64)
+
+    y_bool = y == 1
+    hit_at = {}
+    for k in ks:
+        hits = (top_k_mask(p, int(k)) & y_bool).sum(axis=1)
+        hit_at[int(k)] = float(np.mean(hits / float(k)))
+
+    out = {"logloss": float(ll), "brier": float(brier), "hit_at": hit_at}
+    if curve:
+        out["hit_curve"] = hit_curve(y_bool, p).tolist()
+    return out
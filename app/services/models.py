@@ -1,34 +1,127 @@
+import threading
+import time
+from types import SimpleNamespace
+
 import numpy as np
 
-# Sklearn komponentes: 
-# SGDClassifier: loģistiskā regresija ar SGD optimizāciju 
-# RandomForestClassifier: ansambļa modelis ar daudziem nejaušiem kokiem 
-# GradientBoostingClassifier: vienkāršota boosting pieeja (fallback XGBoost vietā) 
-# OneVsRestClassifier: ļauj trenēt vienu bināru modeli katram skaitlim (multi-label) 
-# StandardScaler: stabilizē SGD svaru dinamiku 
-# make_pipeline: apvieno scaler + modeli vienā ķēdē
-from sklearn.linear_model import SGDClassifier
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.multiclass import OneVsRestClassifier
-from sklearn.preprocessing import StandardScaler
-from sklearn.pipeline import make_pipeline
-
-# Mēģina importēt xgboost, ja nav – izmanto fallback
-try:
-    from xgboost import XGBClassifier  # type: ignore
-    HAS_XGB = True
-except Exception:
-    XGBClassifier = None  # type: ignore
-    HAS_XGB = False
-
-def build_logreg_sgd():
+# Modeļu bibliotēkas (backendi) tiek importētas tikai pirmajā izmantošanas reizē, nevis moduļa ielādē:
+# sklearn un xgboost imports aizņem lielāko daļu lietotnes starta laika, bet pirmajam pieprasījumam
+# (sākuma lapa, augšupielāde) tās nav vajadzīgas
+# warm_up() ļauj tās ielādēt iepriekš (piem., fona pavedienā pēc servera starta)
+
+
+def _load_sklearn():
+    # Sklearn komponentes:
+    # SGDClassifier: loģistiskā regresija ar SGD optimizāciju
+    # RandomForestClassifier: ansambļa modelis ar daudziem nejaušiem kokiem
+    # GradientBoostingClassifier: vienkāršota boosting pieeja (fallback XGBoost vietā)
+    # OneVsRestClassifier: ļauj trenēt vienu bināru modeli katram skaitlim (multi-label)
+    # StandardScaler: stabilizē SGD svaru dinamiku
+    # make_pipeline: apvieno scaler + modeli vienā ķēdē
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+    from sklearn.multiclass import OneVsRestClassifier
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.pipeline import make_pipeline
+    from sklearn.base import clone
+
+    return SimpleNamespace(
+        SGDClassifier=SGDClassifier,
+        RandomForestClassifier=RandomForestClassifier,
+        GradientBoostingClassifier=GradientBoostingClassifier,
+        OneVsRestClassifier=OneVsRestClassifier,
+        StandardScaler=StandardScaler,
+        make_pipeline=make_pipeline,
+        clone=clone,
+    )
+
+
+def _load_xgboost():
+    # Mēģina importēt xgboost, ja nav – None (tiek izmantots fallback)
+    try:
+        from xgboost import XGBClassifier  # type: ignore
+    except Exception:
+        return None
+    return SimpleNamespace(XGBClassifier=XGBClassifier)
+
+
+_BACKEND_LOADERS = {"sklearn": _load_sklearn, "xgboost": _load_xgboost}
+
+# Kuri backendi vajadzīgi katram modelim
+MODEL_BACKENDS = {
+    "logreg_sgd": ("sklearn",),
+    "random_forest": ("sklearn",),
+    "xgboost": ("sklearn", "xgboost"),
+}
+
+_backends = {}
+_backend_seconds = {}
+_backend_lock = threading.Lock()
+
+
+def backend(name: str):
+    # Atgriež backend komponentes (importē pirmajā izsaukumā); None, ja backend nav instalēts
+    if name in _backends:
+        return _backends[name]
+    with _backend_lock:
+        if name not in _backends:
+            start = time.perf_counter()
+            _backends[name] = _BACKEND_LOADERS[name]()
+            _backend_seconds[name] = time.perf_counter() - start
+    return _backends[name]
+
+
+def has_xgboost() -> bool:
+    return backend("xgboost") is not None
+
+
+def __getattr__(name):
+    # HAS_XGB tiek noteikts tikai tad, kad to kāds pieprasa (tas importē xgboost)
+    if name == "HAS_XGB":
+        return has_xgboost()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def warm_up(model_names=None) -> dict:
+    # Iepriekš ielādē norādīto modeļu (pēc noklusējuma visu) backendus; atgriež backend_status()
+    for model in model_names or MODEL_BACKENDS:
+        for name in MODEL_BACKENDS[model]:
+            backend(name)
+    return backend_status()
+
+
+def backend_status() -> dict:
+    # {backend: {"loaded": bool, "available": bool vai None (nav mēģināts), "import_seconds": s vai None}}
+    status = {}
+    for name in _BACKEND_LOADERS:
+        loaded = name in _backends
+        status[name] = {
+            "loaded": loaded,
+            "available": (_backends[name] is not None) if loaded else None,
+            "import_seconds": round(_backend_seconds[name], 4) if loaded else None,
+        }
+    return status
+
+# Modeļu režīmi:
+# - ovr: viens binārs modelis katram skaitlim (OneVsRestClassifier, 48–50 apakšmodeļi)
+# - native: viens multi-label modelis visiem skaitļiem (RandomForest un XGBoost to atbalsta paši)
+MODEL_MODES = ("ovr", "native")
+
+def _check_mode(mode):
+    if mode not in MODEL_MODES:
+        raise ValueError(f"Nezināms modeļa režīms: {mode}")
+
+def build_logreg_sgd(mode="ovr", **params):
     # Izveido stabilu loģistiskās regresijas modeli ar SGD
+    # SGD nav multi-label atbalsta, tāpēc abos režīmos tiek izmantots OneVsRest
     # Stohastiskā gradienta metode - metode, kas atjaunina modeļa svarus, izmantojot nejauši izvēlētus datu punktus
     # StandardScaler stabilizē svaru dinamiku
     # Mazāks solis (eta0) novērš svaru eksplodēšanu
     # Regulārzācija (alpha) samazina overflow risku
+    # params — SGDClassifier parametri, kas aizstāj noklusējumus (hiperparametru meklēšanai)
 
-    base = SGDClassifier(
+    sk = backend("sklearn")
+    base_params = dict(
         loss="log_loss",
         max_iter=300,
         tol=1e-3,
@@ -37,67 +130,353 @@ def build_logreg_sgd():
         alpha=0.0005,       # neliela regulārzācija
         random_state=42,
     )
+    base_params.update(params)
+    base = sk.SGDClassifier(**base_params)
 
     # Scaler + SGD pipeline
-    pipeline = make_pipeline(
-        StandardScaler(with_mean=False),  # saglabā bināro sparsity
+    pipeline = sk.make_pipeline(
+        sk.StandardScaler(with_mean=False),  # saglabā bināro sparsity
         base
     )
 
-    model = OneVsRestClassifier(pipeline)
+    _check_mode(mode)
+    model = sk.OneVsRestClassifier(pipeline)
     return model
 
-def build_random_forest():
+def build_random_forest(mode="ovr", **params):
     # Izveido RandomForest modeli
     # Darbojas labi ar nelineārām sakarībām
     # Nav nepieciešama skalēšana
     # Paralēlizējams (n_jobs=-1)
+    # native režīmā viens mežs apstrādā visu multi-label Y (koki ar vairākiem izvadiem)
+    # params — RandomForestClassifier parametri, kas aizstāj noklusējumus
+
+    _check_mode(mode)
 
-    base = RandomForestClassifier(
+    sk = backend("sklearn")
+    base_params = dict(
         n_estimators=100,
         random_state=42,
         n_jobs=-1,
     )
-    model = OneVsRestClassifier(base)
+    base_params.update(params)
+    base = sk.RandomForestClassifier(**base_params)
+    if mode == "native":
+        return base
+    model = sk.OneVsRestClassifier(base)
     return model
 
-def build_xgboost_like():
+def build_xgboost_like(mode="ovr", **params):
     # Izveido XGBoost vai fallback GradientBoosting modeli
+    # native režīmā XGBoost izmanto multi-output kokus (viens booster visiem skaitļiem)
+    # GradientBoosting fallback neatbalsta multi-label, tāpēc tas vienmēr ir OneVsRest
+    # params — XGBClassifier parametri, kas aizstāj noklusējumus; fallback modelim tiek nodoti tikai
+    # tie, kurus GradientBoosting atbalsta (n_estimators, learning_rate, max_depth, subsample)
 
-    if HAS_XGB:
-        # Pilnais XGBoost (ja instalēts)
-        base = XGBClassifier(
-            objective="binary:logistic",
-            eval_metric="logloss",
-            n_estimators=100,
-            learning_rate=0.1,
-            max_depth=3,
-            subsample=0.8,
-            colsample_bytree=0.8,
-            random_state=42,
-            n_jobs=-1,
+    _check_mode(mode)
+
+    sk = backend("sklearn")
+    xgb = backend("xgboost")
+
+    base_params = dict(
+        objective="binary:logistic",
+        eval_metric="logloss",
+        n_estimators=100,
+        learning_rate=0.1,
+        max_depth=3,
+        subsample=0.8,
+        colsample_bytree=0.8,
+        random_state=42,
+        n_jobs=-1,
+    )
+    base_params.update(params)
+
+    if xgb is not None and mode == "native":
+        return xgb.XGBClassifier(
+            tree_method="hist",
+            multi_strategy="multi_output_tree",
+            base_score=0.5,     # fiksēts, jo automātiskais novērtējums nedarbojas skaitlim, kas nekad nav izlozēts
+            **base_params,
         )
-        model = OneVsRestClassifier(base)
+
+    if xgb is not None:
+        # Pilnais XGBoost (ja instalēts)
+        base = xgb.XGBClassifier(**base_params)
+        model = sk.OneVsRestClassifier(base)
     else:
         # # Fallback: vienkāršots boosting
-        base = GradientBoostingClassifier(random_state=42)
-        model = OneVsRestClassifier(base)
+        base = sk.GradientBoostingClassifier(random_state=42)
+        base.set_params(**{k: v for k, v in params.items() if k in base.get_params()})
+        model = sk.OneVsRestClassifier(base)
 
     return model
 
-def fit_and_predict(model, X_train, Y_train, X_test):
+class IncrementalLogReg:
+    # SGD loģistiskā regresija ar partial_fit atbalstu (walk-forward režīmam)
+    # Pipeline un OneVsRestClassifier neatbalsta partial_fit pēc fit (vai ar konstantu skaitli),
+    # tāpēc scaler un katra skaitļa SGD modelis tiek turēti atsevišķi ar tiem pašiem parametriem
+
+    def __init__(self):
+        pipeline = build_logreg_sgd().estimator
+        self._clone = backend("sklearn").clone
+        self.scaler = self._clone(pipeline.steps[0][1])
+        self._base = pipeline.steps[-1][1]
+        self.estimators_ = []
+
+    def fit(self, X, Y):
+        # Pilna apmācība; skaitlim, kas nekad nav izlozēts, tiek veikts viens partial_fit solis
+        Xs = self.scaler.fit(X).transform(X)
+        self.estimators_ = []
+        for j in range(Y.shape[1]):
+            est = self._clone(self._base)
+            y = Y[:, j]
+            if np.unique(y).size == 2:
+                est.fit(Xs, y)
+            else:
+                est.partial_fit(Xs, y, classes=np.array([0, 1]))
+            self.estimators_.append(est)
+        return self
+
+    def partial_fit(self, X, Y):
+        # Inkrementāls atjauninājums ar jaunajām rindām (scaler statistika tiek papildināta)
+        self.scaler.partial_fit(X)
+        Xs = self.scaler.transform(X)
+        for j, est in enumerate(self.estimators_):
+            est.partial_fit(Xs, Y[:, j])
+        return self
+
+    def predict_proba(self, X):
+        Xs = self.scaler.transform(X)
+        return np.column_stack([est.predict_proba(Xs)[:, 1] for est in self.estimators_])
+
+def _deadline_callback(deadline):
+    # XGBoost callback: aptur apmācību, kad pienācis termiņš (time.time(), kopīgs visiem procesiem)
+    # Klase tiek izveidota tikai pēc xgboost ielādes (slinkā ielāde)
+    from xgboost.callback import TrainingCallback
+
+    class Deadline(TrainingCallback):
+        def after_iteration(self, model, epoch, evals_log):
+            return time.time() >= deadline
+
+    return Deadline()
+
+class _ValidationMonitor:
+    # GradientBoosting (fallback) monitor: validācijas logloss pēc katra raunda un agrīnā apturēšana
+    # Validācijas prognoze tiek atjaunināta inkrementāli (sākums — log-odds no treniņa biežuma, kā init="prior")
+
+    def __init__(self, X_val, y_val, prior, patience, deadline):
+        self.X_val = X_val
+        self.y_val = y_val
+        self.raw = np.full(len(y_val), np.log(prior / (1 - prior)))
+        self.patience = patience
+        self.deadline = deadline
+        self.best = np.inf
+        self.best_round = 0
+
+    def __call__(self, i, est, _locals):
+        self.raw += est.learning_rate * est.estimators_[i, 0].predict(self.X_val)
+        p = np.clip(1 / (1 + np.exp(-self.raw)), 1e-15, 1 - 1e-15)
+        loss = -np.mean(self.y_val * np.log(p) + (1 - self.y_val) * np.log(1 - p))
+        if loss < self.best:
+            self.best, self.best_round = loss, i
+        stop = i - self.best_round >= self.patience
+        return stop or (self.deadline is not None and time.time() >= self.deadline)
+
+class EarlyStoppingBoosting:
+    # Boosting modelis (XGBoost vai GradientBoosting fallback) ar agrīno apturēšanu un laika budžetu:
+    # - pēdējā (hronoloģiski) treniņa rindu daļa validation tiek atdalīta validācijai
+    # - katrs booster trenē līdz max_rounds raundiem, bet apstājas, kad validācijas logloss patience raundos
+    #   neuzlabojas (prognozei abos variantos izmanto labāko raundu)
+    # - deadline (time.time()) — kopīgs termiņš visam eksperimentam; pēc tā katrs atlikušais booster
+    #   trenē tikai vienu raundu, lai prognoze būtu pieejama visiem skaitļiem
+    # Pēc apmācības: rounds_ (raundi katram booster) un budget_exhausted_ (vai termiņš tika sasniegts)
+    # Pārējie parametri (params) ir tie paši, ko build_xgboost_like
+
+    def __init__(self, mode="ovr", validation=0.15, patience=10, max_rounds=500, deadline=None, **params):
+        _check_mode(mode)
+        if not 0 < validation < 1:
+            raise ValueError("Validācijas daļai jābūt starp 0 un 1")
+        if patience < 1 or max_rounds < 1:
+            raise ValueError("Apturēšanas pacietībai un raundu skaitam jābūt pozitīviem")
+        self.mode = mode
+        self.validation = validation
+        self.patience = patience
+        self.max_rounds = max_rounds
+        self.deadline = deadline
+        self.params = params
+        self.estimators_ = []
+        self.rounds_ = []
+        self.budget_exhausted_ = False
+        self.native_ = False
+
+    def get_params(self, deep=True):
+        # Pietiek set_n_jobs un konfigurācijas atslēgai
+        base = build_xgboost_like(mode=self.mode, **self.params).get_params(deep=deep)
+        return dict(base, mode=self.mode, validation=self.validation, patience=self.patience,
+                    max_rounds=self.max_rounds)
+
+    def set_params(self, **params):
+        # n_jobs tiek nodots iekšējiem modeļiem (estimator__n_jobs — kā OneVsRestClassifier)
+        for key, value in params.items():
+            self.params[key.replace("estimator__", "")] = value
+        return self
+
+    def _base(self):
+        # Viens booster ar noklusējuma parametriem no build_xgboost_like un max_rounds raundiem
+        model = build_xgboost_like(mode=self.mode, **self.params)
+        base = model.estimator if hasattr(model, "estimator") else model
+        if backend("xgboost") is None:
+            return base.set_params(n_estimators=self.max_rounds), False
+        return base.set_params(n_estimators=self.max_rounds, early_stopping_rounds=self.patience), True
+
+    def _fit_xgb(self, est, X_fit, y_fit, X_val, y_val):
+        callbacks = [_deadline_callback(self.deadline)] if self.deadline is not None else None
+        est.set_params(callbacks=callbacks)
+        est.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+        # Callback vajadzīgs tikai apmācībai (tas nav pickle-draudzīgs saglabāšanai)
+        # set_params pēc apmācības parametrus nodotu arī booster (multi-output tas sabojā base_score)
+        est.callbacks = None
+        try:
+            return est.best_iteration + 1
+        except AttributeError:
+            # Termiņš apturēja apmācību pirms pirmā validācijas novērtējuma: prognoze izmanto visus raundus
+            return est.get_booster().num_boosted_rounds()
+
+    def _fit_gb(self, est, X_fit, y_fit, X_val, y_val):
+        monitor = _ValidationMonitor(X_val, y_val, float(np.mean(y_fit)), self.patience, self.deadline)
+        est.fit(X_fit, y_fit, monitor=monitor)
+        # Pēc apturēšanas tiek atmesti patience raundi aiz labākā (kā XGBoost prognoze ar best_iteration)
+        rounds = monitor.best_round + 1
+        est.estimators_ = est.estimators_[:rounds]
+        est.train_score_ = est.train_score_[:rounds]
+        for attr in ("oob_improvement_", "oob_scores_"):
+            if hasattr(est, attr):
+                setattr(est, attr, getattr(est, attr)[:rounds])
+        est.n_estimators_ = rounds
+        return rounds
+
+    def fit(self, X, Y):
+        n_val = max(1, int(round(Y.shape[0] * self.validation)))
+        if Y.shape[0] - n_val < 1:
+            raise ValueError("Nepietiek treniņa rindu validācijas daļai")
+        X_fit, X_val = X[:-n_val], X[-n_val:]
+        Y_fit, Y_val = Y[:-n_val], Y[-n_val:]
+
+        base, is_xgb = self._base()
+        clone = backend("sklearn").clone
+        self.estimators_ = []
+        self.rounds_ = []
+        self.native_ = is_xgb and self.mode == "native"
+
+        if self.native_:
+            # Viens multi-output booster visiem skaitļiem (validācija — vidējais logloss)
+            est = clone(base)
+            self.rounds_.append(self._fit_xgb(est, X_fit, Y_fit, X_val, Y_val))
+            self.estimators_.append(est)
+        else:
+            for j in range(Y.shape[1]):
+                y = Y_fit[:, j]
+                if np.unique(y).size < 2:
+                    # Skaitlis treniņa daļā nekad (vai vienmēr) nav izlozēts: konstanta varbūtība, kā OneVsRest
+                    self.estimators_.append(float(y[0]) if len(y) else 0.0)
+                    self.rounds_.append(0)
+                    continue
+                est = clone(base)
+                fit_one = self._fit_xgb if is_xgb else self._fit_gb
+                self.rounds_.append(fit_one(est, X_fit, y, X_val, Y_val[:, j]))
+                self.estimators_.append(est)
+
+        self.budget_exhausted_ = self.deadline is not None and time.time() >= self.deadline
+        return self
+
+    def predict_proba(self, X):
+        if self.native_:
+            return self.estimators_[0].predict_proba(X)
+        n = X.shape[0]
+        return np.column_stack([np.full(n, est) if isinstance(est, float) else est.predict_proba(X)[:, 1]
+                                for est in self.estimators_])
+
+    def training_info(self):
+        # Rezultātu rindas kolonnas: izmantotie raundi (vidēji / min / max pa booster) un budžeta stāvoklis
+        rounds = np.asarray(self.rounds_, dtype=np.float64)
+        return {
+            "rounds": round(float(rounds.mean()), 2) if rounds.size else 0.0,
+            "rounds_min": int(rounds.min()) if rounds.size else 0,
+            "rounds_max": int(rounds.max()) if rounds.size else 0,
+            "budget_exhausted": bool(self.budget_exhausted_),
+        }
+
+# Modeļi, kuriem ir agrīnās apturēšanas režīms (raundu skaits pēc validācijas, laika budžets)
+EARLY_STOPPING_MODELS = ("xgboost",)
+
+# Agrīnās apturēšanas noklusējumi: validācijas daļa, pacietība (raundi bez uzlabojuma) un raundu limits
+EARLY_STOPPING_DEFAULTS = {"validation": 0.15, "patience": 10, "max_rounds": 500}
+
+def build_model(name, mode="ovr", early_stopping: dict = None):
+    # Modelis eksperimentam: MODEL_BUILDERS[name](mode) vai, ja dots early_stopping
+    # ({"validation", "patience", "max_rounds", "deadline"}) un modelis to atbalsta, EarlyStoppingBoosting
+    if early_stopping is not None and name in EARLY_STOPPING_MODELS:
+        return EarlyStoppingBoosting(mode=mode, **early_stopping)
+    return MODEL_BUILDERS[name](mode=mode)
+
+def training_info(model) -> dict:
+    # Papildu kolonnas par apmācību (tikai modeļiem ar agrīno apturēšanu)
+    info = getattr(model, "training_info", None)
+    return info() if info is not None else {}
+
+# Modeļu nosaukumi -> būvēšanas funkcijas (izmanto eksperimenti un worker procesi)
+# Katra funkcija pieņem mode ("ovr" / "native") un pēc izvēles hiperparametrus (**params)
+MODEL_BUILDERS = {
+    "logreg_sgd": build_logreg_sgd,
+    "random_forest": build_random_forest,
+    "xgboost": build_xgboost_like,
+}
+
+def set_n_jobs(model, n_jobs):
+    # Ierobežo modeļa iekšējo paralēlismu (RandomForest / XGBoost n_jobs)
+    # Vajadzīgs, lai vairāki modeļi vienlaikus nepārslogotu procesoru ar n_jobs=-1
+    # Modeļiem bez n_jobs (SGD, GradientBoosting) nekas netiek mainīts
+
+    params = model.get_params()
+    if "estimator__n_jobs" in params:
+        model.set_params(estimator__n_jobs=n_jobs)
+    elif "n_jobs" in params:
+        model.set_params(n_jobs=n_jobs)
+    return model
+
+def fit_and_predict(model, X_train, Y_train, X_test, timer=None):
     # Apmāca modeli un atgriež paredzētās varbūtības (matrica ar izmēru [n_samples, max_num])
-    # OneVsRestClassifier atgriež sarakstu ar (n_samples, 2) — tiek paņemta p(y=1)
+    # Abi režīmi (ovr un native) atgriež vienādas formas matricu
+    # timer (StageTimer) — ja dots, tiek uzskaitīts "fit" un "predict" laiks
 
+    start = time.perf_counter()
     model.fit(X_train, Y_train)
+    fitted = time.perf_counter()
 
-    proba = model.predict_proba(X_test)
+    proba_matrix = predict_proba_matrix(model, X_test)
+    if timer is not None:
+        timer.add("fit", fitted - start)
+        timer.add("predict", time.perf_counter() - fitted)
 
-    # Ja OneVsRest atgriež sarakstu ar (n_samples, 2)
+    return proba_matrix
+
+def predict_proba_matrix(model, X):
+    # Apmācīta modeļa varbūtības [n_samples, max_num] (izmanto arī saglabātie modeļi /predict)
+    proba = model.predict_proba(X)
+
+    # Native multi-output modeļi (piem., RandomForest) atgriež sarakstu ar (n_samples, n_classes)
+    # katram skaitlim — tiek paņemta p(y=1)
     if isinstance(proba, (list, tuple)):
-        probs = [p[:, 1] for p in proba]  # p(y=1)
-        proba_matrix = np.vstack(probs).T
-    else:
-        proba_matrix = proba
+        return _positive_class_proba(model, proba)
+    return proba
+
+def _positive_class_proba(model, proba_list):
+    # Izvelk p(y=1) no katra izvada varbūtībām
+    # Ja skaitlis treniņa datos nekad neparādījās, klase 1 nav zināma -> varbūtība 0
 
-    return proba_matrix
\ No newline at end of file
+    classes = getattr(model, "classes_", None)
+    cols = []
+    for i, p in enumerate(proba_list):
+        cls = list(classes[i]) if classes is not None else [0, 1]
+        cols.append(p[:, cls.index(1)] if 1 in cls else np.zeros(p.shape[0]))
+    return np.vstack(cols).T
\ No newline at end of file
@@ -0,0 +1,109 @@
+from .baseline import NULL_METHODS
+from .features import check_features, DEFAULT_FEATURES, FEATURE_FORMATS
+from .models import MODEL_MODES, EARLY_STOPPING_MODELS, EARLY_STOPPING_DEFAULTS
+
+# Modeļa un features opcijas vienā objektā (run_experiment, run_walk_forward, run_search_from_file, /predict):
+# - visas pārbaudes notiek vienreiz, veidojot objektu (ValueError ar paziņojumu)
+# - rezultātu kešatmiņas un modeļu krātuves atslēgas, rezultātu rindu kolonnas un saglabātā modeļa apraksts
+#   tiek veidoti no šī objekta, nevis no atsevišķiem argumentiem katrā vietā
+# Objekts ir pickle-draudzīgs (tiek nodots fona uzdevumiem un worker procesiem)
+
+
+class ModelOptions:
+    # model_mode — "ovr" (viens modelis katram skaitlim) vai "native" (viens multi-label modelis)
+    # feature_format — "dense" (numpy) vai "sparse" (CSR)
+    # features — X features grupas (FEATURE_SETS; None = DEFAULT_FEATURES)
+    # early_stopping — boosting modeļi (EARLY_STOPPING_MODELS) ar validāciju un agrīno apturēšanu
+    # time_budget — sekundes visam eksperimentam (tikai ar early_stopping; None = bez budžeta)
+    # null_sims, null_seed, null_method — Monte Carlo nulles sadalījums (0 = izslēgts)
+
+    def __init__(self, model_mode: str = "ovr", feature_format: str = "dense", features=None,
+                 early_stopping: bool = False, time_budget: float = None, null_sims: int = 0,
+                 null_seed: int = 42, null_method: str = "shuffle"):
+        if model_mode not in MODEL_MODES:
+            raise ValueError(f"Nezināms modeļa režīms: {model_mode}")
+        if feature_format not in FEATURE_FORMATS:
+            raise ValueError(f"Nezināms features formāts: {feature_format}")
+        if time_budget is not None and not early_stopping:
+            raise ValueError("Laika budžets darbojas tikai ar agrīno apturēšanu")
+        if time_budget is not None and time_budget <= 0:
+            raise ValueError("Laika budžetam jābūt pozitīvam")
+        if null_sims < 0:
+            raise ValueError("Simulāciju skaitam jābūt nenegatīvam")
+        if null_sims and null_method not in NULL_METHODS:
+            raise ValueError(f"Nezināma nulles sadalījuma metode: {null_method}")
+
+        self.model_mode = model_mode
+        self.feature_format = feature_format
+        self.features = check_features(features)
+        self.early_stopping = bool(early_stopping)
+        self.time_budget = None if time_budget is None else float(time_budget)
+        self.null_sims = int(null_sims)
+        self.null_seed = int(null_seed)
+        self.null_method = null_method
+
+    def as_dict(self) -> dict:
+        return {
+            "model_mode": self.model_mode,
+            "feature_format": self.feature_format,
+            "features": self.features,
+            "early_stopping": self.early_stopping,
+            "time_budget": self.time_budget,
+            "null_sims": self.null_sims,
+            "null_seed": self.null_seed,
+            "null_method": self.null_method,
+        }
+
+    def replace(self, **changes) -> "ModelOptions":
+        # Jauns objekts ar mainītām opcijām (piem., katras API konfigurācijas features)
+        return ModelOptions(**dict(self.as_dict(), **changes))
+
+    def __eq__(self, other):
+        return isinstance(other, ModelOptions) and self.as_dict() == other.as_dict()
+
+    def __repr__(self):
+        return f"ModelOptions({', '.join(f'{k}={v!r}' for k, v in self.as_dict().items())})"
+
+    @property
+    def sparse(self) -> bool:
+        return self.feature_format == "sparse"
+
+    def early_stopping_params(self, deadline: float = None):
+        # build_model parametri boosting modeļiem (None — bez agrīnās apturēšanas)
+        return dict(EARLY_STOPPING_DEFAULTS, deadline=deadline) if self.early_stopping else None
+
+    def model_config(self, model_names) -> dict:
+        # Opcijas, kas maina apmācīto modeli (modeļu krātuves atslēgai; model_mode ir modeļa parametros)
+        # Tiek iekļautas tikai vērtības, kas atšķiras no noklusējuma, lai atslēgas bez tām nemainās
+        config = {}
+        if self.feature_format != "dense":
+            # SGD ar CSR ievadi izmanto citu brīvā locekļa soli, tāpēc rezultāti nedaudz atšķiras
+            config["feature_format"] = self.feature_format
+        if self.features != DEFAULT_FEATURES:
+            config["features"] = list(self.features)
+        if self.early_stopping and any(name in EARLY_STOPPING_MODELS for name in model_names):
+            config["early_stopping"] = dict(EARLY_STOPPING_DEFAULTS)
+        return config
+
+    def result_config(self, model_names) -> dict:
+        # Opcijas, kas maina rezultātu rindas (rezultātu kešatmiņas atslēgai): modeļa opcijas un nulles sadalījums
+        config = self.model_config(model_names)
+        if self.null_sims:
+            config["null"] = {"sims": self.null_sims, "seed": self.null_seed, "method": self.null_method}
+        return config
+
+    def columns(self) -> dict:
+        # Rezultātu rindas kolonnas (tās pašas eksperimentā, backtestā un meklēšanā)
+        return {
+            "model_mode": self.model_mode,
+            "feature_format": self.feature_format,
+            "features": "+".join(self.features),
+        }
+
+    def describe(self) -> dict:
+        # Saglabātā modeļa apraksts (/predict atbildei)
+        return {
+            "model_mode": self.model_mode,
+            "feature_format": self.feature_format,
+            "features": list(self.features),
+        }
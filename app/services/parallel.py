@@ -0,0 +1,177 @@
+import os
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# threadpoolctl nāk kopā ar scikit-learn; ierobežo BLAS/OpenMP pavedienus worker procesā
+from threadpoolctl import threadpool_limits
+
+from .models import build_model, set_n_jobs, fit_and_predict, training_info
+from .instrumentation import StageTimer
+
+# Paralēla modeļu apmācība:
+# - X_train, Y_train un X_test tiek ielikti koplietojamā atmiņā vienu reizi
+#   (worker procesi tos tikai pievieno, nevis saņem pickle kopiju)
+# - kopējais kodolu budžets tiek sadalīts starp modeļiem, lai RF un XGB ar n_jobs=-1
+#   nepārslogotu mašīnu
+# - CSR matricas (sparse features) tiek koplietotas kā trīs masīvi (data, indices, indptr)
+
+# CSR sastāvdaļas, kas tiek ieliktas koplietojamā atmiņā
+CSR_PARTS = ("data", "indices", "indptr")
+
+
+def _share_one(arr, handles):
+    arr = np.ascontiguousarray(arr)
+    shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+    handles.append(shm)
+    np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)[...] = arr
+    return shm.name, arr.shape, arr.dtype.str
+
+
+def share_arrays(arrays: dict):
+    # Nokopē masīvus koplietojamā atmiņā
+    # Atgriež (shm objektu saraksts, specifikācijas {nosaukums: (shm_name, shape, dtype)})
+    # CSR matricai specifikācija ir ("csr", shape, {daļa: (shm_name, shape, dtype)})
+    # Izsaucējam pēc darba jāizsauc release_shared(handles)
+
+    handles = []
+    specs = {}
+    try:
+        for key, arr in arrays.items():
+            if getattr(arr, "format", None) == "csr":
+                parts = {part: _share_one(getattr(arr, part), handles) for part in CSR_PARTS}
+                specs[key] = ("csr", arr.shape, parts)
+            else:
+                specs[key] = _share_one(arr, handles)
+    except Exception:
+        release_shared(handles)
+        raise
+    return handles, specs
+
+
+def _attach_one(spec, handles):
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    handles.append(shm)
+    arr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    arr.flags.writeable = False
+    return arr
+
+
+def attach_arrays(specs: dict):
+    # Pievienojas koplietojamai atmiņai worker procesā (bez kopēšanas, tikai lasīšanai)
+    # Atgriež (shm objektu saraksts, {nosaukums: ndarray})
+
+    handles = []
+    arrays = {}
+    for key, spec in specs.items():
+        if spec[0] == "csr":
+            from scipy import sparse as sp
+
+            _, shape, parts = spec
+            data, indices, indptr = (_attach_one(parts[part], handles) for part in CSR_PARTS)
+            arrays[key] = sp.csr_matrix((data, indices, indptr), shape=shape, copy=False)
+        else:
+            arrays[key] = _attach_one(spec, handles)
+    return handles, arrays
+
+
+def release_shared(handles, unlink: bool = True):
+    # Atbrīvo koplietojamo atmiņu (unlink tikai procesā, kas to izveidoja)
+    for shm in handles:
+        shm.close()
+        if unlink:
+            try:
+                shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def split_core_budget(model_names, core_budget: int = None):
+    # Sadala kodolu budžetu starp modeļiem
+    # SGD logistiskā regresija ir vienpavediena, tai pietiek ar 1 kodolu;
+    # pārējie modeļi sadala atlikušos kodolus vienādi
+    # Ja budžets ir mazāks par modeļu skaitu, katram modelim ir 1 kodols un vienlaikus tiek apmācīti
+    # tikai budget modeļi (skat. core_budget_workers), pārējie — pēc kārtas
+
+    budget = core_budget or os.cpu_count() or 1
+    if budget < len(model_names):
+        return {n: 1 for n in model_names}
+    single = [n for n in model_names if n == "logreg_sgd"]
+    multi = [n for n in model_names if n not in single]
+
+    shares = {n: 1 for n in single}
+    rest = budget - len(single)
+    for i, name in enumerate(multi):
+        # Atlikumu no dalīšanas atdod pirmajiem modeļiem
+        shares[name] = rest // len(multi) + (1 if i < rest % len(multi) else 0)
+    return shares
+
+
+def core_budget_workers(model_names, core_budget: int = None) -> int:
+    # Vienlaikus apmācāmo modeļu (worker procesu) skaits, lai kopā netiktu pārsniegts kodolu budžets
+    budget = core_budget or os.cpu_count() or 1
+    return max(1, min(len(model_names), budget))
+
+
+def _fit_worker(name, n_jobs, specs, mode, model_store=None, persist=None, early_stopping=None):
+    # Izpildās worker procesā: pievienojas datiem, apmāca vienu modeli un atgriež varbūtības, fit/predict laiku
+    # un training_info (raundi agrīnās apturēšanas režīmā)
+    # persist — (atslēga, x_next, apraksts): apmācītais modelis tiek saglabāts model_store (posms "model_save")
+
+    handles, arrays = attach_arrays(specs)
+    timer = StageTimer()
+    try:
+        with threadpool_limits(limits=n_jobs):
+            model = set_n_jobs(build_model(name, mode=mode, early_stopping=early_stopping), n_jobs)
+            proba = fit_and_predict(model, arrays["X_train"], arrays["Y_train"], arrays["X_test"], timer=timer)
+        if persist is not None:
+            key, x_next, meta = persist
+            with timer.stage("model_save"):
+                model_store.put(key, model, x_next, meta)
+        return name, np.asarray(proba), timer.timings, training_info(model)
+    finally:
+        # Masīvi jāatlaiž pirms shm aizvēršanas
+        arrays.clear()
+        release_shared(handles, unlink=False)
+
+
+def fit_models_parallel(model_names, X_train, Y_train, X_test, core_budget: int = None, progress=None,
+                        mode: str = "ovr", timings: dict = None, model_store=None, persist: dict = None,
+                        early_stopping: dict = None, info: dict = None):
+    # Apmāca modeļus vienlaikus atsevišķos procesos (ne vairāk par kodolu budžetu, pārējie gaida rindā)
+    # mode tiek nodots modeļu būvēšanas funkcijām ("ovr" / "native")
+    # timings — ja dots, tajā tiek ierakstīts {modelis: {"fit": s, "predict": s}} no worker procesiem
+    # persist — {modelis: (atslēga, x_next, apraksts)}; šie modeļi tiek saglabāti model_store worker procesā
+    # early_stopping — build_model parametri (boosting ar validāciju un termiņu); info — {modelis: training_info}
+    # Atgriež {modeļa nosaukums: proba [n_test, max_num]}
+
+    shares = split_core_budget(model_names, core_budget)
+    handles, specs = share_arrays({"X_train": X_train, "Y_train": Y_train, "X_test": X_test})
+
+    workers = core_budget_workers(model_names, core_budget)
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"))
+    try:
+        futures = []
+        for name in model_names:
+            if progress is not None:
+                progress(name, "running")
+            futures.append(executor.submit(_fit_worker, name, shares[name], specs, mode, model_store,
+                                           (persist or {}).get(name), early_stopping))
+
+        probas = {}
+        for future in as_completed(futures):
+            name, proba, model_timings, model_info = future.result()
+            probas[name] = proba
+            if timings is not None:
+                timings[name] = model_timings
+            if info is not None:
+                info[name] = model_info
+            if progress is not None:
+                progress(name, "done")
+        return probas
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        release_shared(handles)
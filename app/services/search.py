@@ -0,0 +1,304 @@
+import itertools
+import json
+import math
+import multiprocessing as mp
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+
+import numpy as np
+
+# threadpoolctl nāk kopā ar scikit-learn; ierobežo BLAS/OpenMP pavedienus worker procesā
+from threadpoolctl import threadpool_limits
+
+from .models import MODEL_BUILDERS, set_n_jobs, fit_and_predict
+from .metrics import evaluate
+from .parallel import share_arrays, attach_arrays, release_shared
+from .features import build_lagged_features
+from .instrumentation import StageTimer
+from .ingest import DEFAULT_CHUNK_ROWS
+from .experiment import LOTTERY_K_MAIN, LEARNED_MODELS, load_draws
+from .options import ModelOptions
+
+# Hiperparametru meklēšana ar laika rindu krustenisko validāciju:
+# - expanding window fold: katrs fold trenē uz visām izlozēm līdz robežai un testē uz nākamo bloku,
+#   tāpēc nākotnes izlozes nekad nenonāk treniņā
+# - "grid": katrs kandidāts tiek novērtēts uz visiem fold
+# - "halving" (successive halving): visi kandidāti sāk ar lētāko fold (mazākais treniņa apjoms),
+#   katrā kārtā tālāk tiek tikai labākā 1/eta daļa (katra modeļa ietvaros), un tai tiek pievienoti vēlākie fold
+# - X/Y tiek aprēķināti vienreiz un ielikti koplietojamā atmiņā; worker procesi tiem pievienojas startējot
+# - time_budget: pēc šī laika jauni uzdevumi netiek sākti, nepabeigtie kandidāti tiek atzīmēti "budget"
+# - rezultāts ir leaderboard ar tām pašām metrikām kā eksperimentos (logloss, Brier, hit@K_main, hit@10)
+
+SEARCH_STRATEGIES = ("grid", "halving")
+
+# Metrikas kandidātu salīdzināšanai: True — jo lielāka vērtība, jo labāk
+SEARCH_METRICS = {"logloss": False, "brier": False, "hit_k_main": True, "hit_10": True}
+
+# Noklusējuma meklēšanas telpas (parametri tiek nodoti MODEL_BUILDERS[modelis](mode, **params))
+SEARCH_SPACES = {
+    "logreg_sgd": {
+        "alpha": [0.0001, 0.0005, 0.001, 0.005],
+        "eta0": [0.001, 0.01, 0.05],
+    },
+    "random_forest": {
+        "n_estimators": [50, 100, 200],
+        "max_depth": [None, 8],
+        "min_samples_leaf": [1, 5],
+    },
+    "xgboost": {
+        "n_estimators": [50, 100],
+        "max_depth": [2, 3, 5],
+        "learning_rate": [0.05, 0.1],
+    },
+}
+
+# Kandidātu stāvokļi leaderboard tabulā
+COMPLETE = "complete"
+PRUNED = "pruned"
+BUDGET = "budget"
+
+
+def expanding_folds(n: int, n_folds: int = 4, min_train_ratio: float = 0.5):
+    # Atgriež [(train_end, test_end), ...]: treniņš rindas [0, train_end), tests [train_end, test_end)
+    # Pirmais fold trenē uz vecākajām min_train_ratio rindām, atlikums tiek sadalīts n_folds testa blokos
+
+    if n_folds < 1:
+        raise ValueError("Fold skaitam jābūt vismaz 1")
+    if not 0 < min_train_ratio < 1:
+        raise ValueError("Minimālajai treniņa daļai jābūt starp 0 un 1")
+
+    start = int(n * min_train_ratio)
+    bounds = np.linspace(start, n, n_folds + 1).astype(int)
+    folds = [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:])]
+    if start < 10 or any(b <= a for a, b in folds):
+        raise ValueError("Nepietiek datu krusteniskajai validācijai (samaziniet fold skaitu)")
+    return folds
+
+
+def grid_candidates(model_names, spaces: dict = None):
+    # Visas parametru kombinācijas katram modelim: [{"model": ..., "params": {...}}, ...]
+    # Modelis bez meklēšanas telpas tiek novērtēts ar noklusējuma parametriem (viens kandidāts)
+
+    spaces = SEARCH_SPACES if spaces is None else spaces
+    candidates = []
+    for name in model_names:
+        if name not in MODEL_BUILDERS:
+            raise ValueError(f"Nezināms modelis: {name}")
+        space = spaces.get(name, {})
+        keys = sorted(space)
+        for values in itertools.product(*(space[k] for k in keys)):
+            candidates.append({"model": name, "params": dict(zip(keys, values))})
+    return candidates
+
+
+def halving_schedule(n_folds: int, eta: int = 3):
+    # Fold skaits katrā successive halving kārtā: 1, eta, eta^2, ... un visbeidzot visi fold
+    schedule = []
+    folds = 1
+    while folds < n_folds:
+        schedule.append(folds)
+        folds *= eta
+    schedule.append(n_folds)
+    return schedule
+
+
+# Worker procesa koplietojamie masīvi (pievienoti vienreiz _init_worker)
+_SHARED = {}
+
+
+def _init_worker(specs):
+    handles, arrays = attach_arrays(specs)
+    _SHARED.update(arrays)
+    # shm objektiem jādzīvo tikpat ilgi kā worker procesam
+    _SHARED["_handles"] = handles
+
+
+def _eval_fold(name, params, mode, n_jobs, fold, ks):
+    # Izpildās worker procesā: apmāca vienu kandidātu uz viena fold treniņa daļas un novērtē testa daļu
+    X, Y = _SHARED["X"], _SHARED["Y"]
+    train_end, test_end = fold
+    timer = StageTimer()
+    with threadpool_limits(limits=n_jobs):
+        model = set_n_jobs(MODEL_BUILDERS[name](mode=mode, **params), n_jobs)
+        proba = fit_and_predict(model, X[:train_end], Y[:train_end], X[train_end:test_end], timer=timer)
+    with timer.stage("metrics"):
+        scores = evaluate(Y[train_end:test_end], proba, ks=ks)
+    return scores, timer.timings
+
+
+def _mean_scores(candidate, k_main, n_eval=None):
+    # Vidējās metrikas pa pirmajiem n_eval fold (visi novērtētie, ja None)
+    fold_ids = sorted(candidate["folds"])[:n_eval]
+    scores = [candidate["folds"][f] for f in fold_ids]
+    return {
+        "logloss": float(np.mean([s["logloss"] for s in scores])),
+        "brier": float(np.mean([s["brier"] for s in scores])),
+        "hit_k_main": float(np.mean([s["hit_at"][k_main] for s in scores])),
+        "hit_10": float(np.mean([s["hit_at"][10] for s in scores])),
+    }
+
+
+def _sort_key(metric):
+    higher_is_better = SEARCH_METRICS[metric]
+    return lambda value: -value if higher_is_better else value
+
+
+def run_search(X, Y, k_main: int, model_names=None, strategy: str = "halving", spaces: dict = None,
+               metric: str = "logloss", n_folds: int = 4, min_train_ratio: float = 0.5, eta: int = 3,
+               time_budget: float = None, workers: int = None, core_budget: int = None,
+               model_mode: str = "ovr", progress=None):
+    # Meklē labākos hiperparametrus katram modelim (X, Y — lagged features visai vēsturei)
+    # strategy — "grid" vai "halving"; metric — salīdzināšanas metrika (SEARCH_METRICS)
+    # spaces — {modelis: {parametrs: [vērtības]}} (None = SEARCH_SPACES)
+    # workers — paralēlo worker procesu skaits; core_budget tiek sadalīts starp tiem (n_jobs katram modelim)
+    # progress(modelis, stāvoklis) — neobligāts callback fona uzdevumiem
+    # Atgriež leaderboard (rindas sakārtotas: vairāk novērtētu fold, tad labāka metrika)
+
+    if strategy not in SEARCH_STRATEGIES:
+        raise ValueError(f"Nezināma meklēšanas stratēģija: {strategy}")
+    if metric not in SEARCH_METRICS:
+        raise ValueError(f"Nezināma salīdzināšanas metrika: {metric}")
+    if eta < 2:
+        raise ValueError("Successive halving koeficientam eta jābūt vismaz 2")
+
+    model_names = list(model_names or LEARNED_MODELS)
+    folds = expanding_folds(len(Y), n_folds, min_train_ratio)
+    candidates = grid_candidates(model_names, spaces)
+    for i, candidate in enumerate(candidates):
+        candidate.update(id=i, folds={}, timings=StageTimer(), status=None, rung=0)
+
+    schedule = [n_folds] if strategy == "grid" else halving_schedule(n_folds, eta)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(candidates)))
+    n_jobs = max(1, (core_budget or os.cpu_count() or 1) // workers)
+    ks = (k_main, 10)
+    key = _sort_key(metric)
+
+    start = time.perf_counter()
+    deadline = None if time_budget is None else start + time_budget
+    if progress is not None:
+        for name in model_names:
+            progress(name, "running")
+
+    handles, specs = share_arrays({"X": X, "Y": Y})
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"),
+                                   initializer=_init_worker, initargs=(specs,))
+    try:
+        alive = candidates
+        for rung, n_eval in enumerate(schedule):
+            tasks = deque((c, f) for c in alive for f in range(n_eval) if f not in c["folds"])
+            running = {}
+            while tasks or running:
+                # Rindā tiek turēts nedaudz vairāk uzdevumu nekā worker, lai budžeta pārbaude būtu precīza
+                while tasks and len(running) < 2 * workers:
+                    if deadline is not None and time.perf_counter() >= deadline:
+                        tasks.clear()
+                        break
+                    c, f = tasks.popleft()
+                    future = executor.submit(_eval_fold, c["model"], c["params"], model_mode, n_jobs, folds[f], ks)
+                    running[future] = (c, f)
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    c, f = running.pop(future)
+                    scores, timings = future.result()
+                    c["folds"][f] = scores
+                    for stage, seconds in timings.items():
+                        c["timings"].add(stage, seconds)
+                    c["rung"] = rung
+                    if progress is not None:
+                        # Ļauj atcelt uzdevumu starp novērtējumiem
+                        progress(c["model"], "running")
+
+            complete = [c for c in alive if len(c["folds"]) >= n_eval]
+            for c in alive:
+                if len(c["folds"]) < n_eval:
+                    c["status"] = BUDGET
+
+            if rung == len(schedule) - 1 or len(complete) < len(alive):
+                # Pēdējā kārta vai budžets beidzies — pārējās kārtas netiek sāktas
+                for c in complete:
+                    c["status"] = COMPLETE if len(c["folds"]) == n_folds else BUDGET
+                break
+
+            # Successive halving: katra modeļa ietvaros tālāk tiek labākā 1/eta daļa
+            alive = []
+            for name in model_names:
+                group = [c for c in complete if c["model"] == name]
+                group.sort(key=lambda c: key(_mean_scores(c, k_main, n_eval)[metric]))
+                keep = max(1, math.ceil(len(group) / eta))
+                alive.extend(group[:keep])
+                for c in group[keep:]:
+                    c["status"] = PRUNED
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        release_shared(handles)
+
+    if progress is not None:
+        for name in model_names:
+            progress(name, "done")
+
+    elapsed = time.perf_counter() - start
+    evaluated = [c for c in candidates if c["folds"]]
+    evaluated.sort(key=lambda c: (-len(c["folds"]), key(_mean_scores(c, k_main)[metric])))
+
+    leaderboard = []
+    for rank, c in enumerate(evaluated, start=1):
+        row = {
+            "rank": rank,
+            "model": c["model"],
+            "params": json.dumps(c["params"], sort_keys=True),
+            "status": c["status"],
+            "folds": len(c["folds"]),
+            "rung": c["rung"],
+        }
+        row.update(_mean_scores(c, k_main))
+        row.update({
+            "k_main": int(k_main),
+            "strategy": strategy,
+            "metric": metric,
+            "n_folds": int(n_folds),
+            "model_mode": model_mode,
+            "search_seconds": round(elapsed, 4),
+        })
+        row.update(c["timings"].columns())
+        leaderboard.append(row)
+    return leaderboard
+
+
+def run_search_from_file(path: Path, lottery: str, file_format: str, window: int = 1,
+                         window_mode: str = "concat", progress=None, dataset_store=None,
+                         dataset_key: str = None, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                         timings: dict = None, model_options: ModelOptions = None, **options):
+    # Pilna meklēšanas plūsma no faila (fona uzdevumam): nolasīšana -> features vienreiz -> run_search
+    # model_options — ModelOptions (kā run_experiment): model_mode, feature_format ("sparse" — CSR X koplietojamā
+    #   atmiņā kā data/indices/indptr) un features; agrīnā apturēšana un nulles sadalījums netiek atbalstīti
+    # options tiek nodoti run_search (strategy, metric, n_folds, time_budget, model_names, ...)
+    # Atgriež (leaderboard, info)
+
+    if lottery not in LOTTERY_K_MAIN:
+        raise ValueError("Nezināms loterijas tips eksperimentam")
+    opts = model_options if model_options is not None else ModelOptions()
+    if opts.early_stopping or opts.null_sims:
+        raise ValueError("Agrīnā apturēšana un nulles sadalījums darbojas tikai 70/30 eksperimentā")
+
+    timer = StageTimer(timings)
+    _, (dates, draws), cache_state = load_draws(path, lottery, file_format, dataset_store=dataset_store,
+                                                dataset_key=dataset_key, chunk_rows=chunk_rows, timer=timer)
+    with timer.stage("features"):
+        X, Y = build_lagged_features(draws, window=window, mode=window_mode, sparse=opts.sparse,
+                                     features=opts.features)
+
+    leaderboard = run_search(X, Y, k_main=LOTTERY_K_MAIN[lottery], model_mode=opts.model_mode, progress=progress,
+                             **options)
+    for row in leaderboard:
+        row.update({"lottery": lottery, "window": int(window), "window_mode": window_mode})
+        row.update(opts.columns())
+        row.update(timer.columns())
+
+    info = {"dataset_key": dataset_key, "dataset_cache": cache_state}
+    return leaderboard, info
@@ -0,0 +1,501 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Satura adresēta datu kopu krātuve (content-addressed store)
+# Atslēga = hash(faila baiti) + loterija + faila formāts
+# Katrs ieraksts ir viens .npz fails ar normalizēto tabulu un izložu one-hot matricu,
+# tāpēc atkārtota tā paša faila augšupielāde izlaiž Excel nolasīšanu un normalizāciju
+#
+# Diska izmērs ir ierobežots: vecākie (pēc pēdējās piekļuves) ieraksti tiek dzēsti (LRU)
+
+# Formāta versija: mainot kodēšanu, vecie ieraksti vienkārši netiek atrasti
+STORE_VERSION = 1
+
+
+def dataset_key(data: bytes, lottery: str, file_format: str) -> str:
+    # Aprēķina ieraksta atslēgu no faila satura un parametriem
+    return finish_key(hashlib.sha256(data), lottery, file_format)
+
+
+def file_key(path: Path, lottery: str, file_format: str) -> str:
+    # Tas pats, kas dataset_key, bet nolasa failu pa daļām (neielādējot visu atmiņā)
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return finish_key(h, lottery, file_format)
+
+
+def finish_key(h, lottery: str, file_format: str) -> str:
+    # Pabeidz atslēgu no SHA-256 objekta, kas jau satur faila baitus (piem., no ingest.save_upload)
+    h.update(f"|{lottery}|{file_format}|v{STORE_VERSION}".encode("utf-8"))
+    return h.hexdigest()
+
+
+def _encode_frame(df: pd.DataFrame):
+    # Pārvērš DataFrame kolonnas numpy masīvos, kurus var saglabāt npz bez pickle
+    # Katrai kolonnai tiek saglabāts arī tips, lai atjaunotu precīzi to pašu dtype
+
+    arrays = {}
+    columns = []
+    for i, c in enumerate(df.columns):
+        col = df[c]
+        key = f"col{i}"
+        if isinstance(col.dtype, pd.Int64Dtype):
+            kind = "Int64"
+            arrays[key] = col.to_numpy(dtype=np.int64, na_value=0)
+            arrays[key + "_mask"] = col.isna().to_numpy()
+        elif col.dtype == object:
+            if col.isna().all():
+                kind = "none"
+            else:
+                kind = "str"
+                arrays[key] = col.astype(str).to_numpy(dtype=str)
+        else:
+            kind = "numpy"
+            arrays[key] = col.to_numpy()
+        columns.append({"name": str(c), "kind": kind})
+    return arrays, columns
+
+
+def _decode_frame(data, columns, n_rows: int) -> pd.DataFrame:
+    out = {}
+    for i, meta in enumerate(columns):
+        key = f"col{i}"
+        kind = meta["kind"]
+        if kind == "Int64":
+            out[meta["name"]] = pd.arrays.IntegerArray(data[key], data[key + "_mask"])
+        elif kind == "none":
+            out[meta["name"]] = pd.Series([None] * n_rows, dtype=object)
+        elif kind == "str":
+            out[meta["name"]] = pd.Series(data[key].astype(object))
+        else:
+            out[meta["name"]] = data[key]
+    return pd.DataFrame(out, columns=[m["name"] for m in columns])
+
+
+class DatasetStore:
+    # Diska krātuve normalizētām datu kopām ar izmēra limitu un LRU dzēšanu
+    # Objekts ir pickle-draudzīgs (worker procesi saņem tikai ceļu un limitu)
+
+    def __init__(self, root: Path, max_bytes: int = 512 * 1024 * 1024):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {"root": self.root, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state["root"], state["max_bytes"])
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.npz"
+
+    def contains(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def get(self, key: str):
+        # Atgriež (df_norm, dates, draws) vai None, ja ieraksta nav
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                columns = json.loads(str(data["__columns__"]))
+                n_rows = int(data["__rows__"])
+                df_norm = _decode_frame(data, columns, n_rows)
+                dates = pd.Series(data["__dates__"])
+                draws = np.ascontiguousarray(data["__draws__"])
+        except (FileNotFoundError, KeyError, ValueError, OSError):
+            return None
+
+        # Atzīmē piekļuvi LRU vajadzībām
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return df_norm, dates, draws
+
+    def put(self, key: str, df_norm: pd.DataFrame, dates: pd.Series, draws: np.ndarray):
+        # Saglabā ierakstu (vispirms pagaidu failā, tad atomāri pārdēvē)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        arrays, columns = _encode_frame(df_norm)
+        arrays["__columns__"] = np.array(json.dumps(columns))
+        arrays["__rows__"] = np.array(len(df_norm))
+        arrays["__dates__"] = pd.to_datetime(dates).to_numpy()
+        arrays["__draws__"] = draws
+
+        tmp = self.root / f".{key}.{uuid.uuid4().hex}.tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, self._path(key))
+
+        self.evict()
+
+    def evict(self):
+        # Dzēš vecākos ierakstus, līdz kopējais izmērs ir zem limita
+        entries = []
+        for p in self.root.glob("*.npz"):
+            if p.name.startswith("."):
+                continue
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def record(self, hit: bool):
+        # Skaita trāpījumus/netrāpījumus (galvenajā procesā, pēc worker atbildes)
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def clear(self):
+        for p in self.root.glob("*.npz"):
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        files = [p for p in self.root.glob("*.npz") if not p.name.startswith(".")] if self.root.exists() else []
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(files),
+            "bytes": sum(p.stat().st_size for p in files if p.exists()),
+            "max_bytes": self.max_bytes,
+        }
+
+
+def array_fingerprint(*arrays) -> str:
+    # Ātrs satura nospiedums no vairākiem numpy masīviem (forma, dtype un baiti)
+    h = hashlib.sha256()
+    for arr in arrays:
+        arr = np.ascontiguousarray(arr)
+        h.update(f"{arr.shape}|{arr.dtype.str}|".encode("utf-8"))
+        h.update(arr.view(np.uint8).reshape(-1).data if arr.size else b"")
+    return h.hexdigest()
+
+
+def config_key(dataset_fp: str, config: dict) -> str:
+    # Atslēga eksperimenta rezultātiem: datu nospiedums + pilna konfigurācija
+    # Objektiem (piem., iekšējiem estimatoriem) tiek izmantots repr, kas sklearn gadījumā ir deterministisks
+    payload = json.dumps(config, sort_keys=True, default=repr)
+    h = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    # Datu nospiedums ir faila nosaukuma sākumā, lai varētu invalidēt visus vienas datu kopas rezultātus
+    return f"{dataset_fp[:32]}_{h[:32]}"
+
+
+class ResultCache:
+    # Eksperimentu rezultātu kešatmiņa diskā
+    # Katrs ieraksts: <atslēga>.json (metrikas) un pēc izvēles <atslēga>.npz (varbūtību matricas)
+    # Ierakstu skaits ir ierobežots, vecākie pēc pēdējās piekļuves tiek dzēsti (LRU)
+
+    def __init__(self, root: Path, max_entries: int = 1000, store_proba: bool = False):
+        self.root = Path(root)
+        self.max_entries = max_entries
+        self.store_proba = store_proba
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {"root": self.root, "max_entries": self.max_entries, "store_proba": self.store_proba}
+
+    def __setstate__(self, state):
+        self.__init__(state["root"], state["max_entries"], state["store_proba"])
+
+    def get(self, key: str, with_proba: bool = False):
+        # Atgriež (results, probas vai None) vai None, ja ieraksta nav
+        path = self.root / f"{key}.json"
+        try:
+            results = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+
+        probas = None
+        if with_proba:
+            try:
+                with np.load(self.root / f"{key}.npz", allow_pickle=False) as data:
+                    probas = {name: data[name] for name in data.files}
+            except (FileNotFoundError, OSError, ValueError):
+                probas = None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return results, probas
+
+    def put(self, key: str, results, probas: dict = None):
+        self.root.mkdir(parents=True, exist_ok=True)
+        suffix = uuid.uuid4().hex
+
+        if self.store_proba and probas:
+            tmp = self.root / f".{key}.{suffix}.tmp.npz"
+            np.savez(tmp, **{name: np.asarray(p, dtype=np.float32) for name, p in probas.items()})
+            os.replace(tmp, self.root / f"{key}.npz")
+
+        tmp = self.root / f".{key}.{suffix}.tmp.json"
+        tmp.write_text(json.dumps(results), encoding="utf-8")
+        os.replace(tmp, self.root / f"{key}.json")
+
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for p in self.root.glob("*.json"):
+            if p.name.startswith("."):
+                continue
+            try:
+                entries.append((p.stat().st_mtime, p))
+            except FileNotFoundError:
+                continue
+
+        for _, p in sorted(entries)[:max(0, len(entries) - self.max_entries)]:
+            self._remove(p.stem)
+
+    def _remove(self, key: str) -> bool:
+        # Atgriež True, ja ieraksts (json) tiešām tika dzēsts
+        removed = False
+        for suffix in (".json", ".npz"):
+            try:
+                (self.root / f"{key}{suffix}").unlink()
+                removed = removed or suffix == ".json"
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def invalidate(self, dataset_fp: str = None) -> int:
+        # Dzēš visus ierakstus vai tikai vienas datu kopas ierakstus; atgriež dzēsto skaitu
+        # Atslēgas tiek salīdzinātas kā teksts (kā ModelStore), dataset_fp netiek izmantots kā glob šablons
+        if not self.root.exists():
+            return 0
+        removed = 0
+        for p in self.root.glob("*.json"):
+            if p.name.startswith("."):
+                continue
+            if dataset_fp and not p.stem.startswith(f"{dataset_fp[:32]}_"):
+                continue
+            removed += self._remove(p.stem)
+        return removed
+
+    def record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        entries = 0
+        if self.root.exists():
+            entries = sum(1 for p in self.root.glob("*.json") if not p.name.startswith("."))
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "store_proba": self.store_proba,
+        }
+
+
+class ModelStore:
+    # Apmācīto modeļu krātuve diskā (GET /predict izmanto tos bez pārtrenēšanas)
+    # Katrs ieraksts: <atslēga>.joblib (modelis un nākamās izlozes X rinda) un <atslēga>.json (apraksts)
+    # Atslēga = datu nospiedums + viena modeļa konfigurācija (experiment.model_key)
+    # joblib numpy masīvus saglabā nesaspiestus ārpus pickle, tāpēc ielāde ar mmap_mode="r" tos kartē no diska
+    # (SGD svari, XGBoost native) — RandomForest koku masīvus sklearn tomēr pārkopē savā atmiņā
+    # Diska izmērs ir ierobežots (RandomForest ovr ir simtiem MB), vecākie ieraksti tiek dzēsti (LRU)
+    # Objekts ir pickle-draudzīgs (worker procesi saņem tikai ceļu un limitu)
+
+    def __init__(self, root: Path, max_bytes: int = 2048 * 1024 * 1024):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    def __getstate__(self):
+        return {"root": self.root, "max_bytes": self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state["root"], state["max_bytes"])
+
+    def _path(self, key: str, suffix: str) -> Path:
+        return self.root / f"{key}{suffix}"
+
+    def contains(self, key: str) -> bool:
+        # Apraksts tiek ierakstīts pēdējais, tāpēc tā esamība nozīmē pilnu ierakstu
+        return self._path(key, ".json").exists() and self._path(key, ".joblib").exists()
+
+    def meta(self, key: str):
+        try:
+            return json.loads(self._path(key, ".json").read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+
+    def get(self, key: str):
+        # Atgriež (model, x_next, meta) vai None, ja ieraksta nav
+        import joblib
+
+        meta = self.meta(key)
+        if meta is None:
+            return None
+        path = self._path(key, ".joblib")
+        try:
+            payload = joblib.load(path, mmap_mode="r")
+        except (FileNotFoundError, EOFError, ValueError, OSError):
+            return None
+
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return payload["model"], payload["x_next"], meta
+
+    def put(self, key: str, model, x_next, meta: dict):
+        # Saglabā ierakstu (pagaidu failos, tad atomāri pārdēvē; apraksts — pēdējais)
+        import joblib
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        suffix = uuid.uuid4().hex
+
+        tmp = self.root / f".{key}.{suffix}.tmp.joblib"
+        joblib.dump({"model": model, "x_next": x_next}, tmp)
+        os.replace(tmp, self._path(key, ".joblib"))
+
+        tmp = self.root / f".{key}.{suffix}.tmp.json"
+        tmp.write_text(json.dumps(meta, default=str), encoding="utf-8")
+        os.replace(tmp, self._path(key, ".json"))
+
+        self.evict()
+
+    def _remove(self, key: str):
+        for suffix in (".json", ".joblib"):
+            try:
+                self._path(key, suffix).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _entries(self):
+        entries = []
+        for p in self.root.glob("*.joblib"):
+            if p.name.startswith("."):
+                continue
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p.stem))
+        return entries
+
+    def evict(self):
+        # Dzēš vecākos ierakstus, līdz kopējais izmērs ir zem limita (jaunākais paliek vienmēr)
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, key in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            self._remove(key)
+            total -= size
+
+    def invalidate(self, dataset_fp: str = None) -> int:
+        # Dzēš visus ierakstus vai tikai vienas datu kopas ierakstus; atgriež dzēsto skaitu
+        if not self.root.exists():
+            return 0
+        removed = 0
+        for _, _, key in self._entries():
+            if dataset_fp and not key.startswith(f"{dataset_fp[:32]}_"):
+                continue
+            self._remove(key)
+            removed += 1
+        return removed
+
+    def stats(self):
+        entries = self._entries() if self.root.exists() else []
+        return {
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
+
+
+class ModelCache:
+    # Procesa iekšējā siltā kešatmiņa no ModelStore ielādētiem modeļiem (GET /predict)
+    # Atkārtotai prognozei modelis nav jāielādē no diska; limits — kopējais ierakstu izmērs diskā (LRU)
+
+    def __init__(self, store: ModelStore, max_bytes: int = 1024 * 1024 * 1024):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        # Atgriež ((model, x_next, meta), True, ja modelis jau bija atmiņā) vai None, ja ieraksta nav krātuvē
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], True
+
+        # Ielāde notiek ārpus slēdzenes, lai lēns modelis neaizturētu citus pieprasījumus
+        loaded = self.store.get(key)
+        with self._lock:
+            self.misses += 1
+            if loaded is None:
+                return None
+            try:
+                size = self.store._path(key, ".joblib").stat().st_size
+            except OSError:
+                size = 0
+            self._entries[key] = (loaded, size)
+            self._entries.move_to_end(key)
+            self._evict()
+        return loaded, False
+
+    def _evict(self):
+        # Jaunākais ieraksts paliek vienmēr, pat ja tas viens pārsniedz limitu
+        total = sum(size for _, size in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            _, (_, size) = self._entries.popitem(last=False)
+            total -= size
+
+    def invalidate(self, dataset_fp: str = None) -> int:
+        with self._lock:
+            keys = [k for k in self._entries if not dataset_fp or k.startswith(f"{dataset_fp[:32]}_")]
+            for k in keys:
+                del self._entries[k]
+        return len(keys)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": sum(size for _, size in self._entries.values()),
+                "max_bytes": self.max_bytes,
+            }
@@ -0,0 +1,41 @@
+import argparse
+import sys
+
+from app import create_app
+from app.services.batch import run_batch
+
+# Partiju izpilde no komandrindas: python batch.py manifests.json [--workers 2] [--rerun]
+# Izmanto to pašu konfigurāciju, datu kopu krātuvi un vēsturi kā Flask lietotne (create_app)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eksperimentu partija pēc manifesta")
+    parser.add_argument("manifest")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--core-budget", type=int, default=None)
+    parser.add_argument("--rerun", action="store_true", help="izpildīt arī jau pabeigtās kombinācijas")
+    args = parser.parse_args()
+
+    app = create_app()
+    try:
+        summary = run_batch(
+            args.manifest,
+            history=app.extensions["history"],
+            dataset_store=app.extensions["dataset_store"],
+            outputs_dir=app.config["OUTPUTS_DIR"],
+            workers=args.workers,
+            core_budget=args.core_budget or app.config["CORE_BUDGET"],
+            chunk_rows=app.config["INGEST_CHUNK_ROWS"],
+            rerun=args.rerun,
+        )
+    except ValueError as exc:
+        print(f"Kļūda: {exc}", file=sys.stderr)
+        return 2
+    except KeyboardInterrupt:
+        print("Partija pārtraukta; palaidiet vēlreiz, lai turpinātu", file=sys.stderr)
+        return 130
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
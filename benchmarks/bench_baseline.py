@@ -0,0 +1,64 @@
+# Monte Carlo nulles sadalījuma ātrums: null_distribution (partijās, ar krustotajiem reizinājumiem)
+# pret vienkāršu ciklu, kas katrai simulācijai sajauc prognozes un izsauc evaluate
+# Palaišana: python -m benchmarks.bench_baseline [--sims 1000] [--rows 100 500 2000]
+#
+# Dati ir sintētiski (Viking Lotto: 48 skaitļi, 6 katrā izlozē); rows — testa loga rindu skaits
+
+import argparse
+import time
+
+import numpy as np
+
+from app.services.baseline import null_distribution, NULL_METHODS
+from app.services.metrics import evaluate
+
+MAX_NUM = 48
+K_MAIN = 6
+
+
+def _synthetic(rows: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    Y = np.zeros((rows, MAX_NUM), dtype=np.float32)
+    picks = np.argsort(rng.random((rows, MAX_NUM)), axis=1)[:, :K_MAIN]
+    np.put_along_axis(Y, picks, 1.0, axis=1)
+    proba = (K_MAIN / MAX_NUM + 0.05 * rng.standard_normal((rows, MAX_NUM))).clip(0.01, 0.99).astype(np.float32)
+    return Y, proba
+
+
+def _loop(Y, proba, n_sims, method, seed=42):
+    # Atsauces variants: viena simulācija = viena evaluate izsaukšana
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n_sims):
+        if method == "shuffle":
+            sim = proba[rng.permutation(len(proba))]
+        else:
+            sim = rng.permuted(proba, axis=1)
+        out.append(evaluate(Y, sim, ks=(K_MAIN, 10))["logloss"])
+    return np.array(out)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sims", type=int, default=1000)
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 500, 2000])
+    parser.add_argument("--loop-sims", type=int, default=200, help="simulācijas cikla variantam (ekstrapolēts)")
+    args = parser.parse_args()
+
+    print(f"{'rows':>6} {'method':<8} {'sims':>6} {'batched_s':>10} {'loop_s':>8} {'speedup':>8}")
+    for rows in args.rows:
+        Y, proba = _synthetic(rows)
+        for method in NULL_METHODS:
+            start = time.perf_counter()
+            null_distribution(Y, proba, ks=(K_MAIN, 10), n_sims=args.sims, method=method)
+            batched = time.perf_counter() - start
+
+            start = time.perf_counter()
+            _loop(Y, proba, args.loop_sims, method)
+            loop = (time.perf_counter() - start) * args.sims / args.loop_sims
+
+            print(f"{rows:>6} {method:<8} {args.sims:>6} {batched:>10.3f} {loop:>8.2f} {loop / batched:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
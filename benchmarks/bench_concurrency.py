@@ -0,0 +1,202 @@
+# Slodzes tests vairākiem worker procesiem: vairāki servera procesi (kā gunicorn worker) ar kopīgām
+# uploads/, outputs/ un vēstures datubāzi saņem paralēlus POST /run pieprasījumus
+# Palaišana: python -m benchmarks.bench_concurrency [--servers 3] [--requests 12] [--clients 8]
+#
+# Katrs pieprasījums augšupielādē citu sintētisku vēsturi (atšķirīgs rindu skaits) ar VIENU UN TO PAŠU
+# faila nosaukumu; klientu ir vairāk nekā worker procesu, tāpēc daļa uzdevumu gaida rindā, kamēr citi
+# pieprasījumi augšupielādē jaunus failus. Pēc visu uzdevumu beigām tiek pārbaudīts, ka:
+# - katra uzdevuma train_rows / test_rows atbilst tieši viņa paša datiem (augšupielādes nesajaucas)
+# - vēsturē ir pievienotas visas rindas (pieprasījumi x modeļi), katram dataset_fp — modeļu skaits
+# - results_latest.csv un normalized_latest.csv ir pilni un no viena un tā paša uzdevuma
+# - uploads/incoming pēc uzdevumiem ir tukša
+# Uzdevuma statuss un rezultāti katru reizi tiek pieprasīti nejauši izvēlētam serverim (kā gunicorn bez
+# "sticky" maršrutēšanas), ne tikai tam, kas uzdevumu pieņēma
+# Lietotne raksta projekta outputs/ un uploads/ mapēs (tāpat kā darbībā)
+
+import argparse
+import io
+import json
+import multiprocessing as mp
+import random
+import threading
+import time
+import urllib.request
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+from .common import synthetic_history
+
+ROOT = Path(__file__).resolve().parent.parent
+BASE_PORT = 5310
+WINDOW = 1
+SPLIT_RATIO = 0.7
+
+
+def _serve(port, ready, stop):
+    # Viens servera process: sava lietotne, savs uzdevumu pūls, kopīgas mapes
+    from werkzeug.serving import make_server
+    from app import create_app
+
+    app = create_app()
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    ready.set()
+    stop.wait()
+    server.shutdown()
+    app.extensions["jobs"].shutdown()
+
+
+def _multipart(fields, filename, payload):
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+    for name, value in fields.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="dataset"; filename="{filename}"\r\n'
+               f'Content-Type: text/csv\r\n\r\n'.encode())
+    body.write(payload)
+    body.write(f"\r\n--{boundary}--\r\n".encode())
+    return body.getvalue(), f"multipart/form-data; boundary={boundary}"
+
+
+def _request(url, data=None, content_type=None):
+    req = urllib.request.Request(url, data=data, headers={"Accept": "application/json"})
+    if content_type:
+        req.add_header("Content-Type", content_type)
+    with urllib.request.urlopen(req, timeout=600) as resp:
+        return json.loads(resp.read())
+
+
+def _client(queue, ports, seed, outcomes, lock):
+    while True:
+        try:
+            rows = queue.pop()
+        except IndexError:
+            return
+        port = random.choice(ports)
+        polled = set()
+        payload = synthetic_history(rows, seed=seed + rows).to_csv(index=False).encode()
+        body, content_type = _multipart(
+            {"lottery": "viking", "file_format": "raw", "window": WINDOW, "no_cache": "1"},
+            "history.csv", payload,
+        )
+        start = time.perf_counter()
+        results = None
+        try:
+            job = _request(f"http://127.0.0.1:{port}/run", body, content_type)
+            while True:
+                poll_port = random.choice(ports)
+                polled.add(poll_port)
+                status = _request(f"http://127.0.0.1:{poll_port}/jobs/{job['job_id']}")
+                if status["status"] in ("done", "failed", "cancelled"):
+                    break
+                time.sleep(0.2)
+            if status["status"] == "done":
+                results = _request(f"http://127.0.0.1:{random.choice(ports)}/jobs/{job['job_id']}/results")["results"]
+        except Exception as exc:
+            status = {"status": "error", "error": str(exc)}
+        with lock:
+            outcomes.append({"rows": rows, "port": port, "polled": polled, "status": status, "results": results,
+                             "seconds": time.perf_counter() - start})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--servers", type=int, default=3)
+    parser.add_argument("--requests", type=int, default=12)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--min-rows", type=int, default=150)
+    args = parser.parse_args()
+
+    from app.services.experiment import MODEL_NAMES
+    from app.services.history import HistoryStore
+
+    ctx = mp.get_context("spawn")
+    ports = [BASE_PORT + i for i in range(args.servers)]
+    servers = []
+    stop = ctx.Event()
+    for port in ports:
+        ready = ctx.Event()
+        proc = ctx.Process(target=_serve, args=(port, ready, stop))
+        proc.start()
+        ready.wait(60)
+        servers.append(proc)
+
+    history = HistoryStore(ROOT / "outputs" / "history.sqlite3")
+    before = history.count()
+
+    # Atšķirīgs rindu skaits katram pieprasījumam -> atšķirīgi train_rows / test_rows
+    sizes = [args.min_rows + 10 * i for i in range(args.requests)]
+    queue = list(reversed(sizes))
+    # Jauni dati katrā palaišanā, lai datu kopu krātuve no iepriekšējām reizēm neslēptu sajaukšanos
+    seed = random.randrange(1_000_000)
+    outcomes, lock = [], threading.Lock()
+    start = time.perf_counter()
+    try:
+        clients = [threading.Thread(target=_client, args=(queue, ports, seed, outcomes, lock))
+                   for _ in range(args.clients)]
+        for t in clients:
+            t.start()
+        for t in clients:
+            t.join()
+    finally:
+        stop.set()
+        for proc in servers:
+            proc.join()
+    elapsed = time.perf_counter() - start
+
+    errors = []
+    fingerprints = {}
+    for o in sorted(outcomes, key=lambda o: o["rows"]):
+        if o["status"]["status"] != "done":
+            errors.append(f"{o['rows']} rindas: {o['status']['status']} {o['status']['error']}")
+            continue
+        samples = o["rows"] - WINDOW
+        expected = (int(samples * SPLIT_RATIO), samples - int(samples * SPLIT_RATIO))
+        got = {(r["train_rows"], r["test_rows"]) for r in o["results"]}
+        if got != {expected}:
+            errors.append(f"{o['rows']} rindas: gaidīts {expected}, saņemts {sorted(got)}")
+        fingerprints[o["results"][0]["dataset_fp"]] = o["rows"]
+        wait = o["status"]["started"] - o["status"]["created"]
+        print(f"rows={o['rows']:>5} port={o['port']} aptaujāti={sorted(o['polled'])} rindā {wait:>5.1f}s kopā {o['seconds']:>6.1f}s "
+              f"train/test={sorted(got)}")
+
+    if len(fingerprints) != len(sizes):
+        errors.append(f"Dažādu datu kopu: {len(fingerprints)}, gaidīts {len(sizes)}")
+
+    added = history.count() - before
+    if added != len(sizes) * len(MODEL_NAMES):
+        errors.append(f"Vēsturē pievienotas {added} rindas, gaidīts {len(sizes) * len(MODEL_NAMES)}")
+    recent = pd.DataFrame(history.query(limit=added)[0]) if added > 0 else pd.DataFrame()
+    if not recent.empty:
+        per_fp = recent.groupby("dataset_fp").size()
+        wrong = per_fp[per_fp != len(MODEL_NAMES)]
+        if len(wrong) or set(per_fp.index) != set(fingerprints):
+            errors.append(f"Vēstures rindas pa datu kopām nesakrīt: {per_fp.to_dict()}")
+
+    # "latest" faili: pilni un no viena uzdevuma (rezultātu test_rows atbilst normalizēto datu rindām)
+    latest = pd.read_csv(ROOT / "outputs" / "results_latest.csv")
+    normalized = pd.read_csv(ROOT / "outputs" / "normalized_latest.csv")
+    if latest["dataset_fp"].nunique() != 1 or len(latest) != len(MODEL_NAMES):
+        errors.append("results_latest.csv satur vairāku uzdevumu rindas")
+    elif fingerprints.get(latest["dataset_fp"].iloc[0]) != len(normalized):
+        errors.append("results_latest.csv un normalized_latest.csv ir no dažādiem uzdevumiem")
+
+    incoming = ROOT / "uploads" / "incoming"
+    left = list(incoming.iterdir()) if incoming.exists() else []
+    if left:
+        errors.append(f"uploads/incoming palikušas {len(left)} mapes")
+
+    print(f"\nserveri={args.servers} pieprasījumi={len(sizes)} klienti={args.clients} "
+          f"kopā {elapsed:.1f}s, vēsturē +{added} rindas")
+    if errors:
+        print("KĻŪDAS:")
+        for e in errors:
+            print(f"  {e}")
+        raise SystemExit(1)
+    print("OK: dati nav zaudēti un nav sajaukti")
+
+
+if __name__ == "__main__":
+    main()
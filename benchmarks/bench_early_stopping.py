@@ -0,0 +1,57 @@
+# Boosting modeļi: fiksēti 100 raundi pret agrīno apturēšanu (pēdējā treniņa daļa — validācijai) un laika budžetu
+# Palaišana: python -m benchmarks.bench_early_stopping [--rows 3000 10000] [--budgets 1 5]
+#
+# fit_s — apmācība + prognoze; rounds — vidējais raundu skaits uz booster (min–max);
+# budgets — termiņš sekundēs no apmācības sākuma (visiem booster kopā)
+
+import argparse
+import time
+
+from app.services.dataset import normalize_any
+from app.services.features import build_draw_matrix, build_lagged_features
+from app.services.metrics import evaluate
+from app.services.models import (EarlyStoppingBoosting, EARLY_STOPPING_DEFAULTS, MODEL_MODES,
+                                  build_xgboost_like, fit_and_predict, warm_up)
+from .common import LOTTERY_SPECS, synthetic_history
+
+
+def _row(rows, mode, variant, model, X, Y, split, k_main):
+    start = time.perf_counter()
+    proba = fit_and_predict(model, X[:split], Y[:split], X[split:])
+    elapsed = time.perf_counter() - start
+    info = model.training_info() if isinstance(model, EarlyStoppingBoosting) else None
+    rounds = f"{info['rounds']:.1f} ({info['rounds_min']}–{info['rounds_max']})" if info else "100"
+    exhausted = ("yes" if info["budget_exhausted"] else "no") if info else "-"
+    logloss = evaluate(Y[split:], proba, ks=(k_main,))["logloss"]
+    print(f"{rows:>7} {mode:<7} {variant:<12} {elapsed:>8.2f} {rounds:>16} {exhausted:>9} {logloss:>8.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[3_000, 10_000])
+    parser.add_argument("--budgets", type=float, nargs="+", default=[1.0, 5.0])
+    parser.add_argument("--modes", nargs="+", choices=MODEL_MODES, default=list(MODEL_MODES))
+    parser.add_argument("--lottery", choices=sorted(LOTTERY_SPECS), default="viking")
+    args = parser.parse_args()
+
+    warm_up(["xgboost"])
+    spec = LOTTERY_SPECS[args.lottery]
+    print(f"{'rows':>7} {'mode':<7} {'variant':<12} {'fit_s':>8} {'rounds':>16} {'exhausted':>9} {'logloss':>8}")
+    for rows in args.rows:
+        df_norm = normalize_any(synthetic_history(rows, lottery=args.lottery), lottery=args.lottery,
+                                file_format="raw")
+        _, draws = build_draw_matrix(df_norm, max_num=spec["max_main"])
+        X, Y = build_lagged_features(draws, window=1)
+        split = int(len(Y) * 0.7)
+
+        for mode in args.modes:
+            _row(rows, mode, "fixed", build_xgboost_like(mode=mode), X, Y, split, spec["k_main"])
+            _row(rows, mode, "early_stop", EarlyStoppingBoosting(mode=mode, **EARLY_STOPPING_DEFAULTS),
+                 X, Y, split, spec["k_main"])
+            for budget in args.budgets:
+                model = EarlyStoppingBoosting(mode=mode, deadline=time.time() + budget, **EARLY_STOPPING_DEFAULTS)
+                _row(rows, mode, f"budget={budget:g}s", model, X, Y, split, spec["k_main"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Vēstures features (gaps, freq, pairs) mērogošanās: viens piegājiens blokos ar kumulatīvām summām
+# pret vienkāršu variantu, kas katrai rindai pārlasa visu iepriekšējo vēsturi
+# Palaišana: python -m benchmarks.bench_features [--sizes 1000 10000 100000 1000000] [--rescan-max 4000]
+#
+# Lineārai mērogošanai laiks uz rindu (us_per_row) nemainās, palielinot izložu skaitu;
+# pārlasīšanas variantam tas aug proporcionāli vēsturei (O(n^2) kopā)
+
+import argparse
+
+import numpy as np
+
+from app.services.dataset import normalize_any
+from app.services.feature_engine import ENGINE_BUILDERS, FREQ_WINDOWS
+from app.services.features import build_draw_matrix
+from .common import LOTTERY_SPECS, synthetic_history, timed
+
+
+def _rescan(name, draws, start):
+    # Atsauces variants: katrai mērķa izlozei t skaitīšana no jauna pa draws[:t]
+    n, max_num = draws.shape
+    out = []
+    for t in range(start, n):
+        history = draws[:t]
+        if name == "gaps":
+            seen = np.where(history.any(axis=0), t - 1 - np.argmax(history[::-1], axis=0), -1)
+            out.append(t - seen)
+        elif name == "freq":
+            out.append(np.concatenate([history[max(0, t - w):].sum(axis=0) / min(w, t) for w in FREQ_WINDOWS]))
+        else:
+            pairs = history.T.astype(np.float64) @ history
+            np.fill_diagonal(pairs, 0)
+            out.append(draws[t - 1] @ pairs / t)
+    return np.asarray(out, dtype=np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--rescan-max", type=int, default=4_000)
+    parser.add_argument("--lottery", choices=sorted(LOTTERY_SPECS), default="viking")
+    args = parser.parse_args()
+
+    max_num = LOTTERY_SPECS[args.lottery]["max_main"]
+    print(f"{'rows':>9} {'features':<8} {'width':>6} {'engine_s':>9} {'us_per_row':>11} {'rescan_s':>9} {'speedup':>8}")
+    for n in args.sizes:
+        df_norm = normalize_any(synthetic_history(n, lottery=args.lottery), lottery=args.lottery, file_format="raw")
+        _, draws = build_draw_matrix(df_norm, max_num=max_num)
+
+        for name, build in ENGINE_BUILDERS.items():
+            fast, t_fast = timed(build, draws, 1)
+            per_row = t_fast / len(fast) * 1e6
+            if n <= args.rescan_max:
+                slow, t_slow = timed(_rescan, name, draws, 1)
+                # Abiem variantiem jādod tās pašas vērtības
+                assert np.allclose(fast, slow, atol=1e-4)
+                print(f"{n:>9} {name:<8} {fast.shape[1]:>6} {t_fast:>9.4f} {per_row:>11.2f} "
+                      f"{t_slow:>9.3f} {t_slow / t_fast:>7.1f}x")
+            else:
+                print(f"{n:>9} {name:<8} {fast.shape[1]:>6} {t_fast:>9.4f} {per_row:>11.2f} {'-':>9} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
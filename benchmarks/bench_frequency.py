@@ -0,0 +1,76 @@
+# Bāzes modeļu (frequency, decayed_frequency, recency) pilns walk-forward backtests:
+# viens kumulatīvs piegājiens blokos pret vienkāršu ciklu, kas skaitītājus atjaunina izlozi pēc izlozes
+# Palaišana: python -m benchmarks.bench_frequency [--sizes 1000 10000 100000 1000000] [--loop-max 100000]
+
+import argparse
+
+import numpy as np
+
+from app.services.features import build_draw_matrix
+from app.services.dataset import normalize_any
+from app.services.frequency import FREQUENCY_MODELS, frequency_params, predict_frequency
+from .common import LOTTERY_SPECS, synthetic_history, timed
+
+
+def _loop(name, draws, start):
+    # Atsauces variants: Python cikls ar skaitītājiem, O(max_num) uz izlozi
+    n, max_num = draws.shape
+    params = frequency_params(name)
+    alpha = params["alpha"]
+    prior = draws[:start].mean()
+    counts = np.zeros(max_num)
+    decay = 0.5 ** (1.0 / params.get("half_life", 1.0))
+    state, weight = np.zeros(max_num), 0.0
+    max_gap = int(np.ceil(4.0 / prior))
+    last = np.full(max_num, -1)
+    hits, trials = np.zeros(max_gap + 1), np.zeros(max_gap + 1)
+    table = None
+    out = np.empty((n - start, max_num))
+    for t in range(n):
+        gaps = np.minimum(t - last, max_gap)
+        if t >= start:
+            if name == "frequency":
+                out[t - start] = (counts + alpha * prior) / (t + alpha)
+            elif name == "decayed_frequency":
+                out[t - start] = (state + alpha * prior) / (weight + alpha)
+            else:
+                if table is None:
+                    table = (hits + alpha * prior) / (trials + alpha)
+                out[t - start] = table[gaps]
+        elif name == "recency":
+            np.add.at(trials, gaps, 1)
+            np.add.at(hits, gaps, draws[t])
+        counts += draws[t]
+        state = decay * (state + draws[t])
+        weight = decay * (weight + 1.0)
+        last[draws[t] == 1] = t
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--loop-max", type=int, default=100_000)
+    parser.add_argument("--lottery", choices=sorted(LOTTERY_SPECS), default="viking")
+    args = parser.parse_args()
+
+    max_num = LOTTERY_SPECS[args.lottery]["max_main"]
+    print(f"{'rows':>9} {'model':<18} {'cumulative_s':>13} {'loop_s':>8} {'speedup':>8}")
+    for n in args.sizes:
+        df_norm = normalize_any(synthetic_history(n, lottery=args.lottery), lottery=args.lottery, file_format="raw")
+        _, draws = build_draw_matrix(df_norm, max_num=max_num)
+        start = int(len(draws) * 0.7)
+
+        for name in FREQUENCY_MODELS:
+            fast, t_fast = timed(predict_frequency, name, draws, start)
+            if n <= args.loop_max:
+                slow, t_slow = timed(_loop, name, draws, start)
+                # Abiem variantiem jādod tās pašas varbūtības
+                assert np.allclose(fast, slow)
+                print(f"{n:>9} {name:<18} {t_fast:>13.4f} {t_slow:>8.3f} {t_slow / t_fast:>7.1f}x")
+            else:
+                print(f"{n:>9} {name:<18} {t_fast:>13.4f} {'-':>8} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# Salīdzina pilnu faila ielādi (read_table + normalize_any) ar straumēto ielādi pa blokiem
+# (iter_table_chunks + normalize_chunks): laiku un maksimālo atmiņu (RSS)
+# Palaišana: python -m benchmarks.bench_ingest [--rows 200000 100000] [--chunk-rows 50000]
+#
+# Katrs mērījums notiek atsevišķā procesā, lai atmiņas maksimums nesajauktos
+
+import argparse
+import multiprocessing as mp
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from app.services.dataset import read_table, normalize_any, normalize_chunks
+from app.services.ingest import iter_table_chunks, HAS_CALAMINE
+from .common import synthetic_raw
+
+
+def _write_files(rows, root: Path):
+    df = synthetic_raw(rows)
+    csv_path = root / f"raw_{rows}.csv"
+    df.to_csv(csv_path, index=False)
+
+    # Excel tiek rakstīts write_only režīmā, lai arī ģenerēšana neaizņemtu daudz atmiņas
+    from openpyxl import Workbook
+
+    xlsx_path = root / f"raw_{rows}.xlsx"
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(list(df.columns))
+    for row in df.itertuples(index=False):
+        ws.append([int(row[0]), row[1], row[2]])
+    wb.save(xlsx_path)
+    return csv_path, xlsx_path
+
+
+def _measure(path, method, chunk_rows):
+    start = time.perf_counter()
+    if method == "full":
+        df_norm = normalize_any(read_table(Path(path)), lottery="viking", file_format="raw")
+    else:
+        chunks = iter_table_chunks(Path(path), chunksize=chunk_rows)
+        df_norm = normalize_chunks(chunks, lottery="viking", file_format="raw")
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {"seconds": elapsed, "peak_rss_mb": peak, "rows": len(df_norm)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[50_000, 200_000])
+    parser.add_argument("--chunk-rows", type=int, default=50_000)
+    args = parser.parse_args()
+
+    print(f"Excel lasītājs: {'python-calamine' if HAS_CALAMINE else 'openpyxl read_only'}")
+    ctx = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'rows':>9} {'file':<5} {'method':<7} {'seconds':>8} {'peak_rss_mb':>12}")
+        for rows in args.rows:
+            for path in _write_files(rows, Path(tmp)):
+                for method in ("full", "chunked"):
+                    with ctx.Pool(1) as pool:
+                        r = pool.apply(_measure, (str(path), method, args.chunk_rows))
+                    print(f"{rows:>9} {path.suffix[1:]:<5} {method:<7} {r['seconds']:>8.2f} {r['peak_rss_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# Salīdzina OneVsRest ("ovr") un native multi-label ("native") modeļu režīmus:
+# apmācības laiku, maksimālo atmiņu (RSS) un metrikas
+# Palaišana: python -m benchmarks.bench_model_mode [--rows 2000] [--lottery viking]
+#
+# Katrs mērījums notiek atsevišķā procesā, lai atmiņas maksimums nesajauktos
+
+import argparse
+import multiprocessing as mp
+import resource
+import time
+
+from app.services.dataset import _normalize_raw
+from app.services.experiment import LEARNED_MODELS
+from app.services.features import build_draw_matrix, build_lagged_features
+from app.services.metrics import evaluate
+from app.services.models import MODEL_BUILDERS, fit_and_predict
+from .common import LOTTERY_SPECS, synthetic_raw
+
+
+def _measure(name, mode, rows, lottery):
+    spec = dict(LOTTERY_SPECS[lottery])
+    k_main = spec.pop("k_main")
+    df_norm = _normalize_raw(synthetic_raw(rows, **spec))
+    _, draws = build_draw_matrix(df_norm, max_num=spec["max_main"])
+    X, Y = build_lagged_features(draws)
+    split = int(len(Y) * 0.7)
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    proba = fit_and_predict(MODEL_BUILDERS[name](mode=mode), X[:split], Y[:split], X[split:])
+    elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    scores = evaluate(Y[split:], proba, ks=(k_main, 10))
+    return {
+        "fit_s": elapsed,
+        "peak_rss_mb": rss_after / 1024,
+        "rss_growth_mb": (rss_after - rss_before) / 1024,
+        "logloss": scores["logloss"],
+        "hit_k_main": scores["hit_at"][k_main],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000)
+    parser.add_argument("--lottery", choices=sorted(LOTTERY_SPECS), default="viking")
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    print(f"{'model':<14} {'mode':<7} {'fit_s':>8} {'peak_rss_mb':>12} {'growth_mb':>10} {'logloss':>8} {'hit@K':>7}")
+    for name in LEARNED_MODELS:
+        for mode in ("ovr", "native"):
+            with ctx.Pool(1) as pool:
+                r = pool.apply(_measure, (name, mode, args.rows, args.lottery))
+            print(f"{name:<14} {mode:<7} {r['fit_s']:>8.2f} {r['peak_rss_mb']:>12.1f} "
+                  f"{r['rss_growth_mb']:>10.1f} {r['logloss']:>8.4f} {r['hit_k_main']:>7.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# Salīdzina veco (iterrows) un vektorizēto RAW normalizāciju
+# Palaišana: python -m benchmarks.bench_normalize [--sizes 10000 100000 1000000] [--legacy-max 100000]
+#
+# Vecais ceļš uz 1M rindām strādā ļoti ilgi, tāpēc pēc noklusējuma tas tiek
+# izlaists lielākiem izmēriem par --legacy-max
+
+import argparse
+
+from pandas.testing import assert_frame_equal
+
+from app.services.dataset import _normalize_raw
+from .common import synthetic_raw, timed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-max", type=int, default=100_000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'vectorized_s':>14} {'legacy_s':>10} {'speedup':>8}")
+    for n in args.sizes:
+        df_raw = synthetic_raw(n)
+
+        fast, t_fast = timed(_normalize_raw, df_raw)
+
+        if n <= args.legacy_max:
+            slow, t_slow = timed(_normalize_raw, df_raw, legacy=True)
+            # Abiem ceļiem jādod identisks rezultāts
+            assert_frame_equal(fast, slow)
+            print(f"{n:>10} {t_fast:>14.3f} {t_slow:>10.3f} {t_slow / t_fast:>7.1f}x")
+        else:
+            print(f"{n:>10} {t_fast:>14.3f} {'-':>10} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
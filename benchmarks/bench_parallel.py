@@ -0,0 +1,34 @@
+# Salīdzina secīgu un paralēlu modeļu apmācību vienā eksperimentā
+# Palaišana: python -m benchmarks.bench_parallel [--rows 2000] [--core-budget N]
+
+import argparse
+import os
+
+from app.services.dataset import _normalize_raw
+from app.services.experiment import run_experiment
+from .common import synthetic_raw, timed
+
+
+def _metrics(results):
+    # Rezultātu rindas bez posmu laikiem (t_* kolonnas atšķiras katrā palaišanā)
+    return [{k: v for k, v in r.items() if not k.startswith("t_")} for r in results]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000)
+    parser.add_argument("--core-budget", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    df_norm = _normalize_raw(synthetic_raw(args.rows))
+
+    seq, t_seq = timed(run_experiment, df_norm, "viking", core_budget=args.core_budget)
+    par, t_par = timed(run_experiment, df_norm, "viking", parallel=True, core_budget=args.core_budget)
+
+    print(f"rows={args.rows} core_budget={args.core_budget}")
+    print(f"sequential_s={t_seq:.2f} parallel_s={t_par:.2f} speedup={t_seq / t_par:.2f}x")
+    print(f"identical_metrics={_metrics(seq) == _metrics(par)}")
+
+
+if __name__ == "__main__":
+    main()
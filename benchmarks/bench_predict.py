@@ -0,0 +1,73 @@
+# Nākamās izlozes prognoze: pārtrenēšana pret saglabātu modeli (ielāde no diska ar mmap) un siltu kešatmiņu
+# Palaišana: python -m benchmarks.bench_predict [--rows 3000] [--models logreg_sgd random_forest xgboost]
+#
+# retrain_s — modeļa apmācība uz treniņa daļas un prognoze (tas, kas bija vajadzīgs bez krātuves)
+# save_s / size_mb — ieraksta saglabāšana un izmērs diskā; cold_s — ielāde no krātuves + prognoze;
+# warm_s — prognoze no procesa kešatmiņas (atkārtots /predict)
+
+import argparse
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.dataset import normalize_any
+from app.services.experiment import LEARNED_MODELS, predict_next
+from app.services.features import build_draw_matrix, build_lagged_features, build_next_features
+from app.services.models import MODEL_BUILDERS, MODEL_MODES, fit_and_predict
+from app.services.store import ModelStore, ModelCache
+from .common import LOTTERY_SPECS, synthetic_history
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=3_000)
+    parser.add_argument("--window", type=int, default=1)
+    parser.add_argument("--models", nargs="+", choices=LEARNED_MODELS, default=LEARNED_MODELS)
+    parser.add_argument("--modes", nargs="+", choices=MODEL_MODES, default=list(MODEL_MODES))
+    parser.add_argument("--lottery", choices=sorted(LOTTERY_SPECS), default="viking")
+    args = parser.parse_args()
+
+    df_norm = normalize_any(synthetic_history(args.rows, lottery=args.lottery), lottery=args.lottery,
+                            file_format="raw")
+    _, draws = build_draw_matrix(df_norm, max_num=LOTTERY_SPECS[args.lottery]["max_main"])
+    X, Y = build_lagged_features(draws, window=args.window)
+    split = int(len(Y) * 0.7)
+    x_next = build_next_features(draws, window=args.window)
+
+    root = tempfile.mkdtemp(prefix="bench_predict_")
+    try:
+        store = ModelStore(root)
+        print(f"{'model':<14} {'mode':<7} {'retrain_s':>10} {'save_s':>8} {'size_mb':>8} {'cold_s':>8} {'warm_s':>8}")
+        for name in args.models:
+            for mode in args.modes:
+                model = MODEL_BUILDERS[name](mode=mode)
+                start = time.perf_counter()
+                fit_and_predict(model, X[:split], Y[:split], x_next)
+                retrain = time.perf_counter() - start
+
+                key = f"{name}_{mode}"
+                start = time.perf_counter()
+                store.put(key, model, x_next, {"model": name})
+                save = time.perf_counter() - start
+                size_mb = store.stats()["bytes"] / 2**20
+
+                # Jauna kešatmiņa = jauns serveris: pirmais pieprasījums ielādē modeli no diska
+                cache = ModelCache(store)
+                start = time.perf_counter()
+                cold_proba, _, _ = predict_next(cache, key)
+                cold = time.perf_counter() - start
+                start = time.perf_counter()
+                warm_proba, _, _ = predict_next(cache, key)
+                warm = time.perf_counter() - start
+                assert np.array_equal(cold_proba, warm_proba)
+
+                print(f"{name:<14} {mode:<7} {retrain:>10.2f} {save:>8.2f} {size_mb:>8.1f} {cold:>8.3f} {warm:>8.4f}")
+                store.invalidate()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
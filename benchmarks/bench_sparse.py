@@ -0,0 +1,76 @@
+# Blīvās (numpy uint8) un retinātās (CSR float32) features salīdzinājums platiem logiem:
+# X izveides laiks un izmērs, modeļa apmācības + prognozes laiks un maksimālās atmiņas pieaugums (RSS)
+# Palaišana: python -m benchmarks.bench_sparse [--rows 3000] [--windows 1 10 50] [--models logreg_sgd random_forest]
+#
+# Katrs mērījums notiek atsevišķā procesā, lai atmiņas maksimums nesajauktos
+# Modeļi blīvo uint8 X pārvērš float kopijā (SGD — float64 pēc StandardScaler, RandomForest — float32),
+# CSR paliek retināta visā apmācības laikā
+
+import argparse
+import multiprocessing as mp
+import resource
+import time
+
+from app.services.dataset import _normalize_raw
+from app.services.experiment import LEARNED_MODELS
+from app.services.features import build_draw_matrix, build_lagged_features, FEATURE_FORMATS
+from app.services.metrics import evaluate
+from app.services.models import MODEL_BUILDERS, fit_and_predict
+from .common import LOTTERY_SPECS, synthetic_raw
+
+
+def _nbytes(X):
+    if getattr(X, "format", None) == "csr":
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return X.nbytes
+
+
+def _measure(name, feature_format, window, rows, lottery):
+    spec = dict(LOTTERY_SPECS[lottery])
+    k_main = spec.pop("k_main")
+    df_norm = _normalize_raw(synthetic_raw(rows, **spec))
+    _, draws = build_draw_matrix(df_norm, max_num=spec["max_main"])
+
+    start = time.perf_counter()
+    X, Y = build_lagged_features(draws, window=window, sparse=feature_format == "sparse")
+    build_s = time.perf_counter() - start
+    split = int(len(Y) * 0.7)
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    proba = fit_and_predict(MODEL_BUILDERS[name](), X[:split], Y[:split], X[split:])
+    elapsed = time.perf_counter() - start
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return {
+        "build_s": build_s,
+        "x_mb": _nbytes(X) / 2**20,
+        "fit_s": elapsed,
+        "rows_per_s": len(Y) / elapsed,
+        "rss_growth_mb": (rss_after - rss_before) / 1024,
+        "logloss": evaluate(Y[split:], proba, ks=(k_main,))["logloss"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=3_000)
+    parser.add_argument("--windows", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--models", nargs="+", choices=LEARNED_MODELS, default=["logreg_sgd", "random_forest"])
+    parser.add_argument("--lottery", choices=sorted(LOTTERY_SPECS), default="viking")
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    print(f"{'model':<14} {'window':>6} {'format':<7} {'build_s':>8} {'x_mb':>8} {'fit_s':>8} "
+          f"{'rows/s':>9} {'rss_growth_mb':>14} {'logloss':>8}")
+    for name in args.models:
+        for window in args.windows:
+            for feature_format in FEATURE_FORMATS:
+                with ctx.Pool(1) as pool:
+                    r = pool.apply(_measure, (name, feature_format, window, args.rows, args.lottery))
+                print(f"{name:<14} {window:>6} {feature_format:<7} {r['build_s']:>8.3f} {r['x_mb']:>8.2f} "
+                      f"{r['fit_s']:>8.2f} {r['rows_per_s']:>9.0f} {r['rss_growth_mb']:>14.1f} {r['logloss']:>8.4f}")
+
+
+if __name__ == "__main__":
+    main()
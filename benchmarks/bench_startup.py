@@ -0,0 +1,63 @@
+# Lietotnes starta laiks: create_app() jaunā Python procesā ar slinko modeļu reģistru ("lazy")
+# un ar iepriekšējo uzvedību, kad sklearn un xgboost tika importēti jau moduļa ielādē ("eager")
+# Palaišana: python -m benchmarks.bench_startup [--runs 7]
+#
+# Katrs mērījums ir atsevišķs interpretatora process (aukstais starts); tiek mērīts arī pirmā modeļa
+# izveides laiks, jo slinkajā režīmā bibliotēku imports notiek tieši tur
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+if {eager!r}:
+    import sklearn.ensemble, sklearn.linear_model, sklearn.multiclass, sklearn.pipeline, sklearn.preprocessing
+    try:
+        import xgboost
+    except Exception:
+        pass
+from app import create_app
+create_app()
+startup = time.perf_counter() - start
+
+loaded = "sklearn" in sys.modules
+start = time.perf_counter()
+from app.services.models import build_logreg_sgd
+build_logreg_sgd()
+first_model = time.perf_counter() - start
+print(json.dumps({{"startup": startup, "first_model": first_model, "sklearn_loaded": loaded}}))
+"""
+
+
+def _probe(eager: bool) -> dict:
+    out = subprocess.run([sys.executable, "-c", PROBE.format(eager=eager)], cwd=ROOT,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+
+    # Pirmais palaidiens iesilda OS failu kešatmiņu, lai tas neietekmētu pirmo režīmu
+    _probe(eager=True)
+
+    print(f"{'mode':<6} {'startup_s':>10} {'min_s':>8} {'max_s':>8} {'first_model_s':>14} {'sklearn_at_start':>17}")
+    for mode in ("eager", "lazy"):
+        runs = [_probe(eager=mode == "eager") for _ in range(args.runs)]
+        startup = [r["startup"] for r in runs]
+        first_model = statistics.median(r["first_model"] for r in runs)
+        print(f"{mode:<6} {statistics.median(startup):>10.3f} {min(startup):>8.3f} {max(startup):>8.3f} "
+              f"{first_model:>14.3f} {str(runs[0]['sklearn_loaded']):>17}")
+
+
+if __name__ == "__main__":
+    main()
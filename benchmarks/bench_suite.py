@@ -0,0 +1,195 @@
+# Pilns veiktspējas komplekts: katra plūsmas posma un katra modeļa laiks un maksimālā atmiņa
+# uz sintētiskām vēsturēm (Viking 6/48 + 1/5 un Eurojackpot 5/50 + 2/12, RAW un PREPARED)
+# Palaišana: python -m benchmarks.bench_suite [--sizes 1000 10000 100000 1000000] [--model-max-rows 10000]
+#            [--out benchmarks/results/suite.json] [--compare vecais.json]
+#
+# Posmi: generate -> normalize (normalize_any) -> draw_matrix -> lagged_features -> metrics (evaluate)
+# un model:<nosaukums> (fit + predict_proba uz 70/30 sadalījuma)
+# Katra konfigurācija (un katrs modelis) tiek mērīts atsevišķā procesā, lai atmiņas maksimums nesajauktos
+# Rezultāti tiek saglabāti JSON failā ar commit un bibliotēku versijām, lai tos varētu salīdzināt starp commitiem
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import platform
+import resource
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+from .common import LOTTERY_SPECS, synthetic_history
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def _rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _stage(records, name, fn, *args, **kwargs):
+    # Izpilda vienu posmu un pieraksta ilgumu un procesa atmiņas maksimumu pēc tā
+    before = _rss_mb()
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    records.append({
+        "stage": name,
+        "seconds": time.perf_counter() - start,
+        "peak_rss_mb": _rss_mb(),
+        "rss_growth_mb": _rss_mb() - before,
+    })
+    return result
+
+
+def _features(rows, lottery, file_format, seed, records=None):
+    # Sagatavo X/Y no sintētiskiem datiem; ja records ir dots, katrs posms tiek mērīts
+    from app.services.dataset import normalize_any
+    from app.services.features import build_draw_matrix, build_lagged_features
+
+    def run(name, fn, *args, **kwargs):
+        if records is None:
+            return fn(*args, **kwargs)
+        return _stage(records, name, fn, *args, **kwargs)
+
+    max_num = LOTTERY_SPECS[lottery]["max_main"]
+    df_raw = run("generate", synthetic_history, rows, lottery, file_format, seed)
+    df_norm = run("normalize", normalize_any, df_raw, lottery=lottery, file_format=file_format)
+    del df_raw
+    _, draws = run("draw_matrix", build_draw_matrix, df_norm, max_num=max_num)
+    X, Y = run("lagged_features", build_lagged_features, draws)
+    return X, Y
+
+
+def _measure_pipeline(rows, lottery, file_format, seed):
+    from app.services.metrics import evaluate
+
+    records = []
+    X, Y = _features(rows, lottery, file_format, seed, records)
+
+    # Metriku posms neatkarīgs no modeļa: nejauša varbūtību matrica testa daļas izmērā
+    split = int(len(Y) * 0.7)
+    proba = np.random.default_rng(seed).random(Y[split:].shape, dtype=np.float32)
+    k_main = LOTTERY_SPECS[lottery]["k_main"]
+    _stage(records, "metrics", evaluate, Y[split:], proba, ks=(k_main, 10))
+    return records
+
+
+def _measure_model(name, rows, lottery, file_format, seed, model_mode):
+    from app.services.models import MODEL_BUILDERS, fit_and_predict
+
+    X, Y = _features(rows, lottery, file_format, seed)
+    split = int(len(Y) * 0.7)
+    model = MODEL_BUILDERS[name](mode=model_mode)
+
+    records = []
+    _stage(records, f"model:{name}", fit_and_predict, model, X[:split], Y[:split], X[split:])
+    return records
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=Path(__file__).resolve().parent, timeout=10)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _meta(args):
+    import pandas as pd
+    import sklearn
+    from app.services.models import HAS_XGB
+
+    versions = {"python": platform.python_version(), "numpy": np.__version__,
+                "pandas": pd.__version__, "sklearn": sklearn.__version__}
+    if HAS_XGB:
+        import xgboost
+        versions["xgboost"] = xgboost.__version__
+
+    return {
+        "commit": _git_commit(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "seed": args.seed,
+        "model_mode": args.model_mode,
+        "versions": versions,
+    }
+
+
+def _compare(records, baseline_path: Path, threshold: float):
+    # Salīdzina ar iepriekš saglabātu rezultātu failu; izceļ posmus, kas kļuvuši lēnāki par threshold reizēm
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    key = lambda r: (r["rows"], r["lottery"], r["format"], r["stage"])
+    old = {key(r): r for r in baseline["records"]}
+
+    print(f"\nSalīdzinājums ar {baseline_path} (commit {baseline['meta'].get('commit')})")
+    print(f"{'rows':>9} {'lottery':<7} {'format':<9} {'stage':<22} {'old_s':>8} {'new_s':>8} {'ratio':>6}")
+    regressions = 0
+    for r in records:
+        o = old.get(key(r))
+        if o is None or o["seconds"] <= 0:
+            continue
+        ratio = r["seconds"] / o["seconds"]
+        flag = " <-" if ratio > threshold else ""
+        regressions += ratio > threshold
+        print(f"{r['rows']:>9} {r['lottery']:<7} {r['format']:<9} {r['stage']:<22} "
+              f"{o['seconds']:>8.3f} {r['seconds']:>8.3f} {ratio:>6.2f}{flag}")
+    print(f"Lēnāki par {threshold:.2f}x: {regressions}")
+
+
+def main():
+    from app.services.experiment import LEARNED_MODELS
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--lotteries", nargs="+", choices=sorted(LOTTERY_SPECS), default=sorted(LOTTERY_SPECS))
+    parser.add_argument("--formats", nargs="+", choices=["raw", "prepared"], default=["raw", "prepared"])
+    parser.add_argument("--models", nargs="*", choices=LEARNED_MODELS, default=LEARNED_MODELS)
+    # Modeļu apmācība (īpaši OneVsRest RandomForest) uz 1M rindām ilgst stundas, tāpēc pēc noklusējuma
+    # modeļi tiek mērīti tikai līdz šim izmēram; pilnam diapazonam: --model-max-rows 1000000
+    parser.add_argument("--model-max-rows", type=int, default=10_000)
+    parser.add_argument("--model-mode", choices=["ovr", "native"], default="ovr")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, default=None)
+    parser.add_argument("--compare", type=Path, default=None)
+    parser.add_argument("--threshold", type=float, default=1.2)
+    args = parser.parse_args()
+
+    meta = _meta(args)
+    ctx = mp.get_context("spawn")
+    records = []
+
+    print(f"{'rows':>9} {'lottery':<7} {'format':<9} {'stage':<22} {'seconds':>9} {'peak_rss_mb':>12} {'growth_mb':>10}")
+    for rows in args.sizes:
+        for lottery in args.lotteries:
+            for file_format in args.formats:
+                jobs = [(_measure_pipeline, (rows, lottery, file_format, args.seed))]
+                if rows <= args.model_max_rows:
+                    jobs += [(_measure_model, (name, rows, lottery, file_format, args.seed, args.model_mode))
+                             for name in args.models]
+
+                for fn, fn_args in jobs:
+                    with ctx.Pool(1) as pool:
+                        stage_records = pool.apply(fn, fn_args)
+                    for r in stage_records:
+                        r.update(rows=rows, lottery=lottery, format=file_format)
+                        records.append(r)
+                        print(f"{rows:>9} {lottery:<7} {file_format:<9} {r['stage']:<22} {r['seconds']:>9.3f} "
+                              f"{r['peak_rss_mb']:>12.1f} {r['rss_growth_mb']:>10.1f}")
+
+    out = args.out or RESULTS_DIR / f"suite_{meta['commit'] or 'nocommit'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({"meta": meta, "records": records}, indent=2), encoding="utf-8")
+    print(f"\nRezultāti saglabāti: {out}")
+
+    if args.compare is not None:
+        _compare(records, args.compare, args.threshold)
+
+
+if __name__ == "__main__":
+    main()
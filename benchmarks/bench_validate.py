@@ -0,0 +1,23 @@
+# Mēra loterijas drošības pārbaudes ātrumu uz normalizētiem datiem
+# Palaišana: python -m benchmarks.bench_validate [--sizes 10000 100000 1000000]
+
+import argparse
+
+from app.services.dataset import _normalize_raw, _validate_lottery_safety
+from .common import synthetic_raw, timed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'normalize_s':>12} {'validate_s':>11}")
+    for n in args.sizes:
+        df_norm, t_norm = timed(_normalize_raw, synthetic_raw(n))
+        _, t_val = timed(_validate_lottery_safety, df_norm, "viking")
+        print(f"{n:>10} {t_norm:>12.3f} {t_val:>11.4f}")
+
+
+if __name__ == "__main__":
+    main()
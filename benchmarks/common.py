@@ -0,0 +1,89 @@
+# Kopīgas palīgfunkcijas veiktspējas mērījumiem (benchmarks)
+# Palaišana no projekta saknes, piemēram: python -m benchmarks.bench_normalize
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services.dataset import RAW_COLUMNS
+
+
+# Loteriju noteikumi sintētiskajiem datiem: pamat skaitļi n_main no 1..max_main, bonusi n_bonus no 1..max_bonus
+# k_main — top-K metrikai (hit@K_main)
+LOTTERY_SPECS = {
+    "viking": dict(n_main=6, max_main=48, n_bonus=1, max_bonus=5, k_main=6),
+    "euro": dict(n_main=5, max_main=50, n_bonus=2, max_bonus=12, k_main=5),
+}
+
+
+def _synthetic_numbers(n_rows: int, n_main: int, max_main: int, n_bonus: int, max_bonus: int, seed: int):
+    # Ģenerē (datumi, pamat skaitļi [n_rows, n_main], bonusi [n_rows, n_bonus]) ar fiksētu seed
+    # Skaitļi katrā izlozē ir unikāli
+
+    rng = np.random.default_rng(seed)
+
+    # Datumi iet pa nedēļām; ļoti garām vēsturēm intervāls tiek saspiests, lai datumi
+    # paliktu pandas atbalstītajā diapazonā (tad vairākām izlozēm var sakrist datums)
+    step = min(7.0, 100_000 / max(n_rows, 1))
+    offsets = (np.arange(n_rows) * step).astype(np.int64)
+    dates = pd.Timestamp("1700-01-01") + pd.to_timedelta(offsets, unit="D")
+
+    # Unikāli skaitļi rindā: pirmās n_main pozīcijas no nejaušas permutācijas
+    mains = np.argsort(rng.random((n_rows, max_main)), axis=1)[:, :n_main] + 1
+    bonuses = np.argsort(rng.random((n_rows, max_bonus)), axis=1)[:, :n_bonus] + 1
+    return dates, mains, bonuses
+
+
+def synthetic_raw(n_rows: int, n_main: int = 6, max_main: int = 48,
+                  n_bonus: int = 1, max_bonus: int = 5, seed: int = 42) -> pd.DataFrame:
+    # Ģenerē sintētisku LatLoto RAW tabulu (noklusējumā Viking Lotto 6/48 + 1/5)
+
+    dates, mains, bonuses = _synthetic_numbers(n_rows, n_main, max_main, n_bonus, max_bonus, seed)
+
+    main_text = pd.Series([",".join(map(str, r)) for r in mains.tolist()])
+    if n_bonus:
+        bonus_text = pd.Series([",".join(map(str, r)) for r in bonuses.tolist()])
+        numbers = main_text + " + " + bonus_text
+    else:
+        numbers = main_text
+
+    return pd.DataFrame({
+        RAW_COLUMNS[0]: np.arange(n_rows, 0, -1),
+        RAW_COLUMNS[1]: dates.strftime("%d.%m.%Y"),
+        RAW_COLUMNS[2]: numbers,
+    })
+
+
+def synthetic_prepared(n_rows: int, n_main: int = 6, max_main: int = 48,
+                       n_bonus: int = 1, max_bonus: int = 5, seed: int = 42) -> pd.DataFrame:
+    # Ģenerē sintētisku PREPARED tabulu (draw_no, date, n1..n6, b1..b2) ar tiem pašiem skaitļiem kā synthetic_raw
+    # Skaitļi rindā ir sakārtoti augoši; trūkstošās pozīcijas (piem., n6 Eurojackpot) ir tukšas
+
+    dates, mains, bonuses = _synthetic_numbers(n_rows, n_main, max_main, n_bonus, max_bonus, seed)
+    mains = np.sort(mains, axis=1)
+    bonuses = np.sort(bonuses, axis=1)
+
+    data = {"draw_no": np.arange(n_rows, 0, -1), "date": dates.strftime("%d.%m.%Y")}
+    for i in range(6):
+        data[f"n{i+1}"] = pd.array(mains[:, i], dtype="Int64") if i < n_main else pd.array([pd.NA] * n_rows, dtype="Int64")
+    for i in range(2):
+        data[f"b{i+1}"] = pd.array(bonuses[:, i], dtype="Int64") if i < n_bonus else pd.array([pd.NA] * n_rows, dtype="Int64")
+    return pd.DataFrame(data)
+
+
+def synthetic_history(n_rows: int, lottery: str = "viking", file_format: str = "raw", seed: int = 42) -> pd.DataFrame:
+    # Sintētiska izložu vēsture pēc loterijas noteikumiem (LOTTERY_SPECS) RAW vai PREPARED formātā
+    spec = {k: v for k, v in LOTTERY_SPECS[lottery].items() if k != "k_main"}
+    if file_format == "raw":
+        return synthetic_raw(n_rows, seed=seed, **spec)
+    if file_format == "prepared":
+        return synthetic_prepared(n_rows, seed=seed, **spec)
+    raise ValueError("Nezināms file_format parametrs")
+
+
+def timed(fn, *args, **kwargs):
+    # Izpilda funkciju un atgriež (rezultāts, ilgums sekundēs)
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
@@ -0,0 +1,28 @@
+# Sintētisku izložu vēstures ģenerators (CSV vai XLSX failam augšupielādei vai mērījumiem)
+# Palaišana: python -m benchmarks.generate --lottery euro --format prepared --rows 100000 --out euro.csv [--seed 42]
+
+import argparse
+from pathlib import Path
+
+from .common import LOTTERY_SPECS, synthetic_history
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lottery", choices=sorted(LOTTERY_SPECS), default="viking")
+    parser.add_argument("--format", dest="file_format", choices=["raw", "prepared"], default="raw")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, required=True)
+    args = parser.parse_args()
+
+    df = synthetic_history(args.rows, lottery=args.lottery, file_format=args.file_format, seed=args.seed)
+    if args.out.suffix.lower() == ".xlsx":
+        df.to_excel(args.out, index=False)
+    else:
+        df.to_csv(args.out, index=False)
+    print(f"{args.out}: {len(df)} rindas ({args.lottery}, {args.file_format}, seed={args.seed})")
+
+
+if __name__ == "__main__":
+    main()